@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from src.database.database import AsyncSessionLocal
+from src.services.analytics import AnalyticsService
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_ROLLUP_ENABLED = os.getenv("ANALYTICS_ROLLUP_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class AnalyticsRollupJob:
+    """Background task that periodically recomputes the analytics rollups of the hours marked dirty
+    by the order triggers. Several workers can run it at once, each claims different hours."""
+
+    def __init__(self, interval_seconds: float = 30.0, batch_size: int = 24):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """Recomputes dirty hours batch by batch until none are left, returns how many were recomputed"""
+        recomputed = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                batch = await AnalyticsService.refresh_rollups(db, self.batch_size)
+            recomputed += batch
+            if batch < self.batch_size:
+                return recomputed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                recomputed = await self.run_once()
+                if recomputed:
+                    logger.info("Recomputed analytics rollups of %s hours.", recomputed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Analytics rollup refresh failed: %s. Retrying in %ss.", e, self.interval_seconds)
+            await asyncio.sleep(self.interval_seconds)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+analytics_job = AnalyticsRollupJob(interval_seconds=float(os.getenv("ANALYTICS_ROLLUP_INTERVAL_SECONDS", "30")),
+                                   batch_size=int(os.getenv("ANALYTICS_ROLLUP_BATCH_SIZE", "24")))
@@ -0,0 +1,71 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class TTLCache:
+    """In-process LRU cache with per-entry TTL and a version counter.
+
+    Keys are tuples whose first element is a namespace (e.g. "burgers"), so writes can drop
+    a whole namespace at once. Every invalidation bumps the version; a value read from the
+    database before an invalidation is not stored if it is passed to set() with the old version."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Tuple[Hashable, ...], value: Any, version: Optional[int] = None) -> None:
+        if version is not None and version != self.version:
+            return
+
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, namespace: Optional[str] = None) -> None:
+        """Drops all entries of the namespace (or everything when None) and bumps the version"""
+        self.version += 1
+        if namespace is None:
+            self._entries.clear()
+            return
+
+        for key in [key for key in self._entries if key[0] == namespace]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"version": self.version,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
+
+
+menu_cache = TTLCache(ttl_seconds=float(os.getenv("MENU_CACHE_TTL_SECONDS", "300")),
+                      max_entries=int(os.getenv("MENU_CACHE_MAX_ENTRIES", "512")))
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, List, Optional
+import asyncpg
+
+from src.core.cache import TTLCache, menu_cache
+from src.database.database import LISTEN_DATABASE_DSN
+from src.database.notify import CACHE_INVALIDATION_CHANNEL
+
+logger = logging.getLogger(__name__)
+
+CACHE_LISTENER_ENABLED = os.getenv("CACHE_LISTENER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class CacheInvalidationListener:
+    """Keeps a dedicated asyncpg connection LISTENing on the cache invalidation channel and evicts
+    the notified namespace from the local caches, so writes made by other workers are seen here.
+
+    Notifications sent while the connection is down are lost, so all caches are cleared on every
+    (re)connect."""
+
+    def __init__(self, dsn: str, caches: List[TTLCache],
+                 reconnect_delay_seconds: float = 5.0, health_check_interval_seconds: float = 30.0):
+        self.dsn = dsn
+        self.caches = caches
+        self.reconnect_delay_seconds = reconnect_delay_seconds
+        self.health_check_interval_seconds = health_check_interval_seconds
+        self._connection: Optional[asyncpg.Connection] = None
+        self._connection_lock = asyncio.Lock()
+        self._handlers: Dict[str, Callable[[str], None]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add_handler(self, channel: str, handler: Callable[[str], None]) -> None:
+        """Also LISTENs on another channel over the same connection and passes its payloads to handler"""
+        self._handlers[channel] = handler
+
+    async def notify(self, channel: str, payload: str) -> bool:
+        """Sends a NOTIFY over the listener connection, returns False when it's currently down"""
+        connection = self._connection
+        if connection is None or connection.is_closed():
+            return False
+        async with self._connection_lock:
+            await connection.execute("SELECT pg_notify($1, $2)", channel, payload)
+        return True
+
+    def _invalidate(self, namespace: Optional[str]) -> None:
+        for cache in self.caches:
+            cache.invalidate(namespace)
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        logger.debug("Cache invalidation for '%s' received from backend %s.", payload, pid)
+        self._invalidate(payload or None)
+
+    def _on_channel_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            self._handlers[channel](payload)
+        except Exception as e:
+            logger.warning("Failed to handle notification on channel '%s': %s.", channel, e)
+
+    async def _listen_until_lost(self) -> None:
+        connection_lost = asyncio.Event()
+        async with self._connection_lock:
+            self._connection = await asyncpg.connect(self.dsn)
+            self._connection.add_termination_listener(lambda connection: connection_lost.set())
+            await self._connection.add_listener(CACHE_INVALIDATION_CHANNEL, self._on_notification)
+            for channel in self._handlers:
+                await self._connection.add_listener(channel, self._on_channel_notification)
+        self._invalidate(None)
+        logger.info("Listening for cache invalidations on channel '%s'.", CACHE_INVALIDATION_CHANNEL)
+
+        while not connection_lost.is_set():
+            try:
+                await asyncio.wait_for(connection_lost.wait(), timeout=self.health_check_interval_seconds)
+            except asyncio.TimeoutError:
+                async with self._connection_lock:
+                    await self._connection.execute("SELECT 1")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen_until_lost()
+                logger.warning("Cache invalidation listener connection lost, reconnecting.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Cache invalidation listener failed: %s. Retrying in %ss.",
+                               e, self.reconnect_delay_seconds)
+            finally:
+                await self._close_connection()
+            await asyncio.sleep(self.reconnect_delay_seconds)
+
+    async def _close_connection(self) -> None:
+        if self._connection is not None and not self._connection.is_closed():
+            try:
+                await self._connection.close(timeout=5)
+            except Exception as e:
+                logger.debug("Failed to close cache invalidation listener connection cleanly: %s.", e)
+        self._connection = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close_connection()
+
+
+cache_listener = CacheInvalidationListener(LISTEN_DATABASE_DSN, [menu_cache])
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import logging
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Set
+
+from src.core.cache_listener import cache_listener
+from src.database.notify import ORDER_EVENTS_CHANNEL, MAX_NOTIFY_PAYLOAD_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Tells this worker's own notifications apart from the ones relayed by other workers
+WORKER_ID = uuid.uuid4().hex
+
+
+class OrderEventBroker:
+    """Fans order events out to the live order board subscribers of this worker and relays them
+    to the other workers with NOTIFY over the listener connection.
+
+    Every subscriber gets a bounded queue; a subscriber that falls behind loses its oldest events
+    instead of growing memory."""
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._relay_tasks: Set[asyncio.Task] = set()
+
+    @asynccontextmanager
+    async def subscribe(self) -> AsyncIterator["asyncio.Queue[Dict[str, Any]]"]:
+        queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def publish(self, event_type: str, order: Dict[str, Any]) -> None:
+        """Delivers the event locally right away and relays it to the other workers in the background"""
+        event = {"type": event_type, "order": order}
+        self._deliver(event)
+
+        payload = json.dumps({"origin": WORKER_ID, **event}, default=str)
+        if len(payload.encode()) > MAX_NOTIFY_PAYLOAD_BYTES:
+            logger.warning("Order event %s for order %s is too large to relay to other workers.",
+                           event_type, order.get("id"))
+            return
+        task = asyncio.create_task(self._relay(payload))
+        self._relay_tasks.add(task)
+        task.add_done_callback(self._relay_tasks.discard)
+
+    async def _relay(self, payload: str) -> None:
+        try:
+            if not await cache_listener.notify(ORDER_EVENTS_CHANNEL, payload):
+                logger.debug("Listener connection is down, order event not relayed to other workers.")
+        except Exception as e:
+            logger.warning("Failed to relay order event to other workers: %s.", e)
+
+    def receive_remote(self, payload: str) -> None:
+        """Listener handler for the order events channel"""
+        event = json.loads(payload)
+        if event.pop("origin", None) == WORKER_ID:
+            return
+        self._deliver(event)
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+order_events = OrderEventBroker()
+cache_listener.add_handler(ORDER_EVENTS_CHANNEL, order_events.receive_remote)
@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import Header
+from pydantic import BaseModel
+
+from src.database.database import AsyncSessionLocal
+from src.database.crud.idempotency import delete_expired_idempotency_keys
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_CLEANUP_ENABLED = os.getenv("IDEMPOTENCY_CLEANUP_ENABLED", "true").lower() in ("1", "true", "yes")
+IDEMPOTENCY_KEY_TTL = timedelta(hours=float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24")))
+
+
+def get_idempotency_key(
+        idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255)) -> Optional[str]:
+    """Dependency reading the client's Idempotency-Key header"""
+    return idempotency_key
+
+
+def request_fingerprint(request: BaseModel) -> str:
+    """Hash of the request body, a key reused with a different body is rejected instead of replayed"""
+    return hashlib.sha256(request.model_dump_json().encode()).hexdigest()
+
+
+class IdempotencyKeyCleanupJob:
+    """Background task that deletes idempotency keys older than the TTL in small batches,
+    so the table stays proportional to the traffic of one TTL window"""
+
+    def __init__(self, ttl: timedelta = IDEMPOTENCY_KEY_TTL, interval_seconds: float = 600.0,
+                 batch_size: int = 1000):
+        self.ttl = ttl
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> int:
+        """Deletes expired keys batch by batch until none are left, returns how many were deleted"""
+        created_before = datetime.now(timezone.utc) - self.ttl
+        deleted = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                batch = await delete_expired_idempotency_keys(db, created_before, self.batch_size)
+            deleted += batch
+            if batch < self.batch_size:
+                return deleted
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                deleted = await self.run_once()
+                if deleted:
+                    logger.info("Deleted %s expired idempotency keys.", deleted)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Idempotency key cleanup failed: %s. Retrying in %ss.", e, self.interval_seconds)
+            await asyncio.sleep(self.interval_seconds)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+idempotency_cleanup_job = IdempotencyKeyCleanupJob(
+    interval_seconds=float(os.getenv("IDEMPOTENCY_CLEANUP_INTERVAL_SECONDS", "600")))
@@ -0,0 +1,130 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+@dataclass
+class RequestStats:
+    """Per-request database counters, filled by the engine and pool hooks while the request runs"""
+    db_query_count: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (f'app;dur={total_seconds * 1000:.2f}, '
+                f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_query_count} queries", '
+                f'pool;dur={self.pool_wait_seconds * 1000:.2f}')
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+class Histogram:
+    """Minimal Prometheus-style cumulative histogram keyed by label values"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            # one counter per bucket, then +Inf, sum and count
+            series = self._series[label_values] = [0.0] * (len(self.buckets) + 3)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[index] += 1
+        series[-3] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self._series.items()):
+            labels = ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(self.label_names, label_values))
+            prefix = labels + "," if labels else ""
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {count:g}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {series[-3]:g}')
+            lines.append(f"{self.name}_sum{{{labels}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{labels}}} {series[-1]:g}")
+        return lines
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram("http_request_duration_seconds", "HTTP request latency by route.",
+                             ("method", "route", "status"), DEFAULT_LATENCY_BUCKETS)
+REQUEST_DB_QUERIES = Histogram("http_request_db_queries", "Database queries issued per HTTP request.",
+                               ("method", "route"), DEFAULT_COUNT_BUCKETS)
+REQUEST_DB_SECONDS = Histogram("http_request_db_seconds", "Time spent in database queries per HTTP request.",
+                               ("method", "route"), DEFAULT_LATENCY_BUCKETS)
+POOL_WAIT_SECONDS = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+                              (), DEFAULT_LATENCY_BUCKETS)
+
+
+def observe_request(method: str, route: str, status_code: int, duration_seconds: float, stats: RequestStats) -> None:
+    REQUEST_DURATION.observe(duration_seconds, method, route, str(status_code))
+    REQUEST_DB_QUERIES.observe(stats.db_query_count, method, route)
+    REQUEST_DB_SECONDS.observe(stats.db_seconds, method, route)
+
+
+def record_pool_wait(seconds: float) -> None:
+    POOL_WAIT_SECONDS.observe(seconds)
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.pool_wait_seconds += seconds
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # kept on the execution context, not the connection: a statement that raises never reaches
+    # after_cursor_execute, and a start time left on the pooled connection would be paired with a later query
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+
+def _record_query(context) -> None:
+    started = getattr(context, "_query_start_time", None)
+    stats = current_request_stats.get()
+    if started is not None and stats is not None:
+        stats.db_query_count += 1
+        stats.db_seconds += time.perf_counter() - started
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    _record_query(context)
+
+
+def _handle_error(exception_context) -> None:
+    """Failed statements (unique violations, check constraints, serialization failures) count too"""
+    if exception_context.execution_context is not None:
+        _record_query(exception_context.execution_context)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Counts queries and DB time of the current request via cursor execution events"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def render_metrics(gauges: Dict[str, Any]) -> str:
+    """Prometheus text exposition of the histograms plus the given point-in-time gauges"""
+    lines: List[str] = []
+    for histogram in (REQUEST_DURATION, REQUEST_DB_QUERIES, REQUEST_DB_SECONDS, POOL_WAIT_SECONDS):
+        lines.extend(histogram.render())
+    for name, value in gauges.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
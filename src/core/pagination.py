@@ -0,0 +1,45 @@
+import base64
+import json
+from typing import Optional, Sequence, Any
+from fastapi import HTTPException, Request, Response, status
+
+
+def encode_cursor(last_id: int) -> str:
+    """Encodes the keyset position (last seen id) into an opaque cursor string"""
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decodes a cursor produced by encode_cursor, raises ValueError for malformed cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["id"]
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}.")
+    if not isinstance(last_id, int) or last_id < 0:
+        raise ValueError(f"Invalid cursor: {cursor}.")
+    return last_id
+
+
+def get_after_id(after: Optional[str] = None) -> Optional[int]:
+    """Dependency turning the ?after=<cursor> query parameter into the last seen id"""
+    if after is None:
+        return None
+    try:
+        return decode_cursor(after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def set_next_cursor_headers(request: Request, response: Response, items: Sequence[Any], limit: int) -> Optional[str]:
+    """Adds X-Next-Cursor and Link rel="next" headers when the page is full, returns the next cursor"""
+    if not items or len(items) < limit:
+        return None
+
+    last_item = items[-1]
+    next_cursor = encode_cursor(last_item["id"] if isinstance(last_item, dict) else last_item.id)
+    next_url = request.url.remove_query_params("offset").include_query_params(after=next_cursor, limit=limit)
+    response.headers["X-Next-Cursor"] = next_cursor
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
+    return next_cursor
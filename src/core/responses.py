@@ -0,0 +1,21 @@
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _encode_default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson, for content the server built itself from database rows.
+
+    Returning it from an endpoint skips FastAPI's response_model validation and serialization, so the
+    content must already have the documented shape. Datetimes, enums and dicts are encoded natively,
+    UTC datetimes end with Z like Pydantic's output."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_encode_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,99 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+from pathlib import Path
+from typing import Dict, NamedTuple
+from jinja2 import pass_context
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from src.core.compression import COMPRESSION_MINIMUM_SIZE, SUPPORTED_ENCODINGS, brotli, negotiate_encoding
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
+# a fingerprinted URL always serves the same bytes, so clients keep it for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# unfingerprinted URLs may change with any deploy, clients revalidate them with the ETag StaticFiles sends
+REVALIDATE_CACHE_CONTROL = "no-cache"
+COMPRESSIBLE_MEDIA_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+FINGERPRINT_LENGTH = 12
+
+
+class StaticAsset(NamedTuple):
+    media_type: str
+    # content coding ("identity", "gzip", "br") -> bytes, compressed variants only when they are smaller
+    variants: Dict[str, bytes]
+
+
+class FingerprintedStaticFiles(StaticFiles):
+    """StaticFiles that also serves every file under a content-hashed name (styles.<hash>.css) with an
+    immutable Cache-Control, from memory and precompressed. The plain names keep working for anything
+    that links them directly. build() hashes and compresses the directory, it runs at startup."""
+
+    def __init__(self, directory: Path) -> None:
+        super().__init__(directory=directory)
+        self.static_dir = Path(directory)
+        self.fingerprints: Dict[str, str] = {}
+        self.assets: Dict[str, StaticAsset] = {}
+
+    def build(self) -> None:
+        fingerprints: Dict[str, str] = {}
+        assets: Dict[str, StaticAsset] = {}
+        for file_path in sorted(self.static_dir.rglob("*")):
+            if not file_path.is_file():
+                continue
+            content = file_path.read_bytes()
+            digest = hashlib.sha256(content).hexdigest()[:FINGERPRINT_LENGTH]
+            relative_path = file_path.relative_to(self.static_dir)
+            path = relative_path.as_posix()
+            fingerprinted_path = relative_path.with_name(f"{file_path.stem}.{digest}{file_path.suffix}").as_posix()
+            media_type = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
+            fingerprints[path] = fingerprinted_path
+            assets[fingerprinted_path] = StaticAsset(media_type, self._compress(content, media_type))
+        self.fingerprints, self.assets = fingerprints, assets
+        logger.info("Fingerprinted %s static assets.", len(assets))
+
+    @staticmethod
+    def _compress(content: bytes, media_type: str) -> Dict[str, bytes]:
+        variants = {"identity": content}
+        if len(content) < COMPRESSION_MINIMUM_SIZE or not media_type.startswith(COMPRESSIBLE_MEDIA_TYPES):
+            return variants
+        # built once, so spend the CPU on the best ratio
+        candidates = {"gzip": gzip.compress(content, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            candidates["br"] = brotli.compress(content, quality=11)
+        variants.update({coding: body for coding, body in candidates.items() if len(body) < len(content)})
+        return variants
+
+    def fingerprint(self, path: str) -> str:
+        """Content-hashed name of a static file, the plain name when it isn't known (yet)"""
+        path = path.lstrip("/")
+        return self.fingerprints.get(path, path)
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        asset = self.assets.get(Path(path).as_posix())
+        if asset is None:
+            response = await super().get_response(path, scope)
+            if response.status_code < 400:
+                response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+            return response
+
+        available = [coding for coding in SUPPORTED_ENCODINGS if coding in asset.variants]
+        coding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), available) or "identity"
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if coding != "identity":
+            headers["Content-Encoding"] = coding
+        return Response(asset.variants[coding], media_type=asset.media_type, headers=headers)
+
+
+static_files = FingerprintedStaticFiles(STATIC_DIR)
+
+
+@pass_context
+def static_url(context, path: str) -> str:
+    """Jinja helper: URL of the fingerprinted static file, use it instead of url_for('static', ...)"""
+    return str(context["request"].url_for("static", path=static_files.fingerprint(path)))
@@ -0,0 +1,146 @@
+from datetime import datetime, timedelta
+from typing import List, Sequence
+from sqlalchemy import select, delete, insert, func, literal, and_, bindparam, cast, DateTime, Integer, Row
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from src.database.models import Burger, Ingredient, BurgerIngredientItem
+from src.database.models.analytics import (AnalyticsDirtyMark, OrderStatusHourlyRollup, BurgerSalesHourlyRollup,
+                                           IngredientConsumptionHourlyRollup)
+from src.database.models.order import Order, OrderStatus
+from src.database.models.order_burger_item import OrderBurgerItem
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SIZE = timedelta(hours=1)
+# first key of the transaction-level advisory locks of the hours being recomputed, the second is the hour number
+BUCKET_LOCK_CLASS = 16_001
+
+_dirty_hours = (select(AnalyticsDirtyMark.bucket_start)
+                .group_by(AnalyticsDirtyMark.bucket_start)
+                .order_by(AnalyticsDirtyMark.bucket_start)
+                .limit(bindparam("limit"))
+                .cte("dirty_hours"))
+_hour_number = cast(func.extract("epoch", _dirty_hours.c.bucket_start) / BUCKET_SIZE.total_seconds(), Integer)
+# deletes the marks of up to `limit` dirty hours that no other worker is recomputing, returns their hours
+CLAIM_DIRTY_MARKS = (delete(AnalyticsDirtyMark)
+                     .where(AnalyticsDirtyMark.bucket_start.in_(
+                         select(_dirty_hours.c.bucket_start)
+                         .where(func.pg_try_advisory_xact_lock(BUCKET_LOCK_CLASS, _hour_number))))
+                     .returning(AnalyticsDirtyMark.bucket_start)
+                     .execution_options(synchronize_session=False))
+
+async def claim_dirty_buckets(db: AsyncSession, limit: int) -> List[datetime]:
+    """Takes up to limit dirty hours off the queue by deleting the marks this statement sees. A mark of a write
+    that commits later isn't deleted, so the hour is recomputed again. Hours another worker is recomputing are
+    skipped (advisory lock), and the claim is undone by a rollback, so a failed recompute leaves the hours dirty.
+    Writers are never blocked. Doesn't commit."""
+    result = await db.execute(CLAIM_DIRTY_MARKS, {"limit": limit})
+    return sorted(set(result.scalars()))
+
+async def recompute_buckets(db: AsyncSession, buckets: List[datetime]) -> None:
+    """Replaces the rollup rows of the given hours with aggregates of their orders.
+    Only orders created within those hours are read (orders.created_at is indexed). Doesn't commit."""
+    bucket_array = literal(buckets, ARRAY(DateTime(timezone=True)))
+    bucket = func.unnest(bucket_array).table_valued("bucket_start").render_derived(name="bucket")
+    in_bucket = and_(Order.created_at >= bucket.c.bucket_start,
+                     Order.created_at < bucket.c.bucket_start + BUCKET_SIZE)
+
+    for rollup in (OrderStatusHourlyRollup, BurgerSalesHourlyRollup, IngredientConsumptionHourlyRollup):
+        await db.execute(delete(rollup)
+                         .where(rollup.bucket_start.in_(select(bucket.c.bucket_start)))
+                         .execution_options(synchronize_session=False))
+
+    await db.execute(insert(OrderStatusHourlyRollup).from_select(
+        ["bucket_start", "status", "order_count", "revenue"],
+        select(bucket.c.bucket_start, Order.status, func.count(Order.id), func.sum(Order.total_price))
+        .select_from(bucket)
+        .join(Order, in_bucket)
+        .group_by(bucket.c.bucket_start, Order.status)))
+
+    await db.execute(insert(BurgerSalesHourlyRollup).from_select(
+        ["bucket_start", "burger_id", "quantity", "revenue"],
+        select(bucket.c.bucket_start,
+               OrderBurgerItem.burger_id,
+               func.sum(OrderBurgerItem.quantity),
+               func.sum(OrderBurgerItem.unit_price * OrderBurgerItem.quantity))
+        .select_from(bucket)
+        .join(Order, in_bucket)
+        .join(OrderBurgerItem, OrderBurgerItem.order_id == Order.id)
+        .where(Order.status != OrderStatus.Cancelled)
+        .group_by(bucket.c.bucket_start, OrderBurgerItem.burger_id)))
+
+    await db.execute(insert(IngredientConsumptionHourlyRollup).from_select(
+        ["bucket_start", "ingredient_id", "quantity"],
+        select(bucket.c.bucket_start,
+               BurgerIngredientItem.ingredient_id,
+               func.sum(BurgerIngredientItem.quantity * OrderBurgerItem.quantity))
+        .select_from(bucket)
+        .join(Order, in_bucket)
+        .join(OrderBurgerItem, OrderBurgerItem.order_id == Order.id)
+        .join(BurgerIngredientItem, BurgerIngredientItem.burger_id == OrderBurgerItem.burger_id)
+        .where(Order.status != OrderStatus.Cancelled)
+        .group_by(bucket.c.bucket_start, BurgerIngredientItem.ingredient_id)))
+    logger.debug("Recomputed analytics rollups of %s hours.", len(buckets))
+
+async def mark_all_buckets_dirty(db: AsyncSession) -> None:
+    """Queues every hour that has orders for recomputation, used to rebuild the rollups. Doesn't commit."""
+    hours = select(func.date_trunc("hour", Order.created_at)).distinct()
+    await db.execute(insert(AnalyticsDirtyMark).from_select(["bucket_start"], hours))
+
+async def count_dirty_buckets(db: AsyncSession) -> int:
+    query = select(func.count(AnalyticsDirtyMark.bucket_start.distinct()))
+    return (await db.execute(query)).scalar_one()
+
+async def get_revenue(db: AsyncSession, start: datetime, end: datetime, granularity: str) -> Sequence[Row]:
+    period = func.date_trunc(granularity, OrderStatusHourlyRollup.bucket_start).label("period_start")
+    query = (select(period,
+                    func.sum(OrderStatusHourlyRollup.order_count).label("order_count"),
+                    func.sum(OrderStatusHourlyRollup.revenue).label("revenue"))
+             .where(OrderStatusHourlyRollup.bucket_start >= start,
+                    OrderStatusHourlyRollup.bucket_start < end,
+                    OrderStatusHourlyRollup.status != OrderStatus.Cancelled)
+             .group_by(period)
+             .order_by(period))
+    return (await db.execute(query)).all()
+
+async def get_order_totals(db: AsyncSession, start: datetime, end: datetime) -> Row:
+    query = (select(func.coalesce(func.sum(OrderStatusHourlyRollup.order_count), 0).label("order_count"),
+                    func.coalesce(func.sum(OrderStatusHourlyRollup.revenue), 0.0).label("revenue"))
+             .where(OrderStatusHourlyRollup.bucket_start >= start,
+                    OrderStatusHourlyRollup.bucket_start < end,
+                    OrderStatusHourlyRollup.status != OrderStatus.Cancelled))
+    return (await db.execute(query)).one()
+
+async def get_status_funnel(db: AsyncSession, start: datetime, end: datetime) -> Sequence[Row]:
+    query = (select(OrderStatusHourlyRollup.status,
+                    func.sum(OrderStatusHourlyRollup.order_count).label("order_count"))
+             .where(OrderStatusHourlyRollup.bucket_start >= start,
+                    OrderStatusHourlyRollup.bucket_start < end)
+             .group_by(OrderStatusHourlyRollup.status))
+    return (await db.execute(query)).all()
+
+async def get_top_burgers(db: AsyncSession, start: datetime, end: datetime, limit: int) -> Sequence[Row]:
+    quantity = func.sum(BurgerSalesHourlyRollup.quantity).label("quantity")
+    query = (select(BurgerSalesHourlyRollup.burger_id,
+                    Burger.name,
+                    quantity,
+                    func.sum(BurgerSalesHourlyRollup.revenue).label("revenue"))
+             .outerjoin(Burger, Burger.id == BurgerSalesHourlyRollup.burger_id)
+             .where(BurgerSalesHourlyRollup.bucket_start >= start,
+                    BurgerSalesHourlyRollup.bucket_start < end)
+             .group_by(BurgerSalesHourlyRollup.burger_id, Burger.name)
+             .order_by(quantity.desc(), BurgerSalesHourlyRollup.burger_id)
+             .limit(limit))
+    return (await db.execute(query)).all()
+
+async def get_ingredient_consumption(db: AsyncSession, start: datetime, end: datetime) -> Sequence[Row]:
+    quantity = func.sum(IngredientConsumptionHourlyRollup.quantity).label("quantity")
+    query = (select(IngredientConsumptionHourlyRollup.ingredient_id, Ingredient.name, quantity)
+             .outerjoin(Ingredient, Ingredient.id == IngredientConsumptionHourlyRollup.ingredient_id)
+             .where(IngredientConsumptionHourlyRollup.bucket_start >= start,
+                    IngredientConsumptionHourlyRollup.bucket_start < end)
+             .group_by(IngredientConsumptionHourlyRollup.ingredient_id, Ingredient.name)
+             .order_by(quantity.desc(), IngredientConsumptionHourlyRollup.ingredient_id))
+    return (await db.execute(query)).all()
@@ -1,14 +1,50 @@
-from typing import List, Dict, Optional
-from sqlalchemy import select, delete
+from typing import List, Dict, Optional, Iterable, Sequence, Set
+from sqlalchemy import select, update, func, literal_column, literal, any_, bindparam, JSON, Integer, Row
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 import logging
 
+from src.database.crud.line_items import sync_line_items
+from src.database.crud.statements import collection_stamp, paged
 from src.database.models import Ingredient
+from src.database.notify import notify_cache_invalidation
 from src.database.models.burger import Burger
 from src.database.models.burger_ingredient_items import BurgerIngredientItem
-from src.database.schemes.burger import BurgerCreate, BurgerUpdate
+from src.database.schemes.burger import BurgerCreate, BurgerUpdate, BurgerResponse
+
+logger = logging.getLogger(__name__)
+
+def _menu_burgers_query():
+    """Projection of burger columns with ingredient names/quantities aggregated into a JSON object"""
+    ingredients = func.coalesce(
+        func.json_object_agg(Ingredient.name, BurgerIngredientItem.quantity).filter(Ingredient.id.is_not(None)),
+        literal_column("'{}'::json"),
+        type_=JSON)
+    return (select(Burger.id,
+                   Burger.name,
+                   Burger.description,
+                   Burger.price,
+                   Burger.is_available,
+                   ingredients.label("ingredients"))
+            .outerjoin(BurgerIngredientItem, BurgerIngredientItem.burger_id == Burger.id)
+            .outerjoin(Ingredient, Ingredient.id == BurgerIngredientItem.ingredient_id)
+            .group_by(Burger.id))
+
+_BURGER_LOADER_OPTIONS = (selectinload(Burger.ingredient_items).selectinload(BurgerIngredientItem.ingredient),)
+BURGER_BY_ID = select(Burger).where(Burger.id == bindparam("burger_id")).options(*_BURGER_LOADER_OPTIONS)
+BURGERS_PAGE = paged(select(Burger).options(*_BURGER_LOADER_OPTIONS), Burger.id)
+BURGERS_BY_IDS = (select(Burger.id, Burger.name, Burger.price)
+                  .where(Burger.id == any_(bindparam("burger_ids", type_=ARRAY(Integer)))))
+MENU_BURGER_BY_ID = _menu_burgers_query().where(Burger.id == bindparam("burger_id"))
+MENU_BURGERS_PAGE = paged(_menu_burgers_query(), Burger.id)
+BURGERS_STAMP = collection_stamp(Burger.id, Burger.updated_at)
+
+async def _get_existing_ingredient_ids(db: AsyncSession, ingredient_ids: Iterable[int]) -> Set[int]:
+    """Which of the ingredient IDs exist, checked with one query on ingredients.id only"""
+    query = select(Ingredient.id).where(Ingredient.id == any_(literal(list(ingredient_ids), ARRAY(Integer))))
+    return set((await db.execute(query)).scalars())
 
 async def create_burger(db: AsyncSession, burger_in: BurgerCreate) -> Burger:
     db_burger = Burger(name=burger_in.name,
@@ -26,9 +62,9 @@ async def create_burger(db: AsyncSession, burger_in: BurgerCreate) -> Burger:
     for ingredient_id in burger_in.ingredient_ids:
         ingredient_quantities[ingredient_id] = ingredient_quantities.get(ingredient_id, 0) + 1
 
+    existing_ingredient_ids = await _get_existing_ingredient_ids(db, ingredient_quantities)
     for ingredient_id, quantity in ingredient_quantities.items():
-        db_ingredient = await db.get(Ingredient, ingredient_id)
-        if not db_ingredient:
+        if ingredient_id not in existing_ingredient_ids:
             raise ValueError(f"Ingredient with ID {ingredient_id} wasn't found in DB.")
 
         burger_ingredient_item = BurgerIngredientItem(burger_id=db_burger.id,
@@ -39,35 +75,34 @@ async def create_burger(db: AsyncSession, burger_in: BurgerCreate) -> Burger:
     db.add_all(ingredient_items_to_add)
 
     try:
+        await refresh_burger_availability(db, burger_ids=[db_burger.id])
+        await notify_cache_invalidation(db, "burgers")
         await db.commit()
 
-        query = (select(Burger)
-                .where(Burger.id == db_burger.id)
-                .options(selectinload(Burger.ingredient_items).selectinload(BurgerIngredientItem.ingredient)))
-        result = await db.execute(query)
+        result = await db.execute(BURGER_BY_ID, {"burger_id": db_burger.id})
         refreshed_burger = result.scalar_one()
 
         if refreshed_burger:
-            logging.info(f"Burger {db_burger.id} created successfully.")
+            logger.info("Burger %s created successfully.", db_burger.id)
             return db_burger
 
-        logging.error(f"Failed to refresh burger {db_burger.id} after creation.")
+        logger.error("Failed to refresh burger %s after creation.", db_burger.id)
         raise
 
     except ValueError as e:
         await db.rollback()
-        logging.warning(str(e))
+        logger.warning("%s", e)
         raise
     except Exception as e:
         await db.rollback()
-        logging.error(f"Failed to create burger {burger_in.name}: {str(e)}.")
+        logger.error("Failed to create burger %s: %s.", burger_in.name, e)
         raise
 
 async def update_burger(db: AsyncSession, burger_id: int, burger_in: BurgerUpdate) -> Optional[Burger]:
     db_burger_to_update = await get_burger_by_id(db, burger_id)
 
     if not db_burger_to_update:
-        logging.warning(f"Burger with id {burger_id} does not exist.")
+        logger.warning("Burger with id %s does not exist.", burger_id)
         return None
 
     update_data = burger_in.model_dump(exclude_unset=True)
@@ -82,88 +117,139 @@ async def update_burger(db: AsyncSession, burger_id: int, burger_in: BurgerUpdat
         db.add(db_burger_to_update)
 
     if "ingredient_ids" in update_data and update_data["ingredient_ids"] not in ([], None):
-        query = delete(BurgerIngredientItem).where(BurgerIngredientItem.burger_id == burger_id)
-        await db.execute(query)
-
-        if update_data["ingredient_ids"]:
-            ingredient_items_to_add: List[BurgerIngredientItem] = []
-            ingredient_quantities: Dict[int, int] = {}
-            for ingredient_id in update_data["ingredient_ids"]:
-                ingredient_quantities[ingredient_id] = ingredient_quantities.get(ingredient_id, 0) + 1
-
-            for ingredient_id, quantity in ingredient_quantities.items():
-                db_ingredient = await db.get(Ingredient, ingredient_id)
-                if not db_ingredient:
-                    raise ValueError(f"Ingredient with ID {ingredient_id} wasn't found in DB.")
-
-                burger_ingredient_item = BurgerIngredientItem(burger_id=db_burger_to_update.id,
-                                                              ingredient_id=ingredient_id,
-                                                              quantity=quantity)
-                ingredient_items_to_add.append(burger_ingredient_item)
-
-            if ingredient_items_to_add:
-                db.add_all(ingredient_items_to_add)
+        ingredient_quantities: Dict[int, int] = {}
+        for ingredient_id in update_data["ingredient_ids"]:
+            ingredient_quantities[ingredient_id] = ingredient_quantities.get(ingredient_id, 0) + 1
+
+        existing_ingredient_ids = await _get_existing_ingredient_ids(db, ingredient_quantities)
+        for ingredient_id in ingredient_quantities:
+            if ingredient_id not in existing_ingredient_ids:
+                raise ValueError(f"Ingredient with ID {ingredient_id} wasn't found in DB.")
+
+        await sync_line_items(db, BurgerIngredientItem, BurgerIngredientItem.burger_id,
+                              BurgerIngredientItem.ingredient_id, burger_id,
+                              existing={item.ingredient_id: item.quantity
+                                        for item in db_burger_to_update.ingredient_items},
+                              wanted=ingredient_quantities)
+        # the lines live in their own table, stamp the burger so its menu entry reads as changed
+        db_burger_to_update.updated_at = func.clock_timestamp()
+        db.add(db_burger_to_update)
 
     try:
+        await refresh_burger_availability(db, burger_ids=[burger_id])
+        await notify_cache_invalidation(db, "burgers")
         await db.commit()
+        # the lines were changed with Core statements, drop the stale collections before re-reading
+        db.expire_all()
         refreshed_burger = await get_burger_by_id(db, burger_id)
 
         if refreshed_burger:
-            logging.info(f"Burger {db_burger_to_update.id} updated successfully.")
+            logger.info("Burger %s updated successfully.", db_burger_to_update.id)
             return db_burger_to_update
 
-        logging.error(f"Failed to re-fetch burger {db_burger_to_update.id} after update.")
+        logger.error("Failed to re-fetch burger %s after update.", db_burger_to_update.id)
         return db_burger_to_update
 
     except ValueError as e:
         await db.rollback()
-        logging.warning(str(e))
+        logger.warning("%s", e)
         raise
     except Exception as e:
         await db.rollback()
-        logging.error(f"Failed to update burger {burger_id}: {str(e)}.")
+        logger.error("Failed to update burger %s: %s.", burger_id, e)
         raise
 
 async def get_burger_by_id(db: AsyncSession, burger_id: int) -> Optional[Burger]:
-    query = (select(Burger)
-             .where(Burger.id == burger_id)
-             .options(selectinload(Burger.ingredient_items).selectinload(BurgerIngredientItem.ingredient)))
-    result = await db.execute(query)
+    result = await db.execute(BURGER_BY_ID, {"burger_id": burger_id})
     burger = result.scalar_one_or_none()
 
     if not burger:
-        logging.debug(f"Burger {burger_id} not found in DB.")
+        logger.debug("Burger %s not found in DB.", burger_id)
         return None
 
-    logging.info(f"Burger {burger_id} ('{burger.name}') found successfully in DB by ID.")
+    logger.debug("Burger %s ('%s') found successfully in DB by ID.", burger_id, burger.name)
     return burger
 
-async def get_all_burgers(db: AsyncSession, offset: int = 0, limit: int = 100) -> List[Burger]:
-    query = (select(Burger)
-             .offset(offset)
-             .limit(limit)
-             .order_by(Burger.id)
-             .options(selectinload(Burger.ingredient_items).selectinload(BurgerIngredientItem.ingredient)))
+async def get_burgers_by_ids(db: AsyncSession, burger_ids: Iterable[int]) -> Sequence[Row]:
+    """Returns (id, name, price) rows for the given burger IDs, missing IDs are simply absent"""
+    result = await db.execute(BURGERS_BY_IDS, {"burger_ids": list(burger_ids)})
+    burgers = result.all()
+    logger.debug("Retrieved %s burgers by IDs.", len(burgers))
+    return burgers
+
+async def refresh_burger_availability(db: AsyncSession,
+                                     burger_ids: Optional[Iterable[int]] = None,
+                                     ingredient_ids: Optional[Iterable[int]] = None) -> List[int]:
+    """Recomputes Burger.is_available of the given burgers, or of the burgers using the given ingredients,
+    in one UPDATE. A burger is unavailable when a tracked ingredient has less stock than its recipe needs.
+    Only rows whose availability flips are written, their IDs are returned. Doesn't commit."""
+    out_of_stock = (select(BurgerIngredientItem.burger_id)
+                    .join(Ingredient, Ingredient.id == BurgerIngredientItem.ingredient_id)
+                    .where(BurgerIngredientItem.burger_id == Burger.id,
+                           Ingredient.stock_quantity.is_not(None),
+                           Ingredient.stock_quantity < BurgerIngredientItem.quantity)
+                    .exists())
+    query = (update(Burger)
+             .where(Burger.is_available == out_of_stock)
+             .values(is_available=~out_of_stock)
+             .returning(Burger.id)
+             .execution_options(synchronize_session=False))
+    if burger_ids is not None:
+        query = query.where(Burger.id == any_(literal(list(burger_ids), ARRAY(Integer))))
+    if ingredient_ids is not None:
+        query = query.where(Burger.id.in_(
+            select(BurgerIngredientItem.burger_id)
+            .where(BurgerIngredientItem.ingredient_id == any_(literal(list(ingredient_ids), ARRAY(Integer))))))
     result = await db.execute(query)
+    changed_ids = list(result.scalars())
+    if changed_ids:
+        logger.info("Availability of burgers %s changed.", changed_ids)
+    return changed_ids
+
+async def get_all_burgers(db: AsyncSession, offset: int = 0, limit: int = 100,
+                          after_id: Optional[int] = None) -> List[Burger]:
+    result = await db.execute(*BURGERS_PAGE.bind(offset, limit, after_id))
     burgers = result.scalars().all()
-    logging.debug(f"Retrieved {len(burgers)} burgers, offset={offset}, limit={limit}.")
+    logger.debug("Retrieved %s burgers, offset=%s, limit=%s, after_id=%s.", len(burgers), offset, limit, after_id)
+    return burgers
+
+async def get_burgers_stamp(db: AsyncSession) -> str:
+    """Version stamp of the whole burgers table, see collection_stamp"""
+    return (await db.execute(BURGERS_STAMP)).scalar_one()
+
+async def get_menu_burger_by_id(db: AsyncSession, burger_id: int) -> Optional[BurgerResponse]:
+    result = await db.execute(MENU_BURGER_BY_ID, {"burger_id": burger_id})
+    row = result.one_or_none()
+
+    if not row:
+        logger.debug("Burger %s not found in DB.", burger_id)
+        return None
+
+    logger.debug("Menu burger %s ('%s') found successfully in DB by ID.", burger_id, row.name)
+    return BurgerResponse.model_validate(row)
+
+async def get_menu_burgers(db: AsyncSession, offset: int = 0, limit: int = 100,
+                           after_id: Optional[int] = None) -> List[BurgerResponse]:
+    result = await db.execute(*MENU_BURGERS_PAGE.bind(offset, limit, after_id))
+    burgers = [BurgerResponse.model_validate(row) for row in result.all()]
+    logger.debug("Retrieved %s menu burgers, offset=%s, limit=%s, after_id=%s.", len(burgers), offset, limit, after_id)
     return burgers
 
 async def delete_burger(db: AsyncSession, burger_id: int) -> Optional[Burger]:
     existing_burger = await get_burger_by_id(db, burger_id)
     if not existing_burger:
-        logging.warning(f"Burger with id {burger_id} not found for deletion.")
+        logger.warning("Burger with id %s not found for deletion.", burger_id)
         return None
     try:
         await db.delete(existing_burger)
+        await notify_cache_invalidation(db, "burgers")
         await db.commit()
-        logging.info(f"Burger {burger_id} deleted successfully.")
+        logger.info("Burger %s deleted successfully.", burger_id)
         return existing_burger
     except IntegrityError as e:
-        logging.warning(
-            f"IntegrityError deleting burger {burger_id} via BurgerService: {e}. This burger is likely in use.")
+        logger.warning("IntegrityError deleting burger %s via BurgerService: %s. This burger is likely in use.", burger_id, e)
         raise ValueError(f"Cannot delete burger: It is currently part of one or more existing orders.")
     except Exception as e:
         await db.rollback()
-        logging.error(f"Failed to delete burger {burger_id}: {str(e)}.")
+        logger.error("Failed to delete burger %s: %s.", burger_id, e)
         raise
\ No newline at end of file
@@ -1,96 +1,153 @@
-from typing import Optional, List
-from sqlalchemy import select
+from typing import Optional, List, Iterable, Awaitable, Callable
+from sqlalchemy import select, update, any_, bindparam, or_, func, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from src.database.crud.statements import paged
 from src.database.models.customer import Customer
+from src.database.notify import notify_cache_invalidation
 from src.database.schemes.customer import CustomerCreate, CustomerUpdate
 
-async def create_customer(db: AsyncSession, customer_in: CustomerCreate) -> Customer:
-    existing_customer = await get_customer_by_phone(db, customer_in.phone)
-    if existing_customer:
-        raise ValueError("Customer with this phone already exists.")
+logger = logging.getLogger(__name__)
+
+CUSTOMER_BY_ID = select(Customer).where(Customer.id == bindparam("customer_id"))
+# the locked customer row can't get new orders (their foreign key check waits for it) until the transaction ends
+CUSTOMER_BY_ID_FOR_UPDATE = CUSTOMER_BY_ID.with_for_update().execution_options(populate_existing=True)
+CUSTOMER_BY_PHONE = select(Customer).where(Customer.phone == bindparam("phone"))
+CUSTOMERS_BY_IDS = select(Customer).where(Customer.id == any_(bindparam("customer_ids", type_=ARRAY(Integer))))
+CUSTOMERS_PAGE = paged(select(Customer), Customer.id)
+
+UNIQUE_VIOLATION = "23505"
 
-    db_customer = Customer(**customer_in.model_dump())
+async def create_customer(db: AsyncSession, customer_in: CustomerCreate) -> Customer:
+    """Inserts the customer with one INSERT ... ON CONFLICT (phone) DO NOTHING RETURNING.
+    The unique constraint decides, so concurrent creates with the same phone can't both succeed."""
+    query = (pg_insert(Customer)
+             .values(**customer_in.model_dump())
+             .on_conflict_do_nothing(index_elements=[Customer.phone])
+             .returning(Customer))
     try:
-        db.add(db_customer)
+        db_customer = (await db.execute(query)).scalar_one_or_none()
+        if db_customer is None:
+            await db.rollback()
+            raise ValueError("Customer with this phone already exists.")
+        await notify_cache_invalidation(db, "customers")
         await db.commit()
-        await db.refresh(db_customer)
-        logging.info(f"Customer {db_customer.id} created successfully.")
+        logger.info("Customer %s created successfully.", db_customer.id)
         return db_customer
+    except ValueError:
+        raise
     except Exception as e:
         await db.rollback()
-        logging.error(f"Failed to create customer {customer_in.name}: {str(e)}.")
+        logger.error("Failed to create customer %s: %s.", customer_in.name, e)
         raise
 
 async def update_customer(db: AsyncSession, customer_id: int, customer_in: CustomerUpdate) -> Optional[Customer]:
-    db_customer_to_update = await get_customer_by_id(db, customer_id)
-    if not db_customer_to_update:
-        logging.warning(f"Customer with id {customer_id} does not exist.")
-
+    """Updates the customer with one UPDATE ... RETURNING, a phone taken by another customer
+    is reported by the unique constraint and raised as ValueError"""
     update_data = customer_in.model_dump(exclude_unset=True)
-
-    if "phone" in update_data and update_data["phone"] != db_customer_to_update.phone:
-        existing_customer_with_new_phone = await get_customer_by_phone(db, update_data["phone"])
-        if existing_customer_with_new_phone and existing_customer_with_new_phone.id != customer_id:
-            logging.warning(f"Attempt to update customer {customer_id} with phone number {update_data['phone']} that already exists for customer {existing_customer_with_new_phone.id}")
-            raise ValueError(f"Phone number {update_data['phone']} is already in use by another customer.", params={}, orig=None)
-
-    for key, value in update_data.items():
-        setattr(db_customer_to_update, key, value)
-
+    if not update_data:
+        return await get_customer_by_id(db, customer_id)
+
+    query = (update(Customer)
+             .where(Customer.id == customer_id)
+             .values(**update_data)
+             .returning(Customer)
+             .execution_options(synchronize_session=False))
     try:
+        db_customer = (await db.execute(query)).scalar_one_or_none()
+        if db_customer is None:
+            await db.rollback()
+            logger.warning("Customer with id %s does not exist.", customer_id)
+            return None
+        await notify_cache_invalidation(db, "customers")
         await db.commit()
-        await db.refresh(db_customer_to_update)
-        logging.info(f"Customer {db_customer_to_update.id} updated successfully.")
-        return db_customer_to_update
+        logger.info("Customer %s updated successfully.", db_customer.id)
+        return db_customer
+    except IntegrityError as e:
+        await db.rollback()
+        if getattr(e.orig, "sqlstate", None) != UNIQUE_VIOLATION:
+            logger.error("Failed to update customer %s: %s.", customer_id, e)
+            raise
+        logger.warning("Attempt to update customer %s with phone number %s that already exists.", customer_id, update_data.get("phone"))
+        raise ValueError(f"Phone number {update_data.get('phone')} is already in use by another customer.")
     except Exception as e:
         await db.rollback()
-        logging.error(f"Failed to update customer {customer_id}: {str(e)}.")
+        logger.error("Failed to update customer %s: %s.", customer_id, e)
         raise
 
 async def get_customer_by_id(db: AsyncSession, customer_id: int) -> Optional[Customer]:
-    query = select(Customer).where(Customer.id == customer_id)
-    result = await db.execute(query)
+    result = await db.execute(CUSTOMER_BY_ID, {"customer_id": customer_id})
     customer = result.scalar_one_or_none()
 
     if not customer:
-        logging.debug(f"Customer with id {customer_id} not found in DB.")
+        logger.debug("Customer with id %s not found in DB.", customer_id)
         return None
 
-    logging.debug(f"Customer {customer.id} ('{customer.name}') found successfully in DB by ID.")
+    logger.debug("Customer %s ('%s') found successfully in DB by ID.", customer.id, customer.name)
     return customer
 
 async def get_customer_by_phone(db: AsyncSession, phone: str) -> Optional[Customer]:
-    query = select(Customer).where(Customer.phone == phone)
-    result = await db.execute(query)
+    result = await db.execute(CUSTOMER_BY_PHONE, {"phone": phone})
     customer = result.scalar_one_or_none()
 
     if not customer:
-        logging.debug(f"Customer with phone {phone} not found in DB.")
+        logger.debug("Customer with phone %s not found in DB.", phone)
         return None
 
-    logging.debug(f"Customer {customer.id} ('{customer.name}') found successfully in DB by phone.")
+    logger.debug("Customer %s ('%s') found successfully in DB by phone.", customer.id, customer.name)
     return customer
 
-async def get_all_customers(db: AsyncSession, offset: int = 0, limit: int = 100) -> List[Customer]:
-    query = select(Customer).offset(offset).limit(limit).order_by(Customer.id)
+async def search_customers(db: AsyncSession, query_text: str, limit: int = 10) -> List[Customer]:
+    """Customers whose phone or name (case-insensitive) starts with query_text.
+    Both prefixes are served by the pattern_ops indexes of the customers table."""
+    query = (select(Customer)
+             .where(or_(Customer.phone.startswith(query_text, autoescape=True),
+                        func.lower(Customer.name).startswith(query_text.lower(), autoescape=True)))
+             .order_by(Customer.name, Customer.id)
+             .limit(limit))
     result = await db.execute(query)
     customers = result.scalars().all()
-    logging.debug(f"Retrieved {len(customers)} customers, offset={offset}, limit={limit}.")
+    logger.debug("Found %s customers matching '%s'.", len(customers), query_text)
+    return customers
+
+async def get_customers_by_ids(db: AsyncSession, customer_ids: Iterable[int]) -> List[Customer]:
+    result = await db.execute(CUSTOMERS_BY_IDS, {"customer_ids": list(customer_ids)})
+    customers = result.scalars().all()
+    logger.debug("Retrieved %s customers by IDs.", len(customers))
+    return customers
+
+async def get_all_customers(db: AsyncSession, offset: int = 0, limit: int = 100,
+                            after_id: Optional[int] = None) -> List[Customer]:
+    result = await db.execute(*CUSTOMERS_PAGE.bind(offset, limit, after_id))
+    customers = result.scalars().all()
+    logger.debug("Retrieved %s customers, offset=%s, limit=%s, after_id=%s.", len(customers), offset, limit, after_id)
     return customers
 
-async def delete_customer(db: AsyncSession, customer_id: int) -> Optional[Customer]:
-    existing_customer = await get_customer_by_id(db, customer_id)
+async def delete_customer(db: AsyncSession, customer_id: int,
+                          on_delete: Optional[Callable[[int], Awaitable[None]]] = None) -> Optional[Customer]:
+    """Deletes the customer, the orders go with it through ON DELETE CASCADE. on_delete is awaited with the
+    customer ID inside the delete transaction, after the customer is locked against new orders and before its
+    orders are deleted (the stock release hooks in there)."""
+    if on_delete is None:
+        existing_customer = await get_customer_by_id(db, customer_id)
+    else:
+        result = await db.execute(CUSTOMER_BY_ID_FOR_UPDATE, {"customer_id": customer_id})
+        existing_customer = result.scalar_one_or_none()
     if not existing_customer:
-        logging.warning(f"Customer with id {customer_id} not found for deletion.")
+        logger.warning("Customer with id %s not found for deletion.", customer_id)
         return None
     try:
+        if on_delete is not None:
+            await on_delete(customer_id)
         await db.delete(existing_customer)
+        await notify_cache_invalidation(db, "customers")
         await db.commit()
-        logging.info(f"Customer {customer_id} deleted successfully.")
+        logger.info("Customer %s deleted successfully.", customer_id)
         return existing_customer
     except Exception as e:
         await db.rollback()
-        logging.error(f"Failed to delete customer {customer_id}: {str(e)}.")
+        logger.error("Failed to delete customer %s: %s.", customer_id, e)
         raise
\ No newline at end of file
@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Any, Optional
+from sqlalchemy import Row, select, update, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from src.database.models.idempotency_key import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+async def claim_idempotency_key(db: AsyncSession, scope: str, key: str, request_hash: str) -> Optional[Row]:
+    """Inserts the key in the caller's transaction. Returns None when this request claimed it, otherwise
+    the stored (request_hash, response) row of the earlier request.
+    A concurrent request with the same key waits on the unique index until the claiming transaction ends,
+    so it sees either the committed response or, after a rollback, claims the key itself. Doesn't commit."""
+    query = (pg_insert(IdempotencyKey)
+             .values(scope=scope, key=key, request_hash=request_hash)
+             .on_conflict_do_nothing(index_elements=[IdempotencyKey.scope, IdempotencyKey.key])
+             .returning(IdempotencyKey.key))
+    if (await db.execute(query)).scalar_one_or_none() is not None:
+        return None
+
+    query = (select(IdempotencyKey.request_hash, IdempotencyKey.response)
+             .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key))
+    stored = (await db.execute(query)).one_or_none()
+    if stored is None:
+        # the earlier row expired and was cleaned up between both statements
+        return await claim_idempotency_key(db, scope, key, request_hash)
+    logger.debug("Idempotency key %s of %s was already used.", key, scope)
+    return stored
+
+async def store_idempotent_response(db: AsyncSession, scope: str, key: str, response: Any) -> None:
+    """Saves the response of a claimed key, called right before the work is committed. Doesn't commit."""
+    await db.execute(update(IdempotencyKey)
+                     .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+                     .values(response=response))
+
+async def delete_expired_idempotency_keys(db: AsyncSession, created_before: datetime, batch_size: int = 1000) -> int:
+    """Deletes up to batch_size keys older than created_before, returns how many were deleted"""
+    expired = (select(IdempotencyKey.scope, IdempotencyKey.key)
+               .where(IdempotencyKey.created_at < created_before)
+               .limit(batch_size))
+    query = (delete(IdempotencyKey)
+             .where(tuple_(IdempotencyKey.scope, IdempotencyKey.key).in_(expired))
+             .execution_options(synchronize_session=False))
+    try:
+        deleted = (await db.execute(query)).rowcount
+        await db.commit()
+        logger.debug("Deleted %s expired idempotency keys.", deleted)
+        return deleted
+    except Exception as e:
+        await db.rollback()
+        logger.error("Failed to delete expired idempotency keys: %s.", e)
+        raise
@@ -1,27 +1,162 @@
-from typing import Optional, List
-from sqlalchemy import select
+from typing import Optional, List, Dict, Iterable, Sequence
+from sqlalchemy import select, update, func, literal, any_, bindparam, Integer, Row
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 import logging
 
+from src.database.crud.burger import refresh_burger_availability
+from src.database.crud.statements import collection_stamp, paged
+from src.database.models.burger_ingredient_items import BurgerIngredientItem
 from src.database.models.ingredient import Ingredient
+from src.database.models.order_burger_item import OrderBurgerItem
+from src.database.notify import notify_cache_invalidation
 
-# only reading implemented
+logger = logging.getLogger(__name__)
 
-async def get_ingredient_by_id(db: AsyncSession, ingredient_id: int) -> Optional[Ingredient]:
-    query = select(Ingredient).where(Ingredient.id == ingredient_id)
-    result = await db.execute(query)
-    ingredient = result.scalar_one_or_none()
+# ingredients are created by scripts, only reading and stock updates are implemented
+
+# the columns IngredientResponse needs, ingredient reads don't build ORM objects
+INGREDIENT_COLUMNS = (Ingredient.id, Ingredient.name, Ingredient.manufacturer, Ingredient.stock_quantity)
+INGREDIENT_BY_ID = select(*INGREDIENT_COLUMNS).where(Ingredient.id == bindparam("ingredient_id"))
+INGREDIENTS_PAGE = paged(select(*INGREDIENT_COLUMNS), Ingredient.id)
+INGREDIENTS_STAMP = collection_stamp(Ingredient.id, Ingredient.updated_at)
+
+async def get_ingredient_by_id(db: AsyncSession, ingredient_id: int) -> Optional[Row]:
+    result = await db.execute(INGREDIENT_BY_ID, {"ingredient_id": ingredient_id})
+    ingredient = result.one_or_none()
 
     if not ingredient:
-        logging.debug(f"Ingredient with id {ingredient_id} not found in DB.")
+        logger.debug("Ingredient with id %s not found in DB.", ingredient_id)
         return None
 
-    logging.debug(f"Ingredient {ingredient.id} ('{ingredient.name}') found successfully in DB by ID.")
+    logger.debug("Ingredient %s ('%s') found successfully in DB by ID.", ingredient.id, ingredient.name)
     return ingredient
 
-async def get_all_ingredients(db: AsyncSession, offset: int = 0, limit: int = 100) -> List[Ingredient]:
-    query = select(Ingredient).offset(offset).limit(limit).order_by(Ingredient.id)
-    result = await db.execute(query)
-    ingredients = result.scalars().all()
-    logging.debug(f"Retrieved {len(ingredients)} ingredients, offset={offset}, limit={limit}.")
+async def get_all_ingredients(db: AsyncSession, offset: int = 0, limit: int = 100,
+                              after_id: Optional[int] = None) -> Sequence[Row]:
+    result = await db.execute(*INGREDIENTS_PAGE.bind(offset, limit, after_id))
+    ingredients = result.all()
+    logger.debug("Retrieved %s ingredients, offset=%s, limit=%s, after_id=%s.", len(ingredients), offset, limit, after_id)
     return ingredients
+
+async def get_ingredients_stamp(db: AsyncSession) -> str:
+    """Version stamp of the whole ingredients table, see collection_stamp"""
+    return (await db.execute(INGREDIENTS_STAMP)).scalar_one()
+
+async def get_tracked_recipe_lines(db: AsyncSession, burger_ids: Iterable[int]) -> Sequence[Row]:
+    """Returns (burger_id, ingredient_id, quantity) recipe lines of the burgers whose ingredient stock is tracked"""
+    query = (select(BurgerIngredientItem.burger_id, BurgerIngredientItem.ingredient_id, BurgerIngredientItem.quantity)
+             .join(Ingredient, Ingredient.id == BurgerIngredientItem.ingredient_id)
+             .where(BurgerIngredientItem.burger_id == any_(literal(list(burger_ids), ARRAY(Integer))),
+                    Ingredient.stock_quantity.is_not(None)))
+    result = await db.execute(query)
+    return result.all()
+
+async def lock_ingredient_stock(db: AsyncSession, ingredient_ids: Iterable[int]) -> Dict[int, Row]:
+    """Locks the stock rows of the given ingredients until the transaction ends and returns
+    (id, name, stock_quantity) by ID. Rows are locked in ID order, so concurrent orders sharing
+    ingredients queue up instead of deadlocking, orders with other ingredients aren't blocked."""
+    query = (select(Ingredient.id, Ingredient.name, Ingredient.stock_quantity)
+             .where(Ingredient.id == any_(literal(sorted(ingredient_ids), ARRAY(Integer))))
+             .order_by(Ingredient.id)
+             .with_for_update())
+    result = await db.execute(query)
+    return {row.id: row for row in result}
+
+_other_recipe_lines = aliased(BurgerIngredientItem)
+# recipe lines of the burgers whose ingredient stock is tracked, with the stock rows locked in ingredient ID order
+# (same order as lock_ingredient_stock). max_quantity is the most any recipe needs of the ingredient: stock left
+# at or above it can't make a burger unavailable.
+TRACKED_RECIPE_STOCK = (select(BurgerIngredientItem.burger_id, BurgerIngredientItem.ingredient_id,
+                               BurgerIngredientItem.quantity, Ingredient.name, Ingredient.stock_quantity,
+                               select(func.max(_other_recipe_lines.quantity))
+                               .where(_other_recipe_lines.ingredient_id == Ingredient.id)
+                               .scalar_subquery().label("max_quantity"))
+                        .join(Ingredient, Ingredient.id == BurgerIngredientItem.ingredient_id)
+                        .where(BurgerIngredientItem.burger_id == any_(bindparam("burger_ids", type_=ARRAY(Integer))),
+                               Ingredient.stock_quantity.is_not(None))
+                        .order_by(Ingredient.id)
+                        .with_for_update(of=Ingredient))
+
+async def lock_tracked_recipe_stock(db: AsyncSession, burger_ids: Iterable[int]) -> Sequence[Row]:
+    """get_tracked_recipe_lines and lock_ingredient_stock in one query: returns (burger_id, ingredient_id, quantity,
+    name, stock_quantity, max_quantity) recipe lines and keeps the stock rows locked until the transaction ends"""
+    result = await db.execute(TRACKED_RECIPE_STOCK, {"burger_ids": list(burger_ids)})
+    return result.all()
+
+async def decrement_ingredient_stock(db: AsyncSession, amounts: Dict[int, int]) -> None:
+    """Subtracts ingredient_id -> amount from the stock in one UPDATE ... FROM unnest(...). Doesn't commit."""
+    if not amounts:
+        return
+    decrement = (func.unnest(literal(list(amounts.keys()), ARRAY(Integer)),
+                             literal(list(amounts.values()), ARRAY(Integer)))
+                 .table_valued("ingredient_id", "amount")
+                 .render_derived(name="decrement"))
+    await db.execute(update(Ingredient)
+                     .where(Ingredient.id == decrement.c.ingredient_id)
+                     .values(stock_quantity=Ingredient.stock_quantity - decrement.c.amount)
+                     .execution_options(synchronize_session=False))
+
+async def adjust_ingredient_stock(db: AsyncSession, amounts: Dict[int, int]) -> List[str]:
+    """decrement_ingredient_stock (negative amounts put stock back), then refreshes the availability of the burgers
+    using the ingredients and queues the NOTIFYs. The stock rows have to be locked already. Doesn't commit.
+    Returns the cache namespaces to invalidate after the commit."""
+    if not amounts:
+        return []
+    await decrement_ingredient_stock(db, amounts)
+    changed_namespaces = ["ingredients"]
+    if await refresh_burger_availability(db, ingredient_ids=amounts.keys()):
+        changed_namespaces.append("burgers")
+    for namespace in changed_namespaces:
+        await notify_cache_invalidation(db, namespace)
+    return changed_namespaces
+
+# tracked ingredient amounts the lines of the orders reserved, with the stock rows locked in ingredient ID order
+RESERVED_ORDER_STOCK = (select(BurgerIngredientItem.ingredient_id,
+                               (OrderBurgerItem.quantity * BurgerIngredientItem.quantity).label("amount"))
+                        .join_from(OrderBurgerItem, BurgerIngredientItem,
+                                   BurgerIngredientItem.burger_id == OrderBurgerItem.burger_id)
+                        .join(Ingredient, Ingredient.id == BurgerIngredientItem.ingredient_id)
+                        .where(OrderBurgerItem.order_id == any_(bindparam("order_ids", type_=ARRAY(Integer))),
+                               Ingredient.stock_quantity.is_not(None))
+                        .order_by(Ingredient.id)
+                        .with_for_update(of=Ingredient))
+
+async def release_order_stock(db: AsyncSession, order_ids: Iterable[int]) -> List[str]:
+    """Puts back the tracked ingredients the lines of the orders reserved, computed from the current recipes like
+    the reservation. The caller locks the orders first and passes only the ones that still hold stock
+    (see crud.order.lock_stock_holding_orders). Doesn't commit. Returns the cache namespaces to invalidate."""
+    order_ids = list(order_ids)
+    amounts: Dict[int, int] = {}
+    for line in await db.execute(RESERVED_ORDER_STOCK, {"order_ids": order_ids}):
+        amounts[line.ingredient_id] = amounts.get(line.ingredient_id, 0) - line.amount
+    changed_namespaces = await adjust_ingredient_stock(db, {ingredient_id: amount
+                                                            for ingredient_id, amount in amounts.items() if amount})
+    logger.debug("Released the stock of orders %s: %s.", order_ids, amounts)
+    return changed_namespaces
+
+async def set_ingredient_stock(db: AsyncSession, ingredient_id: int,
+                               stock_quantity: Optional[int]) -> Optional[Row]:
+    query = (update(Ingredient)
+             .where(Ingredient.id == ingredient_id)
+             .values(stock_quantity=stock_quantity)
+             .returning(*INGREDIENT_COLUMNS)
+             .execution_options(synchronize_session=False))
+    try:
+        ingredient = (await db.execute(query)).one_or_none()
+        if ingredient is None:
+            logger.warning("Ingredient with id %s does not exist.", ingredient_id)
+            await db.rollback()
+            return None
+
+        await notify_cache_invalidation(db, "ingredients")
+        if await refresh_burger_availability(db, ingredient_ids=[ingredient_id]):
+            await notify_cache_invalidation(db, "burgers")
+        await db.commit()
+        logger.info("Stock of ingredient %s set to %s.", ingredient_id, stock_quantity)
+        return ingredient
+    except Exception as e:
+        await db.rollback()
+        logger.error("Failed to set stock of ingredient %s: %s.", ingredient_id, e)
+        raise
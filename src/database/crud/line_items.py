@@ -0,0 +1,48 @@
+from typing import Any, Dict, Optional, Type
+from sqlalchemy import delete, literal, any_, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+import logging
+
+from src.database.database import Base
+
+logger = logging.getLogger(__name__)
+
+async def sync_line_items(db: AsyncSession,
+                          model: Type[Base],
+                          parent_column: InstrumentedAttribute,
+                          child_column: InstrumentedAttribute,
+                          parent_id: int,
+                          existing: Dict[int, int],
+                          wanted: Dict[int, int],
+                          insert_values: Optional[Dict[int, Dict[str, Any]]] = None) -> Dict[str, int]:
+    """Brings the (parent, child) -> quantity lines of one parent from existing to wanted with only
+    the needed statements: one DELETE for removed children and one INSERT ... ON CONFLICT DO UPDATE
+    for new and changed quantities. Unchanged lines aren't touched. Doesn't commit.
+
+    insert_values holds extra columns per child id that are only written when the line is new,
+    a changed quantity keeps the rest of the existing line (e.g. its unit price).
+
+    The ORM collections of the parent aren't updated, expire them before reading the lines again."""
+    removed_ids = [child_id for child_id in existing if child_id not in wanted]
+    upserted = [{parent_column.key: parent_id, child_column.key: child_id, "quantity": quantity,
+                 **(insert_values or {}).get(child_id, {})}
+                for child_id, quantity in wanted.items() if existing.get(child_id) != quantity]
+
+    if removed_ids:
+        await db.execute(delete(model)
+                         .where(parent_column == parent_id,
+                                child_column == any_(literal(removed_ids, ARRAY(Integer))))
+                         .execution_options(synchronize_session=False))
+    if upserted:
+        query = pg_insert(model).values(upserted)
+        await db.execute(query.on_conflict_do_update(
+            index_elements=[parent_column.key, child_column.key],
+            set_={"quantity": query.excluded.quantity}))
+
+    changes = {"deleted": len(removed_ids),
+               "upserted": len(upserted),
+               "unchanged": len(wanted) - len(upserted)}
+    logger.debug("Synced %s lines of %s %s: %s.", model.__tablename__, parent_column.key, parent_id, changes)
+    return changes
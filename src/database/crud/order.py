@@ -1,13 +1,180 @@
-from typing import List, Dict, Optional
-from sqlalchemy import select, delete
+from typing import List, Dict, Optional, Sequence, Iterable, Any, AsyncIterator, Awaitable, Callable
+from sqlalchemy import (select, insert, update, delete, func, literal_column, literal, any_, bindparam, true, JSON,
+                        Row, Integer, Select)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 import logging
 
-from src.database.models import Burger
-from src.database.models.order import Order, OrderStatus
+from src.database.crud.burger import get_burgers_by_ids
+from src.database.crud.line_items import sync_line_items
+from src.database.crud.statements import paged
+from src.database.models import Burger, Customer
+from src.database.models.ingredient import Ingredient
+from src.database.models.order import Order, OrderStatus, STOCK_HOLDING_STATUSES, allowed_previous_statuses
 from src.database.models.order_burger_item import OrderBurgerItem
-from src.database.schemes.order import OrderCreate, OrderUpdate
+from src.database.notify import CACHE_INVALIDATION_CHANNEL
+from src.database.schemes.order import OrderCreate, OrderUpdate, OrderBurgerItemCreate
+
+logger = logging.getLogger(__name__)
+
+def aggregate_item_quantities(items: Iterable[OrderBurgerItemCreate]) -> Dict[int, int]:
+    """Merges repeated burger lines into burger_id -> total quantity"""
+    quantities: Dict[int, int] = {}
+    for item in items:
+        quantities[item.burger_id] = quantities.get(item.burger_id, 0) + item.quantity
+    return quantities
+
+async def insert_orders(db: AsyncSession, orders: List[Dict[str, Any]]) -> Sequence[Row]:
+    """Multi-row INSERT of orders, returns (id, created_at) rows in the order of the given parameters.
+    Doesn't commit, the caller owns the transaction."""
+    query = insert(Order).returning(Order.id, Order.created_at, sort_by_parameter_order=True)
+    result = await db.execute(query, orders)
+    return result.all()
+
+async def insert_order_items(db: AsyncSession, items: List[Dict[str, Any]]) -> None:
+    """Multi-row INSERT of order burger items. Doesn't commit, the caller owns the transaction."""
+    if items:
+        await db.execute(insert(OrderBurgerItem), items)
+
+def _insert_checked_order_query():
+    """One statement that creates an order in a single round trip. It checks the customer and the burgers,
+    inserts the order and its lines at the current burger prices, subtracts the given ingredient amounts and
+    queues the ingredients cache NOTIFY. The order is only inserted when the customer and every burger exist,
+    and the stock is only touched when the order was inserted.
+    Returns no row for an unknown customer. Otherwise it returns one row with a NULL order_id when a burger
+    is unknown, and the burgers it did find in `lines` either way."""
+    line_input = (func.unnest(bindparam("burger_ids", type_=ARRAY(Integer)),
+                              bindparam("quantities", type_=ARRAY(Integer)))
+                  .table_valued("burger_id", "quantity")
+                  .render_derived(name="line_input"))
+    lines = (select(Burger.id.label("burger_id"), Burger.name, Burger.price, line_input.c.quantity)
+             .join_from(line_input, Burger, Burger.id == line_input.c.burger_id)
+             .cte("order_lines"))
+    customer = (select(Customer.id, Customer.name, Customer.phone)
+                .where(Customer.id == bindparam("customer_id"))
+                .cte("order_customer"))
+    all_burgers_found = select(func.count()).select_from(lines).scalar_subquery() == bindparam("line_count")
+    new_order = (insert(Order)
+                 .from_select(["customer_id", "status", "total_price"],
+                              select(customer.c.id,
+                                     literal(OrderStatus.Pending, Order.__table__.c.status.type),
+                                     select(func.sum(lines.c.price * lines.c.quantity)).scalar_subquery())
+                              .where(all_burgers_found))
+                 .returning(Order.id, Order.created_at, Order.total_price)
+                 .cte("new_order"))
+    new_items = (insert(OrderBurgerItem)
+                 .from_select(["order_id", "burger_id", "quantity", "unit_price"],
+                              select(new_order.c.id, lines.c.burger_id, lines.c.quantity, lines.c.price)
+                              .join_from(new_order, lines, true()))
+                 .returning(OrderBurgerItem.burger_id)
+                 .cte("new_items"))
+    decrement = (func.unnest(bindparam("ingredient_ids", type_=ARRAY(Integer)),
+                             bindparam("amounts", type_=ARRAY(Integer)))
+                 .table_valued("ingredient_id", "amount")
+                 .render_derived(name="decrement"))
+    stock_update = (update(Ingredient)
+                    .where(Ingredient.id == decrement.c.ingredient_id, select(new_order.c.id).exists())
+                    .values(stock_quantity=Ingredient.stock_quantity - decrement.c.amount)
+                    .returning(Ingredient.id)
+                    .cte("stock_update"))
+    found_lines = select(func.coalesce(
+        func.json_agg(func.json_build_object("burger_id", lines.c.burger_id, "name", lines.c.name)),
+        literal_column("'[]'::json"),
+        type_=JSON)).scalar_subquery()
+    stock_notify = (select(func.pg_notify(CACHE_INVALIDATION_CHANNEL, "ingredients"))
+                    .where(select(stock_update.c.id).exists())
+                    .scalar_subquery())
+    return (select(customer.c.id.label("customer_id"),
+                   customer.c.name.label("customer_name"),
+                   customer.c.phone.label("customer_phone"),
+                   new_order.c.id.label("order_id"),
+                   new_order.c.created_at,
+                   new_order.c.total_price,
+                   found_lines.label("lines"),
+                   stock_notify.label("stock_notify"))
+            .outerjoin(new_order, true())
+            .add_cte(new_items, stock_update))
+
+INSERT_CHECKED_ORDER = _insert_checked_order_query()
+
+async def insert_checked_order(db: AsyncSession, customer_id: int, quantities: Dict[int, int],
+                               stock_amounts: Dict[int, int]) -> Optional[Row]:
+    """Creates an order with its lines and subtracts ingredient_id -> amount from the stock in one round trip,
+    see _insert_checked_order_query for the returned row. Doesn't commit, the caller owns the transaction."""
+    result = await db.execute(INSERT_CHECKED_ORDER, {
+        "customer_id": customer_id,
+        "burger_ids": list(quantities.keys()),
+        "quantities": list(quantities.values()),
+        "line_count": len(quantities),
+        "ingredient_ids": list(stock_amounts.keys()),
+        "amounts": list(stock_amounts.values())})
+    return result.one_or_none()
+
+async def refresh_order_total(db: AsyncSession, order_id: int) -> None:
+    """Recomputes the stored order total from its lines in one UPDATE, doesn't commit"""
+    lines_total = (select(func.coalesce(func.sum(OrderBurgerItem.unit_price * OrderBurgerItem.quantity), 0.0))
+                   .where(OrderBurgerItem.order_id == order_id)
+                   .scalar_subquery())
+    await db.execute(update(Order)
+                     .where(Order.id == order_id)
+                     .values(total_price=lines_total)
+                     .execution_options(synchronize_session=False))
+
+def _orders_summary_query():
+    """Orders joined with customer columns and burger name -> quantity map, one row per order"""
+    burgers_with_quantity = func.coalesce(
+        func.json_object_agg(Burger.name, OrderBurgerItem.quantity).filter(Burger.id.is_not(None)),
+        literal_column("'{}'::json"),
+        type_=JSON)
+    return (select(Order.id,
+                   Order.customer_id,
+                   Order.created_at,
+                   Order.status,
+                   Customer.name.label("customer_name"),
+                   Customer.phone.label("customer_phone"),
+                   burgers_with_quantity.label("burgers_with_quantity"),
+                   Order.total_price)
+            .join(Customer, Customer.id == Order.customer_id)
+            .outerjoin(OrderBurgerItem, OrderBurgerItem.order_id == Order.id)
+            .outerjoin(Burger, Burger.id == OrderBurgerItem.burger_id)
+            .group_by(Order.id, Customer.id))
+
+# orders only need the burger names, the recipes of the burgers aren't loaded along
+_ORDER_LOADER_OPTIONS = (selectinload(Order.burger_items).selectinload(OrderBurgerItem.burger)
+                         .raiseload(Burger.ingredient_items),
+                         selectinload(Order.customer))
+ORDER_BY_ID = select(Order).where(Order.id == bindparam("order_id")).options(*_ORDER_LOADER_OPTIONS)
+# writers that change what the order holds lock it before the ingredient stock, the same order for every path
+ORDER_BY_ID_FOR_UPDATE = (ORDER_BY_ID.with_for_update(of=Order)
+                          .execution_options(populate_existing=True))
+ORDERS_PAGE = paged(select(Order).options(*_ORDER_LOADER_OPTIONS), Order.id)
+ORDER_SUMMARY_BY_ID = _orders_summary_query().where(Order.id == bindparam("order_id"))
+ORDERS_SUMMARY_PAGE = paged(_orders_summary_query(), Order.id)
+ORDER_STAMP = (select(Order.updated_at,
+                      Customer.updated_at.label("customer_updated_at"),
+                      func.array_agg(aggregate_order_by(Burger.updated_at, Burger.id))
+                      .filter(Burger.id.is_not(None))
+                      .label("burgers_updated_at"))
+               .join(Customer, Customer.id == Order.customer_id)
+               .outerjoin(OrderBurgerItem, OrderBurgerItem.order_id == Order.id)
+               .outerjoin(Burger, Burger.id == OrderBurgerItem.burger_id)
+               .where(Order.id == bindparam("order_id"))
+               .group_by(Order.id, Customer.id))
+ORDER_STATUSES_BY_IDS = (select(Order.id, Order.status)
+                         .where(Order.id == any_(bindparam("order_ids", type_=ARRAY(Integer)))))
+
+def _stock_holding_orders_query(condition) -> Select:
+    """IDs of the matching orders that hold stock, locked in ID order. A status changed by a write the lock
+    waited for is checked again, so an order cancelled meanwhile isn't returned."""
+    return (select(Order.id)
+            .where(condition, Order.status.in_(STOCK_HOLDING_STATUSES))
+            .order_by(Order.id)
+            .with_for_update())
+
+STOCK_HOLDING_ORDERS_BY_IDS = _stock_holding_orders_query(
+    Order.id == any_(bindparam("order_ids", type_=ARRAY(Integer))))
+STOCK_HOLDING_ORDERS_OF_CUSTOMER = _stock_holding_orders_query(Order.customer_id == bindparam("customer_id"))
 
 async def create_order(db: AsyncSession, order_in: OrderCreate) -> Order:
     db_order = Order(customer_id=order_in.customer_id)
@@ -18,58 +185,61 @@ async def create_order(db: AsyncSession, order_in: OrderCreate) -> Order:
         raise ValueError("Order must have at least one burger item.")
 
     order_burger_items_to_add: List[OrderBurgerItem] = []
-    order_burger_quantities: Dict[int, int] = {}
-
-    for item in order_in.items:
-        order_burger_quantities[item.burger_id] = order_burger_quantities.get(item.burger_id, 0) + item.quantity
+    order_burger_quantities = aggregate_item_quantities(order_in.items)
 
+    burger_prices = {row.id: row.price for row in await get_burgers_by_ids(db, order_burger_quantities.keys())}
     for burger_id, quantity in order_burger_quantities.items():
-        db_burger = await db.get(Burger, burger_id)
-        if not db_burger:
+        if burger_id not in burger_prices:
             raise ValueError(f"Burger with ID {burger_id} wasn't found in DB.")
 
         order_burger_item = OrderBurgerItem(order_id=db_order.id,
                                             burger_id=burger_id,
-                                            quantity=quantity)
+                                            quantity=quantity,
+                                            unit_price=burger_prices[burger_id])
         order_burger_items_to_add.append(order_burger_item)
 
     db.add_all(order_burger_items_to_add)
+    db_order.total_price = sum(item.item_subtotal for item in order_burger_items_to_add)
 
     try:
         await db.commit()
 
-        query = (select(Order)
-                 .where(Order.id == db_order.id).
-                 options(selectinload(Order.burger_items)
-                         .selectinload(OrderBurgerItem.burger),
-                         selectinload(Order.customer)))
-        result = await db.execute(query)
+        result = await db.execute(ORDER_BY_ID, {"order_id": db_order.id})
         refreshed_order = result.scalar_one()
 
         if refreshed_order:
-            logging.info(f"Order {db_order.id} created successfully.")
+            logger.info("Order %s created successfully.", db_order.id)
             return db_order
 
-        logging.error(f"Failed to refresh order {db_order.id} after creation.")
+        logger.error("Failed to refresh order %s after creation.", db_order.id)
         raise
 
     except ValueError as e:
         await db.rollback()
-        logging.warning(str(e))
+        logger.warning("%s", e)
         raise
     except Exception as e:
         await db.rollback()
-        logging.error(f"Failed to create order for customer {order_in.customer_id}: {str(e)}.")
+        logger.error("Failed to create order for customer %s: %s.", order_in.customer_id, e)
         raise
 
-async def update_order(db: AsyncSession, order_id: int, order_in: OrderUpdate) -> Optional[Order]:
-    db_order_to_update = await get_order_by_id(db, order_id)
+async def update_order(db: AsyncSession, order_id: int, order_in: OrderUpdate,
+                       on_stock_change: Optional[Callable[[Dict[int, int], Dict[int, int]], Awaitable[None]]] = None
+                       ) -> Optional[Order]:
+    """on_stock_change is awaited with the burger_id -> quantity lines the order holds stock for before and after
+    the update when they differ, inside the update transaction and before changed lines are written (the stock
+    reservation hooks in there). An order that doesn't hold stock (see STOCK_HOLDING_STATUSES) passes {}.
+    A status change has to follow ORDER_STATUS_TRANSITIONS like update_order_status, ValueError otherwise."""
+    result = await db.execute(ORDER_BY_ID_FOR_UPDATE, {"order_id": order_id})
+    db_order_to_update = result.scalar_one_or_none()
 
     if not db_order_to_update:
-        logging.warning(f"Order with id {order_id} does not exist.")
+        logger.warning("Order with id %s does not exist.", order_id)
         return None
 
     update_data = order_in.model_dump(exclude_unset=True)
+    existing_quantities = {item.burger_id: item.quantity for item in db_order_to_update.burger_items}
+    held_before = existing_quantities if db_order_to_update.status in STOCK_HOLDING_STATUSES else {}
     order_fields_updated = False
     for key, value in update_data.items():
         if key != "items" and key != "status":
@@ -77,97 +247,200 @@ async def update_order(db: AsyncSession, order_id: int, order_in: OrderUpdate) -
                 setattr(db_order_to_update, key, value)
                 order_fields_updated = True
 
-    if "status" in update_data and update_data["status"] in OrderStatus:
-        db_order_to_update.status = update_data["status"]
+    # the order row is locked, so the transition is checked against the status nobody else can change meanwhile
+    new_status = update_data.get("status")
+    if new_status is not None and new_status != db_order_to_update.status:
+        current_status = db_order_to_update.status
+        if current_status not in allowed_previous_statuses(new_status):
+            await db.rollback()
+            raise ValueError(f"Order {order_id} can't be moved from {current_status.value} to {new_status.value}.")
+        db_order_to_update.status = new_status
         order_fields_updated = True
 
     if order_fields_updated:
         db.add(db_order_to_update)
 
-    if "items" in update_data and update_data["items"] not in ([], None):
-        query = delete(OrderBurgerItem).where(OrderBurgerItem.order_id == order_id)
-        await db.execute(query)
-
-        order_burger_items_to_add: List[OrderBurgerItem] = []
-        order_burger_quantities: Dict[int, int] = {}
+    order_burger_quantities = existing_quantities
+    lines_updated = "items" in update_data and update_data["items"] not in ([], None)
+    if lines_updated:
+        order_burger_quantities = aggregate_item_quantities(order_in.items)
 
-        for item in order_in.items:
-            order_burger_quantities[item.burger_id] = order_burger_quantities.get(item.burger_id, 0) + item.quantity
-
-        for burger_id, quantity in order_burger_quantities.items():
-            db_burger = await db.get(Burger, burger_id)
-            if not db_burger:
+        burger_prices = {row.id: row.price for row in await get_burgers_by_ids(db, order_burger_quantities.keys())}
+        for burger_id in order_burger_quantities:
+            if burger_id not in burger_prices:
                 raise ValueError(f"Burger with ID {burger_id} wasn't found in DB.")
 
-            order_burger_item = OrderBurgerItem(order_id=order_id,
-                                                burger_id=burger_id,
-                                                quantity=quantity)
-            order_burger_items_to_add.append(order_burger_item)
-
-        if order_burger_items_to_add:
-            db.add_all(order_burger_items_to_add)
+    held_after = order_burger_quantities if db_order_to_update.status in STOCK_HOLDING_STATUSES else {}
+    if on_stock_change is not None and held_before != held_after:
+        try:
+            await on_stock_change(held_before, held_after)
+        except Exception:
+            await db.rollback()
+            raise
+
+    if lines_updated:
+        await sync_line_items(db, OrderBurgerItem, OrderBurgerItem.order_id, OrderBurgerItem.burger_id, order_id,
+                              existing=existing_quantities,
+                              wanted=order_burger_quantities,
+                              insert_values={burger_id: {"unit_price": price} for burger_id, price in burger_prices.items()})
+        await refresh_order_total(db, order_id)
 
     try:
         await db.commit()
+        # the lines were changed with Core statements, drop the stale collections before re-reading
+        db.expire_all()
 
         refreshed_order = await get_order_by_id(db, order_id)
 
         if refreshed_order:
-            logging.info(f"Order {order_id} updated successfully.")
+            logger.info("Order %s updated successfully.", order_id)
             return refreshed_order
 
-        logging.error(f"Failed to refresh order {order_id} after update.")
+        logger.error("Failed to refresh order %s after update.", order_id)
         return refreshed_order
 
     except ValueError as e:
         await db.rollback()
-        logging.warning(str(e))
+        logger.warning("%s", e)
         raise
     except Exception as e:
         await db.rollback()
-        logging.error(f"Failed to updated order {order_id}: {str(e)}.")
+        logger.error("Failed to updated order %s: %s.", order_id, e)
         raise
 
 async def get_order_by_id(db: AsyncSession, order_id: int) -> Order:
-    query = (select(Order)
-             .where(Order.id == order_id)
-             .options(selectinload(Order.burger_items)
-                     .selectinload(OrderBurgerItem.burger),
-                     selectinload(Order.customer)))
-    result = await db.execute(query)
+    result = await db.execute(ORDER_BY_ID, {"order_id": order_id})
     order = result.scalar_one_or_none()
 
     if not order:
-        logging.debug(f"Order with id {order_id} not found in DB.")
+        logger.debug("Order with id %s not found in DB.", order_id)
         return None
 
-    logging.info(f"Order {order_id} ('{order.id}') found successfully in DB by ID.")
+    logger.debug("Order %s ('%s') found successfully in DB by ID.", order_id, order.id)
     return order
 
-async def get_all_orders(db: AsyncSession, offset: int = 0, limit: int = 100) -> List[Order]:
-    query = (select(Order)
-             .offset(offset)
-             .limit(limit)
-             .order_by(Order.id)
-             .options(selectinload(Order.burger_items)
-                     .selectinload(OrderBurgerItem.burger),
-                     selectinload(Order.customer)))
-    result = await db.execute(query)
+async def get_order_summary(db: AsyncSession, order_id: int) -> Optional[Row]:
+    """The order as one summary row (see _orders_summary_query), None when it doesn't exist"""
+    result = await db.execute(ORDER_SUMMARY_BY_ID, {"order_id": order_id})
+    return result.one_or_none()
+
+async def get_order_stamp(db: AsyncSession, order_id: int) -> Optional[Row]:
+    """(updated_at, customer_updated_at, burgers_updated_at) of everything an order response is built from,
+    burgers_updated_at lists the line burgers in id order and is None for an order without lines.
+    Returns None when the order doesn't exist."""
+    result = await db.execute(ORDER_STAMP, {"order_id": order_id})
+    return result.one_or_none()
+
+async def get_all_orders(db: AsyncSession, offset: int = 0, limit: int = 100,
+                         after_id: Optional[int] = None) -> List[Order]:
+    result = await db.execute(*ORDERS_PAGE.bind(offset, limit, after_id))
     orders = result.scalars().all()
-    logging.debug(f"Retrieved {len(orders)} orders, offset={offset}, limit={limit}.")
+    logger.debug("Retrieved %s orders, offset=%s, limit=%s, after_id=%s.", len(orders), offset, limit, after_id)
     return orders
 
-async def delete_order(db: AsyncSession, order_id: int) -> Optional[Order]:
-    existing_order = await get_order_by_id(db, order_id)
-    if not existing_order:
-        logging.warning(f"Order with id {order_id} not found for deletion.")
+async def get_all_orders_summary(db: AsyncSession, offset: int = 0, limit: int = 100,
+                                 after_id: Optional[int] = None) -> Sequence[Row]:
+    result = await db.execute(*ORDERS_SUMMARY_PAGE.bind(offset, limit, after_id))
+    rows = result.all()
+    logger.debug("Retrieved %s order summaries, offset=%s, limit=%s, after_id=%s.", len(rows), offset, limit, after_id)
+    return rows
+
+async def update_order_status(db: AsyncSession, order_id: int, status: OrderStatus,
+                              expected_status: Optional[OrderStatus] = None,
+                              on_moved: Optional[Callable[[List[int]], Awaitable[None]]] = None) -> Optional[Row]:
+    """Moves the order to the status with one conditional UPDATE ... RETURNING. The allowed previous
+    statuses are checked in the WHERE clause, so concurrent bumps can't skip a transition.
+    on_moved is awaited with the ID of the moved order inside the transaction, before the commit.
+    Returns None when the order doesn't exist or its current status doesn't allow the transition."""
+    allowed_from = allowed_previous_statuses(status)
+    if expected_status is not None:
+        allowed_from = [expected_status] if expected_status in allowed_from else []
+    if not allowed_from:
         return None
+
+    query = (update(Order)
+             .where(Order.id == order_id, Order.status.in_(allowed_from))
+             .values(status=status)
+             .returning(Order.id, Order.status)
+             .execution_options(synchronize_session=False))
+    try:
+        row = (await db.execute(query)).one_or_none()
+        if row is not None and on_moved is not None:
+            await on_moved([row.id])
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error("Failed to update status of order %s: %s.", order_id, e)
+        raise
+    logger.debug("Order %s status update to %s: %s.", order_id, status.value, "done" if row else "rejected")
+    return row
+
+async def update_orders_status(db: AsyncSession, order_ids: Iterable[int], status: OrderStatus,
+                               on_moved: Optional[Callable[[List[int]], Awaitable[None]]] = None) -> Sequence[Row]:
+    """Batch variant of update_order_status, returns (id, status) of the orders that were moved"""
+    allowed_from = allowed_previous_statuses(status)
+    if not allowed_from:
+        return []
+
+    query = (update(Order)
+             .where(Order.id == any_(literal(list(order_ids), ARRAY(Integer))), Order.status.in_(allowed_from))
+             .values(status=status)
+             .returning(Order.id, Order.status)
+             .execution_options(synchronize_session=False))
+    try:
+        rows = (await db.execute(query)).all()
+        if rows and on_moved is not None:
+            await on_moved([row.id for row in rows])
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error("Failed to update status of orders: %s.", e)
+        raise
+    logger.debug("Moved %s orders to status %s.", len(rows), status.value)
+    return rows
+
+async def get_order_statuses(db: AsyncSession, order_ids: Iterable[int]) -> Dict[int, OrderStatus]:
+    result = await db.execute(ORDER_STATUSES_BY_IDS, {"order_ids": list(order_ids)})
+    return {row.id: row.status for row in result}
+
+async def stream_orders_summary(db: AsyncSession, limit: int = 100, after_id: Optional[int] = None,
+                                yield_per: int = 50) -> AsyncIterator[Row]:
+    """Yields order summary rows as they arrive through a server-side cursor, at most yield_per rows are buffered"""
+    query, params = ORDERS_SUMMARY_PAGE.bind(0, limit, after_id)
+    result = await db.stream(query, params, execution_options={"yield_per": yield_per})
+    async for row in result:
+        yield row
+
+async def lock_stock_holding_orders(db: AsyncSession, order_ids: Iterable[int]) -> List[int]:
+    """Locks the given orders that hold stock until the transaction ends and returns their IDs"""
+    result = await db.execute(STOCK_HOLDING_ORDERS_BY_IDS, {"order_ids": list(order_ids)})
+    return list(result.scalars())
+
+async def lock_customer_stock_holding_orders(db: AsyncSession, customer_id: int) -> List[int]:
+    """Locks the orders of the customer that hold stock until the transaction ends and returns their IDs"""
+    result = await db.execute(STOCK_HOLDING_ORDERS_OF_CUSTOMER, {"customer_id": customer_id})
+    return list(result.scalars())
+
+async def delete_order(db: AsyncSession, order_id: int,
+                       on_delete: Optional[Callable[[List[int]], Awaitable[None]]] = None) -> bool:
+    """Deletes the order with one DELETE, its lines go with it through ON DELETE CASCADE.
+    When the order holds stock, on_delete is awaited with its ID first, with the order locked and inside the
+    delete transaction (the stock release hooks in there). Returns False when the order doesn't exist."""
     try:
-        await db.delete(existing_order)
+        if on_delete is not None:
+            held_ids = await lock_stock_holding_orders(db, [order_id])
+            if held_ids:
+                await on_delete(held_ids)
+        result = await db.execute(delete(Order).where(Order.id == order_id).returning(Order.id))
+        deleted_id = result.scalar_one_or_none()
+        if deleted_id is None:
+            logger.warning("Order with id %s not found for deletion.", order_id)
+            await db.rollback()
+            return False
         await db.commit()
-        logging.info(f"Order {order_id} deleted successfully.")
-        return existing_order
+        logger.info("Order %s deleted successfully.", order_id)
+        return True
     except Exception as e:
         await db.rollback()
-        logging.error(f"Failed to delete order {order_id}: {str(e)}.")
+        logger.error("Failed to delete order %s: %s.", order_id, e)
         raise
\ No newline at end of file
@@ -0,0 +1,34 @@
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+from sqlalchemy import Select, bindparam, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.sql.elements import ColumnElement
+
+# Statements of the hot read paths are built once at import with bindparam() placeholders and executed
+# with a parameter dict. Building a select() with its loader options and computing its cache key costs
+# hundreds of microseconds per call, a prebuilt statement memoizes its cache key, so every execution
+# goes straight to the compiled SQL cache and the connection's prepared statement.
+
+
+class PagedStatement(NamedTuple):
+    """Prebuilt offset/limit page of a query ordered by id, with its keyset variant (id > :after_id)"""
+    first: Select
+    after: Select
+
+    def bind(self, offset: int, limit: int, after_id: Optional[int] = None) -> Tuple[Select, Dict[str, Any]]:
+        """Returns the statement matching after_id and its parameters"""
+        if after_id is None:
+            return self.first, {"offset": offset, "limit": limit}
+        return self.after, {"offset": offset, "limit": limit, "after_id": after_id}
+
+
+def paged(query: Select, id_column: ColumnElement) -> PagedStatement:
+    page = query.order_by(id_column).offset(bindparam("offset")).limit(bindparam("limit"))
+    return PagedStatement(page, page.where(id_column > bindparam("after_id")))
+
+
+def collection_stamp(id_column: ColumnElement, updated_at_column: ColumnElement) -> Select:
+    """md5 over the id and updated_at of every row in id order, changes with any insert, update or delete.
+    Unlike max(updated_at) it notices deletes and writes committed out of timestamp order."""
+    row_stamp = func.concat(id_column, literal_column("':'"), updated_at_column)
+    rows = func.string_agg(row_stamp, aggregate_order_by(literal_column("','"), id_column))
+    return select(func.md5(func.coalesce(rows, literal_column("''"))))
@@ -1,8 +1,12 @@
 import os
+from typing import Dict, Any
 from dotenv import load_dotenv
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 
+from src.core.metrics import instrument_engine
+from src.database.settings import EngineSettings
+
 load_dotenv()
 DB_USER = os.getenv("DB_USER")
 DB_PASSWORD = os.getenv("DB_PASSWORD")
@@ -11,13 +15,23 @@ DB_PORT = os.getenv("DB_PORT")
 DB_NAME = os.getenv("DB_NAME")
 
 ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-engine = create_async_engine(ASYNC_DATABASE_URL, echo=True)
+DATABASE_DSN = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# LISTEN needs a session-level connection, point this past PgBouncer when it runs in transaction mode
+LISTEN_DATABASE_DSN = os.getenv("DB_LISTEN_DSN", DATABASE_DSN)
+
+engine_settings = EngineSettings.from_env()
+engine = create_async_engine(ASYNC_DATABASE_URL, **engine_settings.engine_kwargs())
+instrument_engine(engine.sync_engine)
 AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
 
 Base = declarative_base()
 
 from src.database import models
 
+def get_pool_stats() -> Dict[str, Any]:
+    """Current connection pool usage and checkout wait statistics"""
+    return engine.pool.stats()
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -3,4 +3,7 @@ from .burger_ingredient_items import BurgerIngredientItem
 from .customer import Customer
 from .ingredient import Ingredient
 from .order import Order
-from .order_burger_item import OrderBurgerItem
\ No newline at end of file
+from .order_burger_item import OrderBurgerItem
+from .analytics import (AnalyticsDirtyMark, OrderStatusHourlyRollup, BurgerSalesHourlyRollup,
+                        IngredientConsumptionHourlyRollup)
+from .idempotency_key import IdempotencyKey
\ No newline at end of file
@@ -0,0 +1,133 @@
+from datetime import datetime
+from sqlalchemy import DDL, BigInteger, DateTime, Float, Integer, event, Enum as SQLAlchemyEnum
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+from .order import OrderStatus
+
+class AnalyticsDirtyMark(Base):
+    """Hours whose orders changed since their rollups were last computed, filled by triggers.
+    Every write appends its own marks, so writers never wait on each other's marks."""
+    __tablename__ = "analytics_dirty_marks"
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
+
+class OrderStatusHourlyRollup(Base):
+    """Orders and revenue per hour of creation and current status"""
+    __tablename__ = "analytics_order_status_hourly"
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    status: Mapped[OrderStatus] = mapped_column(
+        SQLAlchemyEnum(OrderStatus, name="order_status_enum", create_type=False), primary_key=True)
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    revenue: Mapped[float] = mapped_column(Float, nullable=False)
+
+class BurgerSalesHourlyRollup(Base):
+    """Sold quantity and revenue per hour and burger, cancelled orders excluded"""
+    __tablename__ = "analytics_burger_sales_hourly"
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    burger_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    revenue: Mapped[float] = mapped_column(Float, nullable=False)
+
+class IngredientConsumptionHourlyRollup(Base):
+    """Ingredient units used per hour (recipe quantity x ordered quantity), cancelled orders excluded.
+    Computed from the current recipes, like the stock reservations: a recipe change marks every hour
+    with orders of the burger dirty, so all hours agree on the recipe."""
+    __tablename__ = "analytics_ingredient_consumption_hourly"
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    ingredient_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+# Statement-level triggers mark the hours touched by a write as dirty with one plain INSERT per statement,
+# the rollup job recomputes only those hours. They are created after all tables of the metadata.
+# A mark becomes visible when its write commits. The job deletes only the marks it read and recomputes
+# the hours afterwards, so an hour written meanwhile keeps its newer mark and is recomputed again.
+ANALYTICS_TRIGGERS_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION analytics_mark_orders_dirty() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO analytics_dirty_marks (bucket_start)
+            SELECT DISTINCT date_trunc('hour', created_at) FROM old_rows;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO analytics_dirty_marks (bucket_start)
+            SELECT DISTINCT date_trunc('hour', created_at) FROM new_rows;
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION analytics_mark_order_items_dirty() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO analytics_dirty_marks (bucket_start)
+            SELECT DISTINCT date_trunc('hour', orders.created_at)
+            FROM orders JOIN old_rows ON orders.id = old_rows.order_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO analytics_dirty_marks (bucket_start)
+            SELECT DISTINCT date_trunc('hour', orders.created_at)
+            FROM orders JOIN new_rows ON orders.id = new_rows.order_id;
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION analytics_mark_recipes_dirty() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO analytics_dirty_marks (bucket_start)
+            SELECT DISTINCT date_trunc('hour', orders.created_at)
+            FROM orders JOIN order_burger_items ON order_burger_items.order_id = orders.id
+            WHERE order_burger_items.burger_id IN (SELECT burger_id FROM old_rows);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO analytics_dirty_marks (bucket_start)
+            SELECT DISTINCT date_trunc('hour', orders.created_at)
+            FROM orders JOIN order_burger_items ON order_burger_items.order_id = orders.id
+            WHERE order_burger_items.burger_id IN (SELECT burger_id FROM new_rows);
+        END IF;
+        RETURN NULL;
+    END $$
+    """,
+    "DROP TRIGGER IF EXISTS orders_analytics_insert ON orders",
+    "DROP TRIGGER IF EXISTS orders_analytics_update ON orders",
+    "DROP TRIGGER IF EXISTS orders_analytics_delete ON orders",
+    "DROP TRIGGER IF EXISTS order_items_analytics_insert ON order_burger_items",
+    "DROP TRIGGER IF EXISTS order_items_analytics_update ON order_burger_items",
+    "DROP TRIGGER IF EXISTS order_items_analytics_delete ON order_burger_items",
+    "DROP TRIGGER IF EXISTS recipes_analytics_insert ON burger_ingredient_items",
+    "DROP TRIGGER IF EXISTS recipes_analytics_update ON burger_ingredient_items",
+    "DROP TRIGGER IF EXISTS recipes_analytics_delete ON burger_ingredient_items",
+    """CREATE TRIGGER orders_analytics_insert AFTER INSERT ON orders
+       REFERENCING NEW TABLE AS new_rows
+       FOR EACH STATEMENT EXECUTE FUNCTION analytics_mark_orders_dirty()""",
+    """CREATE TRIGGER orders_analytics_update AFTER UPDATE ON orders
+       REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+       FOR EACH STATEMENT EXECUTE FUNCTION analytics_mark_orders_dirty()""",
+    """CREATE TRIGGER orders_analytics_delete AFTER DELETE ON orders
+       REFERENCING OLD TABLE AS old_rows
+       FOR EACH STATEMENT EXECUTE FUNCTION analytics_mark_orders_dirty()""",
+    """CREATE TRIGGER order_items_analytics_insert AFTER INSERT ON order_burger_items
+       REFERENCING NEW TABLE AS new_rows
+       FOR EACH STATEMENT EXECUTE FUNCTION analytics_mark_order_items_dirty()""",
+    """CREATE TRIGGER order_items_analytics_update AFTER UPDATE ON order_burger_items
+       REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+       FOR EACH STATEMENT EXECUTE FUNCTION analytics_mark_order_items_dirty()""",
+    """CREATE TRIGGER order_items_analytics_delete AFTER DELETE ON order_burger_items
+       REFERENCING OLD TABLE AS old_rows
+       FOR EACH STATEMENT EXECUTE FUNCTION analytics_mark_order_items_dirty()""",
+    """CREATE TRIGGER recipes_analytics_insert AFTER INSERT ON burger_ingredient_items
+       REFERENCING NEW TABLE AS new_rows
+       FOR EACH STATEMENT EXECUTE FUNCTION analytics_mark_recipes_dirty()""",
+    """CREATE TRIGGER recipes_analytics_update AFTER UPDATE ON burger_ingredient_items
+       REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+       FOR EACH STATEMENT EXECUTE FUNCTION analytics_mark_recipes_dirty()""",
+    """CREATE TRIGGER recipes_analytics_delete AFTER DELETE ON burger_ingredient_items
+       REFERENCING OLD TABLE AS old_rows
+       FOR EACH STATEMENT EXECUTE FUNCTION analytics_mark_recipes_dirty()"""]
+
+for statement in ANALYTICS_TRIGGERS_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement).execute_if(dialect="postgresql"))
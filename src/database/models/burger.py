@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import List, TYPE_CHECKING, Dict
-from sqlalchemy import String, Float
+from sqlalchemy import String, Float, Boolean, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..database import Base
@@ -14,10 +15,15 @@ class Burger(Base):
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(String(255), nullable=True)
     price: Mapped[float] = mapped_column(Float, nullable=False)
+    # false when a tracked ingredient of the recipe is out of stock, maintained on stock and recipe changes
+    is_available: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default="true")
+    # stamped on every write of the row, recipe changes touch it explicitly, the menu ETags are derived from it
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(),
+                                                 onupdate=func.clock_timestamp())
 
     order_items: Mapped[List["OrderBurgerItem"]] = relationship(
         back_populates="burger",
-        lazy="selectin")
+        passive_deletes="all")
     ingredient_items: Mapped[List["BurgerIngredientItem"]] = relationship(
         back_populates="burger",
         lazy="selectin",
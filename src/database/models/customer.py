@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import List, TYPE_CHECKING
-from sqlalchemy import String
+from sqlalchemy import DateTime, Index, String, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from ..database import Base
 
@@ -11,9 +12,17 @@ class Customer(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     phone: Mapped[str] = mapped_column(String(32), nullable=False, unique=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(),
+                                                 onupdate=func.clock_timestamp())
 
     orders: Mapped[List["Order"]] = relationship(
-        back_populates="customer", cascade="all, delete-orphan")
+        back_populates="customer", cascade="all, delete-orphan", passive_deletes=True)
+
+    # pattern_ops btree indexes serve the LIKE 'prefix%' lookups of the customer search in any collation
+    __table_args__ = (
+        Index("ix_customers_phone_pattern", "phone", postgresql_ops={"phone": "varchar_pattern_ops"}),
+        Index("ix_customers_lower_name_pattern", func.lower(name).label("lower_name"),
+              postgresql_ops={"lower_name": "text_pattern_ops"}))
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -0,0 +1,17 @@
+from datetime import datetime
+from typing import Any, Optional
+from sqlalchemy import DateTime, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+class IdempotencyKey(Base):
+    """Response of a create request stored under the client's Idempotency-Key, replayed on retries.
+    The scope keeps keys of different endpoints apart, request_hash rejects reuse with another body."""
+    __tablename__ = "idempotency_keys"
+    scope: Mapped[str] = mapped_column(String(32), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    response: Mapped[Optional[Any]] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
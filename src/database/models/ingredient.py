@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import List, TYPE_CHECKING
-from sqlalchemy import String
+from sqlalchemy import String, Integer, CheckConstraint, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..database import Base
@@ -9,12 +10,19 @@ if TYPE_CHECKING:
 
 class Ingredient(Base):
     __tablename__ = "ingredients"
+    __table_args__ = (CheckConstraint("stock_quantity >= 0", name="ck_ingredients_stock_quantity_non_negative"),)
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     manufacturer: Mapped[str] = mapped_column(String(255), nullable=False)
+    # units in stock, NULL means the ingredient isn't tracked and never runs out
+    stock_quantity: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(),
+                                                 onupdate=func.clock_timestamp())
 
+    # never loaded implicitly: eager loading it pulled every recipe line using the ingredient into
+    # each ingredient read, raising makes any new implicit access fail loudly instead of fanning out
     burger_items: Mapped[List["BurgerIngredientItem"]] = relationship(
-        back_populates="ingredient", cascade="all, delete-orphan", lazy="selectin")
+        back_populates="ingredient", cascade="all, delete-orphan", lazy="raise", passive_deletes=True)
 
     class Config:
         from_attributes = True
\ No newline at end of file
@@ -1,6 +1,6 @@
-from typing import List, TYPE_CHECKING, Dict
+from typing import List, TYPE_CHECKING, Dict, FrozenSet
 import enum
-from sqlalchemy import DateTime, ForeignKey, func, Enum as SQLAlchemyEnum
+from sqlalchemy import DateTime, Float, ForeignKey, func, Enum as SQLAlchemyEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..database import Base
@@ -15,20 +15,41 @@ class OrderStatus(enum.Enum):
     Completed = "Completed"
     Cancelled = "Cancelled"
 
+# Statuses an order may move to from each status, Completed and Cancelled are final
+ORDER_STATUS_TRANSITIONS: Dict[OrderStatus, FrozenSet[OrderStatus]] = {
+    OrderStatus.Pending: frozenset({OrderStatus.Processing, OrderStatus.Cancelled}),
+    OrderStatus.Processing: frozenset({OrderStatus.Completed, OrderStatus.Cancelled}),
+    OrderStatus.Completed: frozenset(),
+    OrderStatus.Cancelled: frozenset()}
+
+# Orders in these statuses hold the tracked ingredients of their lines. Completed orders used them up,
+# Cancelled ones gave them back.
+STOCK_HOLDING_STATUSES = (OrderStatus.Pending, OrderStatus.Processing)
+
+def allowed_previous_statuses(status: OrderStatus) -> List[OrderStatus]:
+    """Statuses from which an order may be moved to the given status"""
+    return [previous for previous, targets in ORDER_STATUS_TRANSITIONS.items() if status in targets]
+
 class Order(Base):
     __tablename__ = "orders"
     id: Mapped[int] = mapped_column(primary_key=True)
     customer_id: Mapped[int] = mapped_column(ForeignKey("customers.id", ondelete="CASCADE"))
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
     status: Mapped[OrderStatus] = mapped_column(
         SQLAlchemyEnum(OrderStatus, name="order_status_enum", create_type=False),
         nullable=False,
         default=OrderStatus.Pending.value
     )
+    # sum of unit_price * quantity of the lines, maintained by every write that changes them
+    total_price: Mapped[float] = mapped_column(Float, nullable=False, default=0.0, server_default="0")
+    # clock_timestamp() rather than now(): a write that waited on the row lock still stamps a later time
+    # than the write it waited for, so Last-Modified never goes backwards
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(),
+                                                 onupdate=func.clock_timestamp())
 
     customer: Mapped["Customer"] = relationship(back_populates="orders")
     burger_items: Mapped[List["OrderBurgerItem"]] = relationship(
-        back_populates="order", cascade="all, delete-orphan", lazy="selectin")
+        back_populates="order", cascade="all, delete-orphan", lazy="selectin", passive_deletes=True)
 
     @property
     def burgers(self) -> List["Burger"]:
@@ -1,5 +1,5 @@
 from typing import TYPE_CHECKING
-from sqlalchemy import ForeignKey, Integer
+from sqlalchemy import ForeignKey, Integer, Float
 from sqlalchemy.orm import Mapped, relationship, mapped_column
 
 from ..database import Base
@@ -11,9 +11,20 @@ class OrderBurgerItem(Base):
     __tablename__ = "order_burger_items"
     order_id: Mapped[int] = mapped_column(
         ForeignKey("orders.id", ondelete="CASCADE"), primary_key=True)
+    # indexed for the lookups by burger: the RESTRICT check of burger deletes and the recipe analytics trigger
     burger_id: Mapped[int] = mapped_column(
-        ForeignKey("burgers.id", ondelete="RESTRICT"), primary_key=True, nullable=False)
+        ForeignKey("burgers.id", ondelete="RESTRICT"), primary_key=True, nullable=False, index=True)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    # burger price at the time the line was ordered, later menu price changes don't reprice the order
+    unit_price: Mapped[float] = mapped_column(Float, nullable=False)
 
     order: Mapped["Order"] = relationship(back_populates="burger_items")
-    burger: Mapped["Burger | None"] = relationship(back_populates="order_items")
\ No newline at end of file
+    burger: Mapped["Burger | None"] = relationship(back_populates="order_items")
+
+    @property
+    def burger_price(self) -> float:
+        return self.unit_price
+
+    @property
+    def item_subtotal(self) -> float:
+        return self.unit_price * self.quantity
@@ -0,0 +1,13 @@
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CACHE_INVALIDATION_CHANNEL = "cache_invalidation"
+
+async def notify_cache_invalidation(db: AsyncSession, namespace: str) -> None:
+    """Queues a NOTIFY with the cache namespace in the current transaction.
+    Postgres delivers it to every listening worker only when the transaction commits."""
+    await db.execute(select(func.pg_notify(CACHE_INVALIDATION_CHANNEL, namespace)))
+
+ORDER_EVENTS_CHANNEL = "order_events"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD_BYTES = 7999
@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+from src.database.models.order import OrderStatus
+
+class RevenuePoint(BaseModel):
+    period_start: datetime
+    order_count: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+class AverageTicketResponse(BaseModel):
+    order_count: int
+    revenue: float
+    average_ticket: float
+
+class StatusCount(BaseModel):
+    status: OrderStatus
+    order_count: int
+
+    class Config:
+        from_attributes = True
+
+class TopBurger(BaseModel):
+    burger_id: int
+    name: Optional[str] = None
+    quantity: int
+    revenue: float
+
+    class Config:
+        from_attributes = True
+
+class IngredientConsumption(BaseModel):
+    ingredient_id: int
+    name: Optional[str] = None
+    quantity: int
+
+    class Config:
+        from_attributes = True
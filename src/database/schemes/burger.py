@@ -12,6 +12,7 @@ class BurgerCreate(BurgerBase):
 class BurgerResponse(BurgerBase):
     id: int
     ingredients: Dict[str, int]
+    is_available: bool = True
 
     class Config:
         from_attributes = True
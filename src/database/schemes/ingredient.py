@@ -1,9 +1,15 @@
-from pydantic import BaseModel
+from typing import Optional
+from pydantic import BaseModel, Field
 
 class IngredientResponse(BaseModel):
     id: int
     name: str
     manufacturer: str
+    stock_quantity: Optional[int] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class IngredientStockUpdate(BaseModel):
+    # None stops tracking the ingredient
+    stock_quantity: Optional[int] = Field(default=None, ge=0)
\ No newline at end of file
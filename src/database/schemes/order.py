@@ -36,7 +36,41 @@ class OrderResponse(OrderBase):
     class Config:
         from_attributes = True
 
+class OrderBulkCreate(BaseModel):
+    orders: List[OrderCreate] = Field(min_length=1, max_length=1000)
+
+class OrderBulkError(BaseModel):
+    index: int
+    detail: str
+
+class OrderBulkResponse(BaseModel):
+    created: List[OrderResponse]
+    errors: List[OrderBulkError]
+
 class OrderUpdate(OrderBase):
     customer_id: Optional[int] = None
     items: Optional[List[OrderBurgerItemCreate]] = None
-    status: Optional[OrderStatus] = None
\ No newline at end of file
+    status: Optional[OrderStatus] = None
+
+class OrderStatusUpdate(BaseModel):
+    status: OrderStatus
+    expected_status: Optional[OrderStatus] = None
+
+class OrderBatchStatusUpdate(BaseModel):
+    order_ids: List[int] = Field(min_length=1, max_length=1000)
+    status: OrderStatus
+
+class OrderStatusResponse(BaseModel):
+    id: int
+    status: OrderStatus
+
+    class Config:
+        from_attributes = True
+
+class OrderStatusError(BaseModel):
+    order_id: int
+    detail: str
+
+class OrderBatchStatusResponse(BaseModel):
+    updated: List[OrderStatusResponse]
+    errors: List[OrderStatusError]
\ No newline at end of file
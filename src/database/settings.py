@@ -0,0 +1,110 @@
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.core.metrics import record_pool_wait
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclass(frozen=True)
+class EngineSettings:
+    """Async engine and connection pool settings, loaded from DB_* environment variables (or .env)"""
+    echo: bool = True
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    statement_cache_size: int = 100
+    # per-connection LRU of prepared statements, sized above the number of distinct SQL texts the app
+    # issues so a busy connection never evicts and re-prepares a hot statement
+    prepared_statement_cache_size: int = 256
+    # SQLAlchemy's compiled SQL cache, shared by all connections
+    query_cache_size: int = 500
+    pgbouncer_mode: bool = False
+
+    @classmethod
+    def from_env(cls) -> "EngineSettings":
+        return cls(
+            echo=_env_bool("DB_ECHO", cls.echo),
+            pool_size=int(os.getenv("DB_POOL_SIZE", cls.pool_size)),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", cls.max_overflow)),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", cls.pool_timeout)),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", cls.pool_recycle)),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", cls.pool_pre_ping),
+            statement_cache_size=int(os.getenv("DB_STATEMENT_CACHE_SIZE", cls.statement_cache_size)),
+            prepared_statement_cache_size=int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE",
+                                                        cls.prepared_statement_cache_size)),
+            query_cache_size=int(os.getenv("DB_QUERY_CACHE_SIZE", cls.query_cache_size)),
+            pgbouncer_mode=_env_bool("DB_PGBOUNCER_MODE", cls.pgbouncer_mode))
+
+    def engine_kwargs(self) -> Dict[str, Any]:
+        """Keyword arguments for create_async_engine.
+
+        In PgBouncer mode (transaction pooling) server-side prepared statements can't be reused
+        across transactions, so both statement caches are disabled and every prepared statement
+        gets a unique name to avoid clashes between clients sharing a server connection."""
+        connect_args: Dict[str, Any] = {
+            "statement_cache_size": self.statement_cache_size,
+            "prepared_statement_cache_size": self.prepared_statement_cache_size}
+        if self.pgbouncer_mode:
+            connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__"}
+
+        return {
+            "echo": self.echo,
+            "poolclass": InstrumentedAsyncQueuePool,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+            "query_cache_size": self.query_cache_size,
+            "connect_args": connect_args}
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long callers waited to check out a connection"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_count += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            record_pool_wait(waited)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": self.size(),
+                "checked_in": self.checkedin(),
+                "checked_out": self.checkedout(),
+                "overflow": self.overflow(),
+                "wait_count": self.wait_count,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "timeouts": self.timeouts}
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional, Tuple
+from fastapi import APIRouter, status, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from src.core.dependencies import get_db_session
+from src.database.schemes.analytics import (RevenuePoint, AverageTicketResponse, StatusCount, TopBurger,
+                                            IngredientConsumption)
+from src.services.analytics import AnalyticsService
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"]
+)
+
+DEFAULT_RANGE = timedelta(days=7)
+
+def get_time_range(start: Optional[datetime] = None, end: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Dependency for the [start, end) reporting window, the last 7 days by default"""
+    end = end or datetime.now(timezone.utc)
+    start = start or end - DEFAULT_RANGE
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end.")
+    return start, end
+
+@router.get("/revenue", response_model=List[RevenuePoint])
+async def read_revenue(
+        granularity: Literal["hour", "day"] = "hour",
+        time_range: Tuple[datetime, datetime] = Depends(get_time_range),
+        db: AsyncSession = Depends(get_db_session)
+        ):
+    return await AnalyticsService.get_revenue(db, *time_range, granularity)
+
+@router.get("/average-ticket", response_model=AverageTicketResponse)
+async def read_average_ticket(
+        time_range: Tuple[datetime, datetime] = Depends(get_time_range),
+        db: AsyncSession = Depends(get_db_session)
+        ):
+    return await AnalyticsService.get_average_ticket(db, *time_range)
+
+@router.get("/status-funnel", response_model=List[StatusCount])
+async def read_status_funnel(
+        time_range: Tuple[datetime, datetime] = Depends(get_time_range),
+        db: AsyncSession = Depends(get_db_session)
+        ):
+    return await AnalyticsService.get_status_funnel(db, *time_range)
+
+@router.get("/top-burgers", response_model=List[TopBurger])
+async def read_top_burgers(
+        limit: int = Query(10, ge=1, le=100),
+        time_range: Tuple[datetime, datetime] = Depends(get_time_range),
+        db: AsyncSession = Depends(get_db_session)
+        ):
+    return await AnalyticsService.get_top_burgers(db, *time_range, limit)
+
+@router.get("/ingredient-consumption", response_model=List[IngredientConsumption])
+async def read_ingredient_consumption(
+        time_range: Tuple[datetime, datetime] = Depends(get_time_range),
+        db: AsyncSession = Depends(get_db_session)
+        ):
+    return await AnalyticsService.get_ingredient_consumption(db, *time_range)
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from typing import Optional
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from src.core.conditional import make_etag, not_modified_response, set_validators
 from src.core.dependencies import get_db_session
+from src.core.pagination import get_after_id, set_next_cursor_headers
 from src.database.schemes.burger import *
 from src.services.burger import BurgerService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/burgers",
     tags=["Burgers"]
@@ -21,7 +26,7 @@ async def create_new_burger(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
-        logging.error(f"Unhandled exception in create_new_burger: {e}", exc_info=True)
+        logger.error("Unhandled exception in create_new_burger: %s", e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create burger")
 
 @router.put("/{burger_id}", response_model=BurgerResponse)
@@ -38,7 +43,7 @@ async def update_existing_burger(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
-        logging.error(f"Unhandled exception in update_existing_burger for ID {burger_id}: {e}", exc_info=True)
+        logger.error("Unhandled exception in update_existing_burger for ID %s: %s", burger_id, e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update burger")
 
 @router.get("/{burger_id}", response_model=BurgerResponse)
@@ -46,18 +51,29 @@ async def read_burger(
         burger_id: int,
         db: AsyncSession = Depends(get_db_session)
         ):
-    db_burger = await BurgerService.get_burger_by_id(db, burger_id)
+    db_burger = await BurgerService.get_menu_burger_by_id(db, burger_id)
     if db_burger is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Burger not found")
     return db_burger
 
 @router.get("/", response_model=List[BurgerResponse])
 async def read_all_burgers(
+        request: Request,
+        response: Response,
         offset: int = 0,
         limit: int = 100,
+        after_id: Optional[int] = Depends(get_after_id),
         db: AsyncSession = Depends(get_db_session)
         ):
-    return await BurgerService.get_all_burgers(db, offset, limit)
+    etag = make_etag(await BurgerService.get_menu_stamp(db), offset, limit, after_id)
+    not_modified = not_modified_response(request, etag)
+    if not_modified is not None:
+        return not_modified
+
+    burgers = await BurgerService.get_menu_burgers(db, offset, limit, after_id)
+    set_next_cursor_headers(request, response, burgers, limit)
+    set_validators(response, etag)
+    return burgers
 
 @router.delete("/{burger_id}", response_model=BurgerResponse)
 async def delete_existing_burger(
@@ -70,5 +86,5 @@ async def delete_existing_burger(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Burger not found")
         return deleted_burger
     except Exception as e:
-        logging.error(f"Unhandled exception in delete_existing_burger for ID {burger_id}: {e}", exc_info=True)
+        logger.error("Unhandled exception in delete_existing_burger for ID %s: %s", burger_id, e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete burger")
\ No newline at end of file
@@ -1,12 +1,15 @@
-from typing import List
-from fastapi import APIRouter, status, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 from src.core.dependencies import get_db_session
+from src.core.pagination import get_after_id, set_next_cursor_headers
 from src.database.schemes.customer import *
 from src.services.customer import CustomerService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/customers",
     tags=["Customers"]
@@ -22,7 +25,7 @@ async def create_new_customer(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
-        logging.error(f"Unhandled exception in create_new_customer: {e}", exc_info=True)
+        logger.error("Unhandled exception in create_new_customer: %s", e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create customer")
 
 @router.put("/{customer_id}", response_model=CustomerResponse)
@@ -38,10 +41,28 @@ async def update_existing_customer(
         return updated_customer
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Unhandled exception in update_existing_customer for ID {customer_id}: {e}", exc_info=True)
+        logger.error("Unhandled exception in update_existing_customer for ID %s: %s", customer_id, e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update customer")
 
+@router.get("/search", response_model=List[CustomerResponse])
+async def search_customers(
+        q: str = Query(..., min_length=1, max_length=64),
+        limit: int = Query(10, ge=1, le=50),
+        db: AsyncSession = Depends(get_db_session)
+        ):
+    """Customers whose phone or name starts with q, for the order form typeahead"""
+    q = q.strip()
+    if not q:
+        return []
+    try:
+        return await CustomerService.search_customers(db, q, limit)
+    except Exception as e:
+        logger.error("Unhandled exception in search_customers: %s", e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to search customers")
+
 @router.get("/{customer_id}", response_model=CustomerResponse)
 async def read_customer(
         customer_id: int,
@@ -53,19 +74,24 @@ async def read_customer(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer not found")
         return db_customer
     except Exception as e:
-        logging.error(f"Unhandled exception in read_customer for ID {customer_id}: {e}", exc_info=True)
+        logger.error("Unhandled exception in read_customer for ID %s: %s", customer_id, e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to read customer")
 
 @router.get("/", response_model=List[CustomerResponse])
 async def read_all_customers(
+        request: Request,
+        response: Response,
         offset: int = 0,
         limit: int = 100,
+        after_id: Optional[int] = Depends(get_after_id),
         db: AsyncSession = Depends(get_db_session)
         ):
     try:
-        return await CustomerService.get_all_customers(db, offset, limit)
+        customers = await CustomerService.get_all_customers(db, offset, limit, after_id)
+        set_next_cursor_headers(request, response, customers, limit)
+        return customers
     except Exception as e:
-        logging.error(f"Unhandled exception in read_all_customers: {e}", exc_info=True)
+        logger.error("Unhandled exception in read_all_customers: %s", e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to read customers")
 
 @router.delete("/{customer_id}", response_model=CustomerResponse)
@@ -79,5 +105,5 @@ async def delete_existing_customer(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Customer not found")
         return deleted_customer
     except Exception as e:
-        logging.error(f"Unhandled exception in delete_existing_customer for ID {customer_id}: {e}", exc_info=True)
+        logger.error("Unhandled exception in delete_existing_customer for ID %s: %s", customer_id, e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete customer")
\ No newline at end of file
@@ -1,12 +1,16 @@
-from typing import List
-from fastapi import APIRouter, status, HTTPException, Depends
+from typing import List, Optional
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from src.core.conditional import make_etag, not_modified_response, set_validators
 from src.core.dependencies import get_db_session
-from src.database.schemes.ingredient import IngredientResponse
+from src.core.pagination import get_after_id, set_next_cursor_headers
+from src.database.schemes.ingredient import IngredientResponse, IngredientStockUpdate
 from src.services.ingredient import IngredientService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/ingredients",
     tags=["Ingredients"]
@@ -23,17 +27,43 @@ async def read_ingredient(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingredient not found")
         return db_ingredient
     except Exception as e:
-        logging.error(f"Unhandled exception in read_ingredient for ID {ingredient_id}: {e}", exc_info=True)
+        logger.error("Unhandled exception in read_ingredient for ID %s: %s", ingredient_id, e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to read ingredient")
 
 @router.get("/", response_model=List[IngredientResponse])
 async def read_all_ingredients(
+        request: Request,
+        response: Response,
         offset: int = 0,
         limit: int = 100,
+        after_id: Optional[int] = Depends(get_after_id),
+        db: AsyncSession = Depends(get_db_session)
+        ):
+    try:
+        etag = make_etag(await IngredientService.get_ingredients_stamp(db), offset, limit, after_id)
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+        ingredients = await IngredientService.get_all_ingredients(db, offset, limit, after_id)
+        set_next_cursor_headers(request, response, ingredients, limit)
+        set_validators(response, etag)
+        return ingredients
+    except Exception as e:
+        logger.error("Unhandled exception in read_all_ingredients: %s", e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to read ingredients")
+
+@router.put("/{ingredient_id}/stock", response_model=IngredientResponse)
+async def update_ingredient_stock(
+        ingredient_id: int,
+        stock_in: IngredientStockUpdate,
         db: AsyncSession = Depends(get_db_session)
         ):
     try:
-        return await IngredientService.get_all_ingredients(db, offset, limit)
+        db_ingredient = await IngredientService.set_ingredient_stock(db, ingredient_id, stock_in)
     except Exception as e:
-        logging.error(f"Unhandled exception in read_all_ingredients: {e}", exc_info=True)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to read ingredients")
\ No newline at end of file
+        logger.error("Unhandled exception in update_ingredient_stock for ID %s: %s", ingredient_id, e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update ingredient stock")
+    if db_ingredient is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingredient not found")
+    return db_ingredient
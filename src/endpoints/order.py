@@ -1,29 +1,86 @@
-from fastapi import APIRouter, status, HTTPException, Depends
+from fastapi import APIRouter, status, HTTPException, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import json
 import logging
 
+from src.core.conditional import make_etag, not_modified_response, set_validators
 from src.core.dependencies import get_db_session
+from src.core.events import order_events
+from src.core.idempotency import get_idempotency_key
+from src.core.pagination import get_after_id, set_next_cursor_headers
+from src.core.responses import FastJSONResponse
 from src.database.schemes.order import *
 from src.services.order import OrderService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     prefix="/orders",
     tags=["Orders"]
 )
 
+SSE_KEEPALIVE_SECONDS = 15
+
 @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_order(
         order_in: OrderCreate,
+        idempotency_key: Optional[str] = Depends(get_idempotency_key),
         db: AsyncSession = Depends(get_db_session)
         ):
     try:
-        return await OrderService.create_order(db, order_in)
+        return await OrderService.create_order(db, order_in, idempotency_key)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
-        logging.error(f"Unhandled exception in create_new_order: {e}", exc_info=True)
+        logger.error("Unhandled exception in create_new_order: %s", e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create order")
 
+@router.post("/bulk", response_model=OrderBulkResponse)
+async def create_orders_bulk(
+        orders_in: OrderBulkCreate,
+        idempotency_key: Optional[str] = Depends(get_idempotency_key),
+        db: AsyncSession = Depends(get_db_session)
+        ):
+    try:
+        return await OrderService.create_orders_bulk(db, orders_in, idempotency_key)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except Exception as e:
+        logger.error("Unhandled exception in create_orders_bulk: %s", e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create orders")
+
+@router.patch("/status", response_model=OrderBatchStatusResponse)
+async def update_orders_status(
+        status_in: OrderBatchStatusUpdate,
+        db: AsyncSession = Depends(get_db_session)
+        ):
+    try:
+        return await OrderService.update_orders_status(db, status_in.order_ids, status_in.status)
+    except Exception as e:
+        logger.error("Unhandled exception in update_orders_status: %s", e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update order statuses")
+
+@router.patch("/{order_id}/status", response_model=OrderStatusResponse)
+async def update_order_status(
+        order_id: int,
+        status_in: OrderStatusUpdate,
+        db: AsyncSession = Depends(get_db_session)
+        ):
+    try:
+        updated_order = await OrderService.update_order_status(db, order_id, status_in)
+        if updated_order is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        return updated_order
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Unhandled exception in update_order_status for ID %s: %s", order_id, e, exc_info=True)
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update order status")
+
 @router.put("/{burger_id}", response_model=OrderResponse)
 async def update_existing_order(
         order_id: int,
@@ -38,26 +95,63 @@ async def update_existing_order(
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     except Exception as e:
-        logging.error(f"Unhandled exception in update_existing_order for ID {order_id}: {e}", exc_info=True)
+        logger.error("Unhandled exception in update_existing_order for ID %s: %s", order_id, e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update order")
 
+@router.get("/stream", name="stream_order_events")
+async def stream_order_events(request: Request):
+    """Server-Sent Events with order created/updated/status_changed/deleted deltas for the live order board"""
+    async def event_stream():
+        async with order_events.subscribe() as queue:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event['order'])}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @router.get("/{order_id}", response_model=OrderResponse)
 async def read_order(
         order_id: int,
+        request: Request,
+        response: Response,
         db: AsyncSession = Depends(get_db_session)
         ):
+    # the stamp is read before the order, so the response is never older than its ETag
+    stamp = await OrderService.get_order_stamp(db, order_id)
+    if stamp is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    burgers_updated_at = stamp.burgers_updated_at or []
+    etag = make_etag(stamp.updated_at, stamp.customer_updated_at, *burgers_updated_at)
+    last_modified = max(stamp.updated_at, stamp.customer_updated_at, *burgers_updated_at)
+    not_modified = not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
     db_order = await OrderService.get_order_by_id_with_total_price(db, order_id)
     if db_order is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+    set_validators(response, etag, last_modified)
     return db_order
 
-@router.get("/", response_model=List[OrderResponse])
+@router.get("/", response_model=List[OrderResponse], response_class=FastJSONResponse)
 async def read_all_orders(
+        request: Request,
         offset: int = 0,
         limit: int = 100,
+        after_id: Optional[int] = Depends(get_after_id),
         db: AsyncSession = Depends(get_db_session)
         ):
-    return await OrderService.get_all_orders(db, offset, limit)
+    orders = await OrderService.get_all_orders(db, offset, limit, after_id)
+    # returned directly: the dicts are encoded once by orjson instead of being re-validated against OrderResponse
+    response = FastJSONResponse(orders)
+    set_next_cursor_headers(request, response, orders, limit)
+    return response
 
 @router.delete("/{order_id}", response_model=OrderResponse)
 async def delete_existing_order(
@@ -70,5 +164,5 @@ async def delete_existing_order(
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
         return deleted_order
     except Exception as e:
-        logging.error(f"Unhandled exception in delete_existing_order for ID {order_id}: {e}", exc_info=True)
+        logger.error("Unhandled exception in delete_existing_order for ID %s: %s", order_id, e, exc_info=True)
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to delete order")
\ No newline at end of file
@@ -0,0 +1,27 @@
+from typing import Dict, Any
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.core.cache import menu_cache
+from src.core.metrics import render_metrics
+from src.database.database import get_pool_stats
+
+router = APIRouter(
+    tags=["System"]
+)
+
+@router.get("/system/pool")
+async def read_pool_stats() -> Dict[str, Any]:
+    return get_pool_stats()
+
+@router.get("/system/cache")
+async def read_cache_stats() -> Dict[str, Any]:
+    return menu_cache.stats()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics() -> str:
+    pool_stats = get_pool_stats()
+    cache_stats = menu_cache.stats()
+    gauges = {f"db_pool_{name}": value for name, value in pool_stats.items()}
+    gauges.update({f"menu_cache_{name}": value for name, value in cache_stats.items()})
+    return render_metrics(gauges)
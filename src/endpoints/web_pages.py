@@ -1,13 +1,17 @@
-from fastapi import APIRouter, Request, Depends, Form, HTTPException
+from fastapi import APIRouter, Request, Depends, Form, HTTPException, Query
 from fastapi import status as fastapi_status
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemLoader
 from pathlib import Path
 from typing import List, Optional
 import logging
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.dependencies import get_db_session
+from src.core.pagination import encode_cursor, get_after_id
+from src.core.static_assets import static_url
+from src.database.database import AsyncSessionLocal
 from src.services import customer as customer_service
 from src.services import burger as burger_service
 from src.services import order as order_service
@@ -15,9 +19,12 @@ from src.services.ingredient import IngredientService
 from src.database.schemes.order import OrderCreate, OrderUpdate, OrderBurgerItemCreate
 from src.database.schemes.customer import CustomerCreate, CustomerUpdate
 from src.database.schemes.burger import BurgerCreate, BurgerUpdate
-from src.database.models.order import OrderStatus
+from src.database.models.order import OrderStatus, allowed_previous_statuses
+from src.database.crud import burger as burger_crud
 from src.database.crud import order as order_crud
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter(
     tags=["Web Pages"],
     default_response_class=HTMLResponse
@@ -25,6 +32,13 @@ router = APIRouter(
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 templates = Jinja2Templates(directory=str(BASE_DIR / "templates"))
+# Async environment for pages rendered with generate_async() while their rows are still being fetched
+streaming_templates = Jinja2Templates(env=Environment(loader=FileSystemLoader(str(BASE_DIR / "templates")),
+                                                      autoescape=True, enable_async=True))
+templates.env.globals["static_url"] = static_url
+streaming_templates.env.globals["static_url"] = static_url
+
+ORDER_BOARD_PAGE_SIZE = 50
 
 
 # --- Home ---
@@ -74,7 +88,7 @@ async def create_customer_page(
             "error": str(e)
         }, status_code=400)
     except Exception as e:
-        logging.error(f"Error creating customer: {e}", exc_info=True)
+        logger.error("Error creating customer: %s", e, exc_info=True)
         return templates.TemplateResponse("customers/customer_form.html", {
             "request": request,
             "page_title": "New Customer",
@@ -132,7 +146,7 @@ async def update_customer_submit_page(
             "error": str(e)
         }, status_code=400)
     except Exception as e:
-        logging.error(f"Error updating customer {customer_id}: {e}", exc_info=True)
+        logger.error("Error updating customer %s: %s", customer_id, e, exc_info=True)
         current_form_data = {"id": customer_id, "name": name, "phone": phone}
         return templates.TemplateResponse("customers/customer_form.html", {
             "request": request,
@@ -152,7 +166,7 @@ async def delete_customer_submit_page(request: Request, customer_id: int, db: As
             raise HTTPException(status_code=fastapi_status.HTTP_404_NOT_FOUND, detail="Customer not found for deletion")
         return RedirectResponse(url=router.url_path_for("list_customers_page"), status_code=fastapi_status.HTTP_303_SEE_OTHER)
     except Exception as e:  # Catch potential ForeignKeyViolation or other DB issues if customer has orders.
-        logging.error(f"Error deleting customer {customer_id}: {e}", exc_info=True)
+        logger.error("Error deleting customer %s: %s", customer_id, e, exc_info=True)
         # Redirect with an error message. You might need a way to display these messages (e.g., query params, flash messages).
         return RedirectResponse(
             url=router.url_path_for("list_customers_page") + f"?error=delete_failed&customer_id={customer_id}",
@@ -162,7 +176,7 @@ async def delete_customer_submit_page(request: Request, customer_id: int, db: As
 # --- Burger Pages ---
 @router.get("/burgers", name="list_burgers_page")
 async def list_burgers_page(request: Request, db: AsyncSession = Depends(get_db_session)):
-    burgers = await burger_service.BurgerService.get_all_burgers(db)
+    burgers = await burger_service.BurgerService.get_menu_burgers(db)
     return templates.TemplateResponse("burgers/burger_list.html", {
         "request": request, "page_title": "Burgers", "burgers": burgers
     })
@@ -215,7 +229,7 @@ async def create_burger_page(
             "error": str(e)
         }, status_code=400)
     except Exception as e:
-        logging.error(f"Error creating burger: {e}", exc_info=True)
+        logger.error("Error creating burger: %s", e, exc_info=True)
         all_ingredients = await IngredientService.get_all_ingredients(db)
         return templates.TemplateResponse("burgers/burger_form.html", {
             "request": request,
@@ -295,7 +309,7 @@ async def update_burger_submit_page(
             "error": str(e)
         }, status_code=400)
     except Exception as e:  # Generic error
-        logging.error(f"Error updating burger {burger_id}: {e}", exc_info=True)
+        logger.error("Error updating burger %s: %s", burger_id, e, exc_info=True)
         all_ingredients = await IngredientService.get_all_ingredients(db)
         current_form_data = {"id": burger_id, "name": name, "description": description, "price": price}
         return templates.TemplateResponse("burgers/burger_form.html", {
@@ -315,7 +329,7 @@ async def delete_burger_submit_page(request: Request, burger_id: int, db: AsyncS
             raise HTTPException(status_code=fastapi_status.HTTP_404_NOT_FOUND, detail="Burger not found for deletion")
         return RedirectResponse(url=router.url_path_for("list_burgers_page"), status_code=fastapi_status.HTTP_303_SEE_OTHER)
     except Exception as e:
-        logging.error(f"Error deleting burger {burger_id}: {e}", exc_info=True)
+        logger.error("Error deleting burger %s: %s", burger_id, e, exc_info=True)
         # Redirect to list page, possibly with an error query parameter or flash message
         return RedirectResponse(url=router.url_path_for("list_burgers_page") + "?error=delete_failed",
                                 status_code=fastapi_status.HTTP_303_SEE_OTHER)
@@ -329,40 +343,85 @@ async def get_ingredient_item_htmx_route(
     ingredient = await IngredientService.get_ingredient_by_id(db, ingredient_id)
     if not ingredient:
         return HTMLResponse("<span>Ingredient not found</span>", status_code=404)
-    return templates.TemplateResponse("partials/burger_ingredient_item_htmx.html", {
+    return templates.TemplateResponse("partials/burger_ingredients_list.html", {
         "request": request, "ingredient": ingredient
     })
 
 
 # --- Order Pages ---
 
+ORDER_CUSTOMER_ERROR = "Please choose an existing customer: pick one from the search results or enter their phone number."
+
+
+async def _resolve_order_form_customer(db: AsyncSession, customer_id: Optional[str], customer_query: str):
+    """Customer picked in the order form. The typeahead fills the hidden customer_id, without JavaScript
+    the search field is resolved as an exact phone number. None when neither names an existing customer."""
+    if customer_id and customer_id.strip().isdigit():
+        return await customer_service.CustomerService.get_customer_by_id(db, int(customer_id))
+    if customer_query.strip():
+        return await customer_service.CustomerService.get_customer_by_phone(db, customer_query.strip())
+    return None
+
+
+async def _submitted_order_items_js(db: AsyncSession, item_burger_ids: List[int], item_quantities: List[int]) -> List[dict]:
+    """Submitted order lines in the shape order_form.js expects, to refill the form after an error"""
+    lines = list(zip(item_burger_ids, item_quantities))
+    # one query for every submitted burger, unknown IDs are left out
+    burger_ids = {burger_id for burger_id, _ in lines}
+    burgers = {row.id: row for row in await burger_crud.get_burgers_by_ids(db, burger_ids)} if burger_ids else {}
+    submitted_items_js = []
+    for burger_id, quantity in lines:
+        burger_row = burgers.get(burger_id)
+        if burger_row:
+            submitted_items_js.append(
+                {"burger_id": str(burger_id), "burger_name": burger_row.name, "quantity": quantity,
+                 "price": burger_row.price})
+    return submitted_items_js
+
+
 # LIST Orders
 @router.get("/orders", name="list_orders_page")
-async def list_orders_page(request: Request, db: AsyncSession = Depends(get_db_session)):
-    # The OrderService.get_all_orders already returns OrderResponse objects
-    # which include customer details and calculated total_price.
-    orders = await order_service.OrderService.get_all_orders(db)
-    return templates.TemplateResponse("orders/order_list.html", {
-        "request": request, "page_title": "Orders", "orders": orders
-    })
+async def list_orders_page(
+        request: Request,
+        limit: int = Query(ORDER_BOARD_PAGE_SIZE, ge=1, le=500),
+        after_id: Optional[int] = Depends(get_after_id)
+):
+    # Rows are rendered while the server-side cursor yields them, so the first byte doesn't wait for the
+    # whole page and memory stays bounded. The stream outlives the request dependencies, hence its own session.
+    async def render_orders_page():
+        async with AsyncSessionLocal() as db:
+            context = {
+                "request": request, "page_title": "Orders", "page_size": limit,
+                "orders": order_service.OrderService.stream_orders(db, limit, after_id),
+                "next_page_url": lambda last_id: request.url.include_query_params(
+                    after=encode_cursor(last_id), limit=limit)}
+            try:
+                async for chunk in streaming_templates.get_template("orders/order_list.html").generate_async(context):
+                    yield chunk
+            except Exception as e:
+                logger.error("Error streaming orders page: %s", e, exc_info=True)
+                yield '<p class="error">Failed to load all orders. Please refresh the page.</p>'
+
+    return StreamingResponse(render_orders_page(), media_type="text/html")
 
 
 # CREATE Order (Form Display)
 @router.get("/orders/new", name="new_order_form_page")
 async def new_order_form_page(request: Request, db: AsyncSession = Depends(get_db_session)):
-    customers = await customer_service.CustomerService.get_all_customers(db)
-    burgers = await burger_service.BurgerService.get_all_burgers(db)
+    # only checks that a customer exists, the form finds customers through the search typeahead
+    customers = await customer_service.CustomerService.get_all_customers(db, limit=1)
+    burgers = await burger_service.BurgerService.get_menu_burgers(db)
     if not customers:
         return templates.TemplateResponse("orders/order_form.html", {
             "request": request, "page_title": "New Order",
             "error": "No customers available. Please create a customer first.",
-            "customers": [], "burgers": burgers, "order_statuses": [s.value for s in OrderStatus],
+            "selected_customer": None, "burgers": burgers, "order_statuses": [s.value for s in OrderStatus],
             "order_data": {}, "is_edit_mode": False, "order_items_js": []
         })
     return templates.TemplateResponse("orders/order_form.html", {
         "request": request,
         "page_title": "New Order",
-        "customers": customers,
+        "selected_customer": None,
         "burgers": burgers,  # Pass available burgers
         "order_statuses": [s.value for s in OrderStatus],  # For status dropdown
         "order_data": {},
@@ -375,18 +434,31 @@ async def new_order_form_page(request: Request, db: AsyncSession = Depends(get_d
 @router.post("/orders/new", name="create_order_submit")
 async def create_order_submit_page(
         request: Request,
-        customer_id: int = Form(...),
+        customer_id: Optional[str] = Form(None),
+        customer_query: str = Form(""),
         item_burger_ids: List[int] = Form([]),
         item_quantities: List[int] = Form([]),
         status: str = Form(OrderStatus.Pending.value),  # Default status
         db: AsyncSession = Depends(get_db_session)
 ):
+    customer = await _resolve_order_form_customer(db, customer_id, customer_query)
+    if customer is None:
+        burgers = await burger_service.BurgerService.get_menu_burgers(db)
+        return templates.TemplateResponse("orders/order_form.html", {
+            "request": request, "page_title": "New Order", "selected_customer": None, "burgers": burgers,
+            "order_statuses": [s.value for s in OrderStatus],
+            "order_data": {"status": status},
+            "is_edit_mode": False, "order_items_js": [],
+            "error": ORDER_CUSTOMER_ERROR
+        }, status_code=400)
+    customer_id = customer.id
+
     order_burger_items_create: List[OrderBurgerItemCreate] = []
     if len(item_burger_ids) != len(item_quantities):
-        customers = await customer_service.CustomerService.get_all_customers(db)
-        burgers = await burger_service.BurgerService.get_all_burgers(db)
+        selected_customer = await customer_service.CustomerService.get_customer_by_id(db, customer_id)
+        burgers = await burger_service.BurgerService.get_menu_burgers(db)
         return templates.TemplateResponse("orders/order_form.html", {
-            "request": request, "page_title": "New Order", "customers": customers, "burgers": burgers,
+            "request": request, "page_title": "New Order", "selected_customer": selected_customer, "burgers": burgers,
             "order_statuses": [s.value for s in OrderStatus],
             "order_data": {"customer_id": customer_id, "status": status},
             "is_edit_mode": False, "order_items_js": [],
@@ -398,16 +470,29 @@ async def create_order_submit_page(
             order_burger_items_create.append(OrderBurgerItemCreate(burger_id=burger_id, quantity=quantity))
 
     if not order_burger_items_create:  # Check if any valid items were added
-        customers = await customer_service.CustomerService.get_all_customers(db)
-        burgers = await burger_service.BurgerService.get_all_burgers(db)
+        selected_customer = await customer_service.CustomerService.get_customer_by_id(db, customer_id)
+        burgers = await burger_service.BurgerService.get_menu_burgers(db)
         return templates.TemplateResponse("orders/order_form.html", {
-            "request": request, "page_title": "New Order", "customers": customers, "burgers": burgers,
+            "request": request, "page_title": "New Order", "selected_customer": selected_customer, "burgers": burgers,
             "order_statuses": [s.value for s in OrderStatus],
             "order_data": {"customer_id": customer_id, "status": status},
             "is_edit_mode": False, "order_items_js": [],
             "error": "An order must contain at least one burger."
         }, status_code=400)
 
+    # a new order starts Pending, it can only be moved on to a status reachable from there
+    if status != OrderStatus.Pending.value and OrderStatus.Pending not in allowed_previous_statuses(OrderStatus(status)):
+        selected_customer = await customer_service.CustomerService.get_customer_by_id(db, customer_id)
+        burgers = await burger_service.BurgerService.get_menu_burgers(db)
+        submitted_items_js = await _submitted_order_items_js(db, item_burger_ids, item_quantities)
+        return templates.TemplateResponse("orders/order_form.html", {
+            "request": request, "page_title": "New Order", "selected_customer": selected_customer, "burgers": burgers,
+            "order_statuses": [s.value for s in OrderStatus],
+            "order_data": {"customer_id": customer_id, "status": status},
+            "is_edit_mode": False, "order_items_js": submitted_items_js,
+            "error": f"A new order can't start as {status}."
+        }, status_code=400)
+
     order_in = OrderCreate(
         customer_id=customer_id,
         items=order_burger_items_create
@@ -423,30 +508,24 @@ async def create_order_submit_page(
 
         return RedirectResponse(url=router.url_path_for("list_orders_page"), status_code=fastapi_status.HTTP_303_SEE_OTHER)
     except ValueError as e:
-        customers = await customer_service.CustomerService.get_all_customers(db)
-        burgers = await burger_service.BurgerService.get_all_burgers(db)
+        selected_customer = await customer_service.CustomerService.get_customer_by_id(db, customer_id)
+        burgers = await burger_service.BurgerService.get_menu_burgers(db)
         # Reconstruct submitted items for display
-        submitted_items_js = []
-        for burger_id, quantity in zip(item_burger_ids, item_quantities):
-            burger_obj = await burger_service.BurgerService.get_burger_by_id(db, burger_id)
-            if burger_obj:
-                submitted_items_js.append(
-                    {"burger_id": str(burger_id), "burger_name": burger_obj.name, "quantity": quantity,
-                     "price": burger_obj.price})
+        submitted_items_js = await _submitted_order_items_js(db, item_burger_ids, item_quantities)
 
         return templates.TemplateResponse("orders/order_form.html", {
-            "request": request, "page_title": "New Order", "customers": customers, "burgers": burgers,
+            "request": request, "page_title": "New Order", "selected_customer": selected_customer, "burgers": burgers,
             "order_statuses": [s.value for s in OrderStatus],
             "order_data": {"customer_id": customer_id, "status": status},  # Pass back submitted data
             "is_edit_mode": False, "order_items_js": submitted_items_js,
             "error": str(e)
         }, status_code=400)
     except Exception as e:
-        logging.error(f"Error creating order: {e}", exc_info=True)
-        customers = await customer_service.CustomerService.get_all_customers(db)
-        burgers = await burger_service.BurgerService.get_all_burgers(db)
+        logger.error("Error creating order: %s", e, exc_info=True)
+        selected_customer = await customer_service.CustomerService.get_customer_by_id(db, customer_id)
+        burgers = await burger_service.BurgerService.get_menu_burgers(db)
         return templates.TemplateResponse("orders/order_form.html", {
-            "request": request, "page_title": "New Order", "customers": customers, "burgers": burgers,
+            "request": request, "page_title": "New Order", "selected_customer": selected_customer, "burgers": burgers,
             "order_statuses": [s.value for s in OrderStatus],
             "order_data": {"customer_id": customer_id, "status": status},
             "is_edit_mode": False, "order_items_js": [],
@@ -457,36 +536,33 @@ async def create_order_submit_page(
 # EDIT Order (Form Display)
 @router.get("/orders/{order_id}/edit", name="edit_order_form_page")
 async def edit_order_form_page(request: Request, order_id: int, db: AsyncSession = Depends(get_db_session)):
-    order_response = await order_service.OrderService.get_order_by_id_with_total_price(db, order_id)
-    if not order_response:
-        raise HTTPException(status_code=fastapi_status.HTTP_404_NOT_FOUND, detail="Order not found")
-
     order_db_obj = await order_crud.get_order_by_id(db, order_id)  # Use CRUD to get full model
+    if not order_db_obj:
+        raise HTTPException(status_code=fastapi_status.HTTP_404_NOT_FOUND, detail="Order not found")
 
-    customers = await customer_service.CustomerService.get_all_customers(db)
-    burgers = await burger_service.BurgerService.get_all_burgers(db)
+    burgers = await burger_service.BurgerService.get_menu_burgers(db)
 
     order_items_for_js = []
-    if order_db_obj and order_db_obj.burger_items:
+    if order_db_obj.burger_items:
         for item in order_db_obj.burger_items:
             if item.burger:
                 order_items_for_js.append({
                     "burger_id": str(item.burger_id),
                     "burger_name": item.burger.name,
                     "quantity": item.quantity,
-                    "price": item.burger.price  # For display in JS if needed
+                    "price": item.burger_price  # Price the line was ordered at
                 })
 
     order_data_for_form = {
-        "id": order_response.id,
-        "customer_id": order_response.customer.id if order_response.customer else None,
-        "status": order_response.status.value
+        "id": order_db_obj.id,
+        "customer_id": order_db_obj.customer_id,
+        "status": order_db_obj.status.value
     }
 
     return templates.TemplateResponse("orders/order_form.html", {
         "request": request,
-        "page_title": f"Edit Order #{order_response.id}",
-        "customers": customers,
+        "page_title": f"Edit Order #{order_db_obj.id}",
+        "selected_customer": order_db_obj.customer,
         "burgers": burgers,
         "order_statuses": [s.value for s in OrderStatus],
         "order_data": order_data_for_form,
@@ -500,12 +576,24 @@ async def edit_order_form_page(request: Request, order_id: int, db: AsyncSession
 async def update_order_submit_page(
         request: Request,
         order_id: int,
-        customer_id: int = Form(...),
+        customer_id: Optional[str] = Form(None),
+        customer_query: str = Form(""),
         item_burger_ids: List[int] = Form([]),
         item_quantities: List[int] = Form([]),
         status: str = Form(...),
         db: AsyncSession = Depends(get_db_session)
 ):
+    customer = await _resolve_order_form_customer(db, customer_id, customer_query)
+    if customer is None:
+        burgers = await burger_service.BurgerService.get_menu_burgers(db)
+        submitted_items_js = await _submitted_order_items_js(db, item_burger_ids, item_quantities)
+        return templates.TemplateResponse("orders/order_form.html", {
+            "request": request, "page_title": f"Edit Order #{order_id}", "selected_customer": None, "burgers": burgers,
+            "order_statuses": [s.value for s in OrderStatus], "order_data": {"id": order_id, "status": status},
+            "is_edit_mode": True, "order_items_js": submitted_items_js, "error": ORDER_CUSTOMER_ERROR
+        }, status_code=400)
+    customer_id = customer.id
+
     order_burger_items_update: List[OrderBurgerItemCreate] = []
     if len(item_burger_ids) != len(item_quantities):
         pass
@@ -529,30 +617,24 @@ async def update_order_submit_page(
             raise HTTPException(status_code=fastapi_status.HTTP_404_NOT_FOUND, detail="Order not found or update failed")
         return RedirectResponse(url=router.url_path_for("list_orders_page"), status_code=fastapi_status.HTTP_303_SEE_OTHER)
     except ValueError as e:
-        customers = await customer_service.CustomerService.get_all_customers(db)
-        burgers = await burger_service.BurgerService.get_all_burgers(db)
+        selected_customer = await customer_service.CustomerService.get_customer_by_id(db, customer_id)
+        burgers = await burger_service.BurgerService.get_menu_burgers(db)
         current_form_data = {"id": order_id, "customer_id": customer_id, "status": status}
         # Reconstruct submitted_items_js for display
-        submitted_items_js = []
-        for burger_id, quantity in zip(item_burger_ids, item_quantities):
-            burger_obj = await burger_service.BurgerService.get_burger_by_id(db, burger_id)
-            if burger_obj:
-                submitted_items_js.append(
-                    {"burger_id": str(burger_id), "burger_name": burger_obj.name, "quantity": quantity,
-                     "price": burger_obj.price})
+        submitted_items_js = await _submitted_order_items_js(db, item_burger_ids, item_quantities)
 
         return templates.TemplateResponse("orders/order_form.html", {
-            "request": request, "page_title": f"Edit Order #{order_id}", "customers": customers, "burgers": burgers,
+            "request": request, "page_title": f"Edit Order #{order_id}", "selected_customer": selected_customer, "burgers": burgers,
             "order_statuses": [s.value for s in OrderStatus], "order_data": current_form_data,
             "is_edit_mode": True, "order_items_js": submitted_items_js, "error": str(e)
         }, status_code=400)
     except Exception as e:
-        logging.error(f"Error updating order {order_id}: {e}", exc_info=True)
-        customers = await customer_service.CustomerService.get_all_customers(db)
-        burgers = await burger_service.BurgerService.get_all_burgers(db)
+        logger.error("Error updating order %s: %s", order_id, e, exc_info=True)
+        selected_customer = await customer_service.CustomerService.get_customer_by_id(db, customer_id)
+        burgers = await burger_service.BurgerService.get_menu_burgers(db)
         current_form_data = {"id": order_id, "customer_id": customer_id, "status": status}
         return templates.TemplateResponse("orders/order_form.html", {
-            "request": request, "page_title": f"Edit Order #{order_id}", "customers": customers, "burgers": burgers,
+            "request": request, "page_title": f"Edit Order #{order_id}", "selected_customer": selected_customer, "burgers": burgers,
             "order_statuses": [s.value for s in OrderStatus], "order_data": current_form_data,
             "is_edit_mode": True, "order_items_js": [], "error": "An unexpected error occurred."
         }, status_code=500)
@@ -567,7 +649,7 @@ async def delete_order_submit_page(request: Request, order_id: int, db: AsyncSes
             raise HTTPException(status_code=fastapi_status.HTTP_404_NOT_FOUND, detail="Order not found for deletion")
         return RedirectResponse(url=router.url_path_for("list_orders_page"), status_code=fastapi_status.HTTP_303_SEE_OTHER)
     except Exception as e:
-        logging.error(f"Error deleting order {order_id}: {e}", exc_info=True)
+        logger.error("Error deleting order %s: %s", order_id, e, exc_info=True)
         return RedirectResponse(
             url=router.url_path_for("list_orders_page") + f"?error=delete_failed&order_id={order_id}",
             status_code=fastapi_status.HTTP_303_SEE_OTHER)
\ No newline at end of file
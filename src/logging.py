@@ -1,7 +1,16 @@
 from uvicorn.config import LOG_LEVELS
 
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from enum import StrEnum
+from typing import Dict, Optional
 
 LOG_FORMAT_DEBUG = "%(levelname)s:%(message)s:%(pathname)s:%(funcName)s:%(lineno)d)"
 
@@ -11,15 +20,130 @@ class LogLevels(StrEnum):
     error = "ERROR"
     debug = "DEBUG"
 
-def configure_logging(log_level: str = LogLevels.error):
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "function": record.funcName,
+            "line": record.lineno}
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of DEBUG/INFO records for loggers matching a configured name prefix.
+    The longest matching prefix wins, WARNING and above always pass."""
+    def __init__(self, sample_rates: Dict[str, float]):
+        super().__init__()
+        self.sample_rates = sorted(sample_rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.sample_rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return random.random() < rate
+        return True
+
+class _DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that only merges the message arguments on the calling thread
+    and leaves the formatting (and exception rendering) to the listener thread"""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+def stop_queue_listener():
+    """Writes out the queued records and stops the listener started by configure_logging, if any"""
+    global _queue_listener
+    if _queue_listener is not None:
+        atexit.unregister(_queue_listener.stop)
+        _queue_listener.stop()
+        _queue_listener = None
+
+def _parse_mapping(value: Optional[str]) -> Dict[str, str]:
+    """Parses "name=value,other.name=value" into a dict"""
+    mapping: Dict[str, str] = {}
+    for part in (value or "").split(","):
+        if "=" in part:
+            name, item = part.split("=", 1)
+            mapping[name.strip()] = item.strip()
+    return mapping
+
+@dataclass(frozen=True)
+class LoggingSettings:
+    """Logging pipeline settings, loaded from LOG_* environment variables"""
+    log_level: str = LogLevels.info
+    use_queue: bool = False
+    json_format: bool = False
+    logger_levels: Dict[str, str] = field(default_factory=dict)
+    sample_rates: Dict[str, float] = field(default_factory=dict)
+
+    @classmethod
+    def from_env(cls, default_log_level: str = LogLevels.info) -> "LoggingSettings":
+        return cls(
+            log_level=os.getenv("LOG_LEVEL", default_log_level),
+            use_queue=os.getenv("LOG_QUEUE", "false").lower() in ("1", "true", "yes"),
+            json_format=os.getenv("LOG_JSON", "false").lower() in ("1", "true", "yes"),
+            logger_levels=_parse_mapping(os.getenv("LOG_LOGGER_LEVELS")),
+            sample_rates={name: float(rate) for name, rate in _parse_mapping(os.getenv("LOG_SAMPLE_RATES")).items()})
+
+def configure_logging(log_level: str = LogLevels.error, *,
+                      use_queue: bool = False,
+                      json_format: bool = False,
+                      logger_levels: Optional[Dict[str, str]] = None,
+                      sample_rates: Optional[Dict[str, float]] = None):
+    """Configures the root logger.
+
+    use_queue puts records on an in-memory queue drained by a QueueListener thread, so formatting
+    and stream writes happen off the event loop. logger_levels sets per-logger levels
+    (e.g. {"src.database.crud": "WARN"}), sample_rates keeps only a fraction of DEBUG/INFO
+    records of the matching loggers."""
+    global _queue_listener
+
     log_level = str(log_level).upper()
     log_levels = [level.value for level in LogLevels]
 
     if log_level not in log_levels:
-        logging.basicConfig(level=LOG_LEVELS["error"])
-        return
+        level, log_format = LOG_LEVELS["error"], None
+    elif log_level == LogLevels.debug:
+        level, log_format = LOG_LEVELS["debug"], LOG_FORMAT_DEBUG
+    else:
+        level, log_format = log_level, None
+
+    for logger_name, logger_level in (logger_levels or {}).items():
+        logging.getLogger(logger_name).setLevel(str(logger_level).upper())
 
-    if log_level == LogLevels.debug:
-        logging.basicConfig(level=LOG_LEVELS["debug"], format=LOG_FORMAT_DEBUG)
+    if not use_queue and not json_format and not sample_rates:
+        if log_format:
+            logging.basicConfig(level=level, format=log_format)
+        else:
+            logging.basicConfig(level=level)
         return
-    logging.basicConfig(level=log_level)
\ No newline at end of file
+
+    stream_handler = logging.StreamHandler()
+    if json_format:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(log_format or logging.BASIC_FORMAT))
+
+    root_handler: logging.Handler = stream_handler
+    if use_queue:
+        stop_queue_listener()
+        record_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        root_handler = _DeferredFormatQueueHandler(record_queue)
+        _queue_listener = logging.handlers.QueueListener(record_queue, stream_handler, respect_handler_level=True)
+        _queue_listener.start()
+        atexit.register(_queue_listener.stop)
+
+    if sample_rates:
+        root_handler.addFilter(SamplingFilter(sample_rates))
+
+    logging.basicConfig(level=level, handlers=[root_handler], force=True)
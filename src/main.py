@@ -1,25 +1,81 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.templating import Jinja2Templates
 from pathlib import Path
 
-from .logging import configure_logging, LogLevels
+from .logging import configure_logging, LogLevels, LoggingSettings
+from src.core.compression import CompressionMiddleware
+from src.core.metrics import RequestStats, current_request_stats, observe_request
+from src.core.cache_listener import cache_listener, CACHE_LISTENER_ENABLED
+from src.core.analytics_job import analytics_job, ANALYTICS_ROLLUP_ENABLED
+from src.core.idempotency import idempotency_cleanup_job, IDEMPOTENCY_CLEANUP_ENABLED
+from src.core.static_assets import static_files, static_url
 from src.endpoints.customer import router as customer_router
 from src.endpoints.burger import router as burger_router
 from src.endpoints.order import router as order_router
 from src.endpoints.ingredient import router as ingredient_router
 from src.endpoints.web_pages import router as web_pages_router
+from src.endpoints.system import router as system_router
+from src.endpoints.analytics import router as analytics_router
 
-configure_logging(LogLevels.info)
+logging_settings = LoggingSettings.from_env(LogLevels.info)
+configure_logging(logging_settings.log_level,
+                  use_queue=logging_settings.use_queue,
+                  json_format=logging_settings.json_format,
+                  logger_levels=logging_settings.logger_levels,
+                  sample_rates=logging_settings.sample_rates)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    static_files.build()
+    if CACHE_LISTENER_ENABLED:
+        await cache_listener.start()
+    if ANALYTICS_ROLLUP_ENABLED:
+        await analytics_job.start()
+    if IDEMPOTENCY_CLEANUP_ENABLED:
+        await idempotency_cleanup_job.start()
+    yield
+    await idempotency_cleanup_job.stop()
+    await analytics_job.stop()
+    await cache_listener.stop()
 
-app.mount("/static", StaticFiles(directory=Path(__file__).parent / "static"), name="static")
+app = FastAPI(lifespan=lifespan)
+# added before the metrics middleware so it runs inside it: the http middleware re-streams every body,
+# wrapped by it the compression couldn't see a response's size and would compress the small ones too
+app.add_middleware(CompressionMiddleware)
+
+def _route_label(request: Request) -> str:
+    """Route template (e.g. /orders/{order_id}) so metrics don't get a series per id"""
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    return request.scope.get("root_path") or "unmatched"
+
+@app.middleware("http")
+async def collect_request_metrics(request: Request, call_next):
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["Server-Timing"] = stats.server_timing(time.perf_counter() - started)
+        return response
+    finally:
+        current_request_stats.reset(token)
+        observe_request(request.method, _route_label(request), status_code, time.perf_counter() - started, stats)
+
+app.mount("/static", static_files, name="static")
 
 templates = Jinja2Templates(directory=Path(__file__).parent / "templates")
+templates.env.globals["static_url"] = static_url
 
 app.include_router(web_pages_router)
 app.include_router(customer_router)
 app.include_router(burger_router)
 app.include_router(order_router)
-app.include_router(ingredient_router)
\ No newline at end of file
+app.include_router(ingredient_router)
+app.include_router(system_router)
+app.include_router(analytics_router)
\ No newline at end of file
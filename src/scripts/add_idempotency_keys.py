@@ -0,0 +1,12 @@
+import asyncio
+
+from src.database.database import Base, engine
+from src.database.models.idempotency_key import IdempotencyKey
+
+async def main():
+    """Creates the idempotency_keys table on a database created before it existed. Safe to run again."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[IdempotencyKey.__table__])
+
+if __name__ == "__main__":
+    asyncio.run(main())
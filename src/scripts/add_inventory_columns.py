@@ -0,0 +1,22 @@
+import asyncio
+from sqlalchemy import text
+
+from src.database.database import engine
+
+INVENTORY_COLUMNS = [
+    "ALTER TABLE ingredients ADD COLUMN IF NOT EXISTS stock_quantity INTEGER",
+    """DO $$ BEGIN
+           ALTER TABLE ingredients ADD CONSTRAINT ck_ingredients_stock_quantity_non_negative CHECK (stock_quantity >= 0);
+       EXCEPTION WHEN duplicate_object THEN NULL;
+       END $$""",
+    "ALTER TABLE burgers ADD COLUMN IF NOT EXISTS is_available BOOLEAN NOT NULL DEFAULT true"]
+
+async def main():
+    """Adds the stock tracking columns to a database created before inventory existed.
+    Existing ingredients start untracked (NULL stock), so every burger stays available."""
+    async with engine.begin() as conn:
+        for statement in INVENTORY_COLUMNS:
+            await conn.execute(text(statement))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,17 @@
+import asyncio
+from sqlalchemy import text
+
+from src.database.database import engine
+
+UPDATED_AT_TABLES = ["burgers", "ingredients", "customers", "orders"]
+
+async def main():
+    """Adds the updated_at columns the ETags are derived from to a database created before they existed.
+    Existing rows are stamped with the migration time. Safe to run again."""
+    async with engine.begin() as conn:
+        for table in UPDATED_AT_TABLES:
+            await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at "
+                                    "TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()"))
+
+if __name__ == "__main__":
+    asyncio.run(main())
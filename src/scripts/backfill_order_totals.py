@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import sys
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+ADD_COLUMNS = [
+    "ALTER TABLE order_burger_items ADD COLUMN IF NOT EXISTS unit_price DOUBLE PRECISION",
+    "ALTER TABLE orders ADD COLUMN IF NOT EXISTS total_price DOUBLE PRECISION NOT NULL DEFAULT 0"]
+
+NEXT_BATCH_UPPER_ID = text("""
+    SELECT max(id) FROM (SELECT id FROM orders WHERE id > :last_id ORDER BY id LIMIT :batch_size) AS batch""")
+
+BACKFILL_UNIT_PRICES = text("""
+    UPDATE order_burger_items AS item
+    SET unit_price = burger.price
+    FROM burgers AS burger
+    WHERE burger.id = item.burger_id
+      AND item.unit_price IS NULL
+      AND item.order_id > :last_id AND item.order_id <= :upper_id""")
+
+BACKFILL_TOTALS = text("""
+    UPDATE orders
+    SET total_price = lines.total
+    FROM (SELECT order_id, sum(unit_price * quantity) AS total
+          FROM order_burger_items
+          WHERE order_id > :last_id AND order_id <= :upper_id
+          GROUP BY order_id) AS lines
+    WHERE orders.id = lines.order_id""")
+
+async def backfill_order_totals(db: AsyncSession, batch_size: int = BATCH_SIZE) -> int:
+    """Adds the unit_price and total_price columns if missing and fills them for existing orders,
+    committing after every batch of orders so locks stay short.
+
+    Historical prices aren't known, lines without a unit price get the current burger price."""
+    for statement in ADD_COLUMNS:
+        await db.execute(text(statement))
+    await db.commit()
+
+    last_id, backfilled = 0, 0
+    while True:
+        upper_id = (await db.execute(NEXT_BATCH_UPPER_ID, {"last_id": last_id, "batch_size": batch_size})).scalar()
+        if upper_id is None:
+            break
+        try:
+            params = {"last_id": last_id, "upper_id": upper_id}
+            await db.execute(BACKFILL_UNIT_PRICES, params)
+            result = await db.execute(BACKFILL_TOTALS, params)
+            await db.commit()
+        except Exception as e:
+            await db.rollback()
+            logger.error("Failed to backfill orders %s..%s: %s.", last_id + 1, upper_id, e)
+            raise
+        backfilled += result.rowcount
+        logger.info("Backfilled totals of orders up to id %s (%s so far).", upper_id, backfilled)
+        last_id = upper_id
+
+    await db.execute(text("ALTER TABLE order_burger_items ALTER COLUMN unit_price SET NOT NULL"))
+    await db.commit()
+    return backfilled
+
+async def run_script():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else BATCH_SIZE
+    async with AsyncSessionLocal() as session:
+        backfilled = await backfill_order_totals(db=session, batch_size=batch_size)
+    logger.info("Backfilled totals of %s orders.", backfilled)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_script())
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import sys
+import time
+import uuid
+from sqlalchemy import text
+
+from src.database.database import AsyncSessionLocal
+from src.database.schemes.order import OrderBulkCreate, OrderBurgerItemCreate, OrderCreate
+from src.services.order import OrderService
+from src.scripts.benchmarking import format_table
+
+logger = logging.getLogger(__name__)
+
+ORDERS = 1000
+BATCH_SIZES = (10, 100, 1000)
+
+CREATE_CUSTOMER = text("INSERT INTO customers (name, phone) VALUES ('Benchmark', :phone) RETURNING id")
+CREATE_BURGERS = text("""
+    INSERT INTO burgers (name, price, is_available)
+    SELECT :prefix || n, 5.0, true FROM generate_series(1, 3) AS n
+    RETURNING id""")
+DELETE_CUSTOMER = text("DELETE FROM customers WHERE id = :customer_id")
+DELETE_BURGERS = text("DELETE FROM burgers WHERE id = ANY(CAST(:burger_ids AS integer[]))")
+
+async def _create_one_by_one(orders):
+    async with AsyncSessionLocal() as db:
+        for order_in in orders:
+            await OrderService.create_order(db, order_in)
+
+async def _create_in_batches(orders, batch_size: int):
+    async with AsyncSessionLocal() as db:
+        for start in range(0, len(orders), batch_size):
+            result = await OrderService.create_orders_bulk(db, OrderBulkCreate(orders=orders[start:start + batch_size]))
+            if result.errors:
+                raise ValueError(f"Bulk create failed: {result.errors[0].detail}")
+
+async def benchmark_bulk_orders(count: int = ORDERS, batch_sizes=BATCH_SIZES) -> str:
+    """Orders per second for `count` three-line orders created one by one and through the bulk endpoint's service"""
+    async with AsyncSessionLocal() as db:
+        customer_id = (await db.execute(CREATE_CUSTOMER, {"phone": f"bench-{uuid.uuid4().hex[:20]}"})).scalar_one()
+        burger_ids = list((await db.execute(CREATE_BURGERS,
+                                            {"prefix": f"bench-bulk-{uuid.uuid4().hex[:8]}-"})).scalars())
+        await db.commit()
+    orders = [OrderCreate(customer_id=customer_id,
+                          items=[OrderBurgerItemCreate(burger_id=burger_id, quantity=index % 3 + 1)
+                                 for burger_id in burger_ids])
+              for index in range(count)]
+
+    runs = [("one by one", lambda: _create_one_by_one(orders))]
+    runs += [(f"bulk x{size}", lambda size=size: _create_in_batches(orders, size)) for size in batch_sizes]
+    rows = []
+    try:
+        for label, run in runs:
+            started = time.perf_counter()
+            await run()
+            elapsed = time.perf_counter() - started
+            rows.append((label, elapsed * 1000, count / elapsed))
+            logger.info("%s: %s orders in %.2f s, %.0f orders/s.", label, count, elapsed, count / elapsed)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(DELETE_CUSTOMER, {"customer_id": customer_id})
+            await db.execute(DELETE_BURGERS, {"burger_ids": burger_ids})
+            await db.commit()
+    return format_table(("mode", "total ms", "orders/s"), rows)
+
+async def run_script():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ORDERS
+    # the services log every order, keep that out of the timings
+    logging.getLogger("src").setLevel(logging.WARNING)
+    report = await benchmark_bulk_orders(count)
+    logger.info("Order create throughput, %s orders of 3 lines:\n%s", count, report)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_script())
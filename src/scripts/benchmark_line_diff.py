@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import sys
+import time
+import uuid
+from types import SimpleNamespace
+from sqlalchemy import delete, event, text
+
+from src.database.crud.line_items import sync_line_items
+from src.database.database import AsyncSessionLocal, engine
+from src.database.models.order_burger_item import OrderBurgerItem
+from src.scripts.benchmarking import format_table
+
+logger = logging.getLogger(__name__)
+
+LINES = 20
+ROUNDS = 50
+
+CREATE_CUSTOMER = text("INSERT INTO customers (name, phone) VALUES ('Benchmark', :phone) RETURNING id")
+CREATE_BURGERS = text("""
+    INSERT INTO burgers (name, price, is_available)
+    SELECT :prefix || n, 5.0, true FROM generate_series(1, :count) AS n
+    RETURNING id""")
+CREATE_ORDER = text("""
+    WITH new_order AS (
+        INSERT INTO orders (customer_id, status, total_price)
+        VALUES (:customer_id, 'Pending', 5.0 * cardinality(CAST(:burger_ids AS integer[])))
+        RETURNING id),
+    new_items AS (
+        INSERT INTO order_burger_items (order_id, burger_id, quantity, unit_price)
+        SELECT new_order.id, burger_id, 1, 5.0
+        FROM new_order CROSS JOIN unnest(CAST(:burger_ids AS integer[])) AS burger_id)
+    SELECT id FROM new_order""")
+# rows written to the lines table by the current transaction so far, and the WAL position
+WRITE_STATS = text("""
+    SELECT n_tup_ins, n_tup_upd, n_tup_del, pg_current_wal_insert_lsn() AS wal_lsn
+    FROM pg_stat_xact_user_tables WHERE relname = 'order_burger_items'""")
+WAL_LSN = text("SELECT pg_current_wal_insert_lsn()")
+WAL_BYTES = text("SELECT pg_wal_lsn_diff(:after, :before)")
+DELETE_CUSTOMER = text("DELETE FROM customers WHERE id = :customer_id")
+DELETE_BURGERS = text("DELETE FROM burgers WHERE id = ANY(CAST(:burger_ids AS integer[]))")
+
+async def _diff(db, order_id: int, existing, wanted) -> None:
+    await sync_line_items(db, OrderBurgerItem, OrderBurgerItem.order_id, OrderBurgerItem.burger_id, order_id,
+                          existing=existing, wanted=wanted,
+                          insert_values={burger_id: {"unit_price": 5.0} for burger_id in wanted})
+
+async def _delete_and_reinsert(db, order_id: int, existing, wanted) -> None:
+    """What update_order did before the lines were diffed"""
+    await db.execute(delete(OrderBurgerItem).where(OrderBurgerItem.order_id == order_id))
+    db.add_all([OrderBurgerItem(order_id=order_id, burger_id=burger_id, quantity=quantity, unit_price=5.0)
+                for burger_id, quantity in wanted.items()])
+    await db.flush()
+
+async def _measure(write, order_id: int, burger_ids, rounds: int) -> tuple:
+    """Average statements, line rows inserted/updated/deleted, WAL bytes and ms of a transaction that
+    changes the quantity of one line of the order"""
+    counter = SimpleNamespace(statements=0)
+
+    def count(*args) -> None:
+        counter.statements += 1
+
+    totals = [0] * 6
+    quantities = {burger_id: 1 for burger_id in burger_ids}
+    for round_number in range(rounds):
+        wanted = {**quantities, burger_ids[0]: round_number % 5 + 2}
+        async with AsyncSessionLocal() as db:
+            before = (await db.execute(WRITE_STATS)).one()
+            counter.statements = 0
+            started = time.perf_counter()
+            event.listen(engine.sync_engine, "before_cursor_execute", count)
+            try:
+                await write(db, order_id, quantities, wanted)
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", count)
+            after = (await db.execute(WRITE_STATS)).one()
+            await db.commit()
+            elapsed = time.perf_counter() - started
+            committed_lsn = (await db.execute(WAL_LSN)).scalar_one()
+            wal_bytes = (await db.execute(WAL_BYTES, {"after": committed_lsn, "before": before.wal_lsn})).scalar_one()
+        quantities = wanted
+        for index, value in enumerate((counter.statements,
+                                       after.n_tup_ins - before.n_tup_ins,
+                                       after.n_tup_upd - before.n_tup_upd,
+                                       after.n_tup_del - before.n_tup_del,
+                                       int(wal_bytes),
+                                       elapsed * 1000)):
+            totals[index] += value
+    return tuple(total / rounds for total in totals)
+
+async def benchmark_line_diff(lines: int = LINES, rounds: int = ROUNDS) -> str:
+    """Write amplification of changing one quantity of a `lines`-line order"""
+    async with AsyncSessionLocal() as db:
+        customer_id = (await db.execute(CREATE_CUSTOMER, {"phone": f"bench-{uuid.uuid4().hex[:20]}"})).scalar_one()
+        burger_ids = list((await db.execute(CREATE_BURGERS, {"prefix": f"bench-lines-{uuid.uuid4().hex[:8]}-",
+                                                             "count": lines})).scalars())
+        order_id = (await db.execute(CREATE_ORDER, {"customer_id": customer_id,
+                                                    "burger_ids": burger_ids})).scalar_one()
+        await db.commit()
+
+    rows = []
+    try:
+        for label, write in (("delete + reinsert (old)", _delete_and_reinsert), ("diff", _diff)):
+            statements, inserted, updated, deleted, wal_bytes, ms = await _measure(write, order_id, burger_ids, rounds)
+            rows.append((label, statements, inserted, updated, deleted, wal_bytes, ms))
+            logger.info("%s: %.1f statements, %.1f/%.1f/%.1f rows ins/upd/del, %.0f WAL bytes, %.2f ms.",
+                        label, statements, inserted, updated, deleted, wal_bytes, ms)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(DELETE_CUSTOMER, {"customer_id": customer_id})
+            await db.execute(DELETE_BURGERS, {"burger_ids": burger_ids})
+            await db.commit()
+    return format_table(("mode", "statements", "rows ins", "rows upd", "rows del", "WAL bytes", "ms"), rows)
+
+async def run_script():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else LINES
+    report = await benchmark_line_diff(lines)
+    logger.info("Changing one quantity of a %s-line order, average of %s transactions:\n%s", lines, ROUNDS, report)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_script())
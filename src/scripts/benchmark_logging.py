@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from src import logging as app_logging
+from src.scripts.benchmarking import format_table
+
+logger = logging.getLogger(__name__)
+
+RECORDS = 100_000
+# seconds every write to the slow sink blocks for, like stderr piped to a collector that falls behind
+SLOW_WRITE = 0.0001
+BENCH_LOGGER = "src.services.benchmark"
+# (label, configure_logging options)
+MODES = (
+    ("basicConfig", {}),
+    ("json", {"json_format": True}),
+    ("queue", {"use_queue": True}),
+    ("queue + json", {"use_queue": True, "json_format": True}),
+    ("queue + sampled 10%", {"use_queue": True, "sample_rates": {BENCH_LOGGER: 0.1}}),
+)
+
+class _SlowSink:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, data: str) -> int:
+        time.sleep(SLOW_WRITE)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+@contextmanager
+def _logging_to(path: str, options: dict, slow: bool):
+    """Root logging configured by configure_logging with `options`, writing to the file at `path`,
+    through _SlowSink when `slow`. Restores the previous handlers and stops the queue listener afterwards."""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    root.handlers.clear()
+    stderr = sys.stderr
+    with open(path, "w") as sink:
+        # StreamHandler picks sys.stderr up when it's created
+        sys.stderr = _SlowSink(sink) if slow else sink
+        try:
+            app_logging.configure_logging(app_logging.LogLevels.info, **options)
+        finally:
+            sys.stderr = stderr
+        try:
+            yield
+        finally:
+            app_logging.stop_queue_listener()
+            root.handlers[:] = handlers
+            root.setLevel(level)
+
+def _emit(records: int) -> None:
+    bench_logger = logging.getLogger(BENCH_LOGGER)
+    for index in range(records):
+        bench_logger.info("Created order %s for customer %s, total %s.", index, index % 97, index * 1.5)
+
+def benchmark_logging(records: int = RECORDS, slow: bool = False) -> str:
+    """Time the emitting thread spends per record in each mode, and the time until the records are written"""
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.log")
+        for label, options in MODES:
+            with _logging_to(path, options, slow):
+                started = time.perf_counter()
+                _emit(records)
+                emitted = time.perf_counter() - started
+                # returns once the listener has written every queued record
+                app_logging.stop_queue_listener()
+                written = time.perf_counter() - started
+            lines = sum(1 for _ in open(path))
+            rows.append((label, emitted / records * 1e6, records / emitted, written * 1000, lines))
+            logger.info("%s: %.2f us per record on the caller, all written after %.0f ms.",
+                        label, emitted / records * 1e6, written * 1000)
+    return format_table(("mode", "caller us/record", "caller records/s", "written ms", "lines"), rows)
+
+async def run_script():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else RECORDS
+    report = benchmark_logging(records)
+    logger.info("Logging cost of %s INFO records written to a file:\n%s", records, report)
+    # a tenth of the records, every write blocks
+    report = benchmark_logging(records // 10, slow=True)
+    logger.info("Logging cost of %s INFO records written to a sink blocking %.1f ms per write:\n%s",
+                records // 10, SLOW_WRITE * 1000, report)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_script())
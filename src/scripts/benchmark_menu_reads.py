@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import sys
+import uuid
+from typing import List
+from sqlalchemy import select, text
+from sqlalchemy.orm import selectinload
+
+from src.database.crud import burger as crud_burger
+from src.database.database import AsyncSessionLocal
+from src.database.models import Burger, BurgerIngredientItem
+from src.database.schemes.burger import BurgerResponse
+from src.scripts.benchmarking import format_table, median_ms
+
+logger = logging.getLogger(__name__)
+
+MENU_SIZE = 10
+HISTORY_STEPS = (0, 1000, 5000, 20000)
+
+CREATE_CUSTOMER = text("INSERT INTO customers (name, phone) VALUES ('Benchmark', :phone) RETURNING id")
+CREATE_BURGERS = text("""
+    INSERT INTO burgers (name, price, is_available)
+    SELECT :prefix || n, 5.0, true FROM generate_series(1, :count) AS n
+    RETURNING id""")
+ADD_RECIPES = text("""
+    INSERT INTO burger_ingredient_items (burger_id, ingredient_id, quantity)
+    SELECT burger_id, ingredient_id, 1
+    FROM unnest(CAST(:burger_ids AS integer[])) AS burger_id
+    CROSS JOIN (SELECT id AS ingredient_id FROM ingredients ORDER BY id LIMIT 3) AS recipe""")
+# every order has one line of each benchmark burger
+ADD_ORDERS = text("""
+    WITH new_orders AS (
+        INSERT INTO orders (customer_id, status, total_price)
+        SELECT :customer_id, 'Pending', 5.0 * cardinality(CAST(:burger_ids AS integer[]))
+        FROM generate_series(1, :count)
+        RETURNING id)
+    INSERT INTO order_burger_items (order_id, burger_id, quantity, unit_price)
+    SELECT new_orders.id, burger_id, 1, 5.0
+    FROM new_orders CROSS JOIN unnest(CAST(:burger_ids AS integer[])) AS burger_id""")
+DELETE_CUSTOMER = text("DELETE FROM customers WHERE id = :customer_id")
+DELETE_BURGERS = text("DELETE FROM burgers WHERE id = ANY(CAST(:burger_ids AS integer[]))")
+
+async def _read_menu() -> None:
+    """The projection the menu endpoints and pages read"""
+    async with AsyncSessionLocal() as db:
+        await crud_burger.get_menu_burgers(db)
+
+def _eager_reader(burger_ids: List[int]):
+    async def read_eager() -> None:
+        """The benchmark burgers the way every burger read loaded them while Burger.order_items was
+        lazy="selectin": with all their order lines"""
+        query = (select(Burger)
+                 .where(Burger.id.in_(burger_ids))
+                 .options(selectinload(Burger.order_items),
+                          selectinload(Burger.ingredient_items).selectinload(BurgerIngredientItem.ingredient)))
+        async with AsyncSessionLocal() as db:
+            burgers = (await db.execute(query)).scalars().all()
+            [BurgerResponse.model_validate(burger) for burger in burgers]
+    return read_eager
+
+async def benchmark_menu_reads(history_steps=HISTORY_STEPS, repeat: int = 5) -> str:
+    """Times the menu read and the old eager read while the order history of the menu grows"""
+    async with AsyncSessionLocal() as db:
+        customer_id = (await db.execute(CREATE_CUSTOMER, {"phone": f"bench-{uuid.uuid4().hex[:20]}"})).scalar_one()
+        burger_ids = list((await db.execute(CREATE_BURGERS, {"prefix": f"bench-menu-{uuid.uuid4().hex[:8]}-",
+                                                             "count": MENU_SIZE})).scalars())
+        await db.execute(ADD_RECIPES, {"burger_ids": burger_ids})
+        await db.commit()
+
+        rows = []
+        orders = 0
+        try:
+            for step in history_steps:
+                if step > orders:
+                    await db.execute(ADD_ORDERS, {"customer_id": customer_id, "burger_ids": burger_ids,
+                                                  "count": step - orders})
+                    await db.commit()
+                    await db.execute(text("ANALYZE order_burger_items"))
+                    orders = step
+                menu = await median_ms(_read_menu, repeat)
+                eager = await median_ms(_eager_reader(burger_ids), repeat)
+                rows.append((orders * MENU_SIZE, menu, eager))
+                logger.info("Order lines %s: menu %.2f ms, eager %.2f ms.", orders * MENU_SIZE, menu, eager)
+        finally:
+            await db.rollback()
+            await db.execute(DELETE_CUSTOMER, {"customer_id": customer_id})
+            await db.execute(DELETE_BURGERS, {"burger_ids": burger_ids})
+            await db.commit()
+    return format_table(("order lines", "menu ms", "eager (old) ms"), rows)
+
+async def run_script():
+    steps = tuple(int(step) for step in sys.argv[1:]) or HISTORY_STEPS
+    report = await benchmark_menu_reads(steps)
+    logger.info("Menu read latency by order history size (%s burgers, median of 5):\n%s", MENU_SIZE, report)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_script())
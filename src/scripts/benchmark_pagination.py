@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import sys
+import uuid
+from typing import Tuple
+from sqlalchemy import text
+
+from src.database.crud import order as crud_order
+from src.database.database import AsyncSessionLocal
+from src.scripts.benchmarking import format_table, median_ms
+
+logger = logging.getLogger(__name__)
+
+ORDERS = 120_000
+PAGE_SIZE = 100
+PAGES = (1, 10, 100, 1000)
+
+CREATE_CUSTOMER = text("INSERT INTO customers (name, phone) VALUES ('Benchmark', :phone) RETURNING id")
+CREATE_BURGERS = text("""
+    INSERT INTO burgers (name, price, is_available)
+    SELECT :prefix || n, 5.0, true FROM generate_series(1, 2) AS n
+    RETURNING id""")
+# two lines per order, like the summaries the orders list pages through
+ADD_ORDERS = text("""
+    WITH new_orders AS (
+        INSERT INTO orders (customer_id, status, total_price)
+        SELECT :customer_id, 'Pending', 10.0 FROM generate_series(1, :count)
+        RETURNING id)
+    INSERT INTO order_burger_items (order_id, burger_id, quantity, unit_price)
+    SELECT new_orders.id, burger_id, 1, 5.0
+    FROM new_orders CROSS JOIN unnest(CAST(:burger_ids AS integer[])) AS burger_id""")
+# the id a client following next links holds when it asks for the page
+LAST_ID_BEFORE = text("SELECT id FROM orders ORDER BY id OFFSET :offset - 1 LIMIT 1")
+DELETE_CUSTOMER = text("DELETE FROM customers WHERE id = :customer_id")
+DELETE_BURGERS = text("DELETE FROM burgers WHERE id = ANY(CAST(:burger_ids AS integer[]))")
+
+def _page_reader(offset: int, after_id):
+    async def read_page() -> None:
+        async with AsyncSessionLocal() as db:
+            await crud_order.get_all_orders_summary(db, offset=offset, limit=PAGE_SIZE, after_id=after_id)
+    return read_page
+
+async def benchmark_pagination(orders: int = ORDERS, pages=PAGES, repeat: int = 5) -> Tuple[int, str]:
+    """Times each page of the order summaries with offset pagination and with the after_id keyset"""
+    async with AsyncSessionLocal() as db:
+        customer_id = (await db.execute(CREATE_CUSTOMER, {"phone": f"bench-{uuid.uuid4().hex[:20]}"})).scalar_one()
+        burger_ids = list((await db.execute(CREATE_BURGERS,
+                                            {"prefix": f"bench-pages-{uuid.uuid4().hex[:8]}-"})).scalars())
+        await db.execute(ADD_ORDERS, {"customer_id": customer_id, "burger_ids": burger_ids, "count": orders})
+        await db.commit()
+        await db.execute(text("ANALYZE orders"))
+        await db.execute(text("ANALYZE order_burger_items"))
+        total = (await db.execute(text("SELECT count(*) FROM orders"))).scalar_one()
+
+        rows = []
+        try:
+            for page in pages:
+                offset = (page - 1) * PAGE_SIZE
+                if offset >= total:
+                    logger.warning("Page %s is past the %s orders, skipped.", page, total)
+                    continue
+                after_id = (await db.execute(LAST_ID_BEFORE, {"offset": offset})).scalar_one() if offset else None
+                by_offset = await median_ms(_page_reader(offset, None), repeat)
+                by_keyset = await median_ms(_page_reader(0, after_id), repeat)
+                rows.append((page, offset, by_offset, by_keyset))
+                logger.info("Page %s: offset %.2f ms, keyset %.2f ms.", page, by_offset, by_keyset)
+        finally:
+            await db.rollback()
+            await db.execute(DELETE_CUSTOMER, {"customer_id": customer_id})
+            await db.execute(DELETE_BURGERS, {"burger_ids": burger_ids})
+            await db.commit()
+    return total, format_table(("page", "offset", "offset ms", "after_id ms"), rows)
+
+async def run_script():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else ORDERS
+    total, report = await benchmark_pagination(orders)
+    logger.info("Order summary page latency, %s orders, %s per page (median of 5):\n%s", total, PAGE_SIZE, report)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_script())
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import sys
+import uuid
+from typing import List
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import text
+
+from src.core.responses import FastJSONResponse
+from src.database.crud import order as crud_order
+from src.database.database import AsyncSessionLocal
+from src.database.schemes.customer import CustomerResponse
+from src.database.schemes.order import OrderResponse
+from src.services.order import OrderService
+from src.scripts.benchmarking import format_table, median_ms
+
+logger = logging.getLogger(__name__)
+
+ORDERS = 1000
+
+CREATE_CUSTOMER = text("INSERT INTO customers (name, phone) VALUES ('Benchmark', :phone) RETURNING id")
+CREATE_BURGERS = text("""
+    INSERT INTO burgers (name, price, is_available)
+    SELECT :prefix || n, 5.0, true FROM generate_series(1, 3) AS n
+    RETURNING id""")
+# every order has one line of each benchmark burger
+ADD_ORDERS = text("""
+    WITH new_orders AS (
+        INSERT INTO orders (customer_id, status, total_price)
+        SELECT :customer_id, 'Pending', 15.0
+        FROM generate_series(1, :count)
+        RETURNING id)
+    INSERT INTO order_burger_items (order_id, burger_id, quantity, unit_price)
+    SELECT new_orders.id, burger_id, 1, 5.0
+    FROM new_orders CROSS JOIN unnest(CAST(:burger_ids AS integer[])) AS burger_id
+    RETURNING order_id""")
+DELETE_CUSTOMER = text("DELETE FROM customers WHERE id = :customer_id")
+DELETE_BURGERS = text("DELETE FROM burgers WHERE id = ANY(CAST(:burger_ids AS integer[]))")
+
+ORDER_LIST = TypeAdapter(List[OrderResponse])
+
+def _response_model_body(orders: List[OrderResponse]) -> bytes:
+    """What FastAPI did with a List[OrderResponse] response_model: dump the models, validate them again and dump
+    them in JSON mode, rendered by the default JSONResponse"""
+    validated = ORDER_LIST.validate_python([order.model_dump(by_alias=True) for order in orders])
+    return JSONResponse(ORDER_LIST.dump_python(validated, mode="json", by_alias=True)).body
+
+def _validated(rows) -> bytes:
+    """GET /orders/ before: every row validated into an OrderResponse, then the response_model pass"""
+    return _response_model_body([OrderService._build_order_response_from_row(row) for row in rows])
+
+def _constructed(rows) -> bytes:
+    """model_construct instead of model_validate, the response_model pass is unchanged"""
+    orders = []
+    for row in rows:
+        order = OrderService._order_dict_from_row(row)
+        customer = CustomerResponse.model_construct(**order.pop("customer"))
+        orders.append(OrderResponse.model_construct(customer=customer, **order))
+    return _response_model_body(orders)
+
+def _dicts(rows) -> bytes:
+    """GET /orders/ now: the rows become dicts encoded once by FastJSONResponse"""
+    return FastJSONResponse([OrderService._order_dict_from_row(row) for row in rows]).body
+
+MODES = (("model_validate + response_model (before)", _validated),
+         ("model_construct + response_model", _constructed),
+         ("dicts + FastJSONResponse", _dicts))
+
+async def benchmark_serialization(count: int = ORDERS) -> str:
+    """Milliseconds from `count` order summary rows to the response body, for each way of encoding them"""
+    async with AsyncSessionLocal() as db:
+        customer_id = (await db.execute(CREATE_CUSTOMER, {"phone": f"bench-{uuid.uuid4().hex[:20]}"})).scalar_one()
+        burger_ids = list((await db.execute(CREATE_BURGERS, {"prefix": f"bench-json-{uuid.uuid4().hex[:8]}-"}))
+                          .scalars())
+        first_id = min((await db.execute(ADD_ORDERS, {"customer_id": customer_id, "burger_ids": burger_ids,
+                                                      "count": count})).scalars())
+        await db.commit()
+
+    rows = []
+    try:
+        async with AsyncSessionLocal() as db:
+            summary_rows = await crud_order.get_all_orders_summary(db, 0, count, first_id - 1)
+        bodies = {label: encode(summary_rows) for label, encode in MODES}
+        if len(set(bodies.values())) != 1:
+            raise ValueError("The encodings don't produce the same response body.")
+        for label, encode in MODES:
+            async def run(encode=encode):
+                encode(summary_rows)
+            ms = await median_ms(run)
+            rows.append((label, ms, ms / len(summary_rows) * 1000))
+            logger.info("%s: %.2f ms for %s orders.", label, ms, len(summary_rows))
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(DELETE_CUSTOMER, {"customer_id": customer_id})
+            await db.execute(DELETE_BURGERS, {"burger_ids": burger_ids})
+            await db.commit()
+    return format_table(("mode", "ms", "us/order"), rows)
+
+async def run_script():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ORDERS
+    report = await benchmark_serialization(count)
+    logger.info("Order list rows to response body, %s orders of 3 lines, the bodies are byte-identical:\n%s",
+                count, report)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_script())
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import sys
+import time
+import uuid
+from sqlalchemy import select, text
+from sqlalchemy.orm import selectinload
+
+from src.database.crud.order import ORDER_BY_ID, ORDERS_SUMMARY_PAGE, _orders_summary_query
+from src.database.database import AsyncSessionLocal
+from src.database.models.burger import Burger
+from src.database.models.order import Order
+from src.database.models.order_burger_item import OrderBurgerItem
+from src.scripts.benchmarking import format_table, median_ms
+
+logger = logging.getLogger(__name__)
+
+CALLS = 2000
+READS = 200
+
+CREATE_CUSTOMER = text("INSERT INTO customers (name, phone) VALUES ('Benchmark', :phone) RETURNING id")
+CREATE_BURGERS = text("""
+    INSERT INTO burgers (name, price, is_available)
+    SELECT :prefix || n, 5.0, true FROM generate_series(1, 3) AS n
+    RETURNING id""")
+CREATE_ORDER = text("""
+    WITH new_order AS (
+        INSERT INTO orders (customer_id, status, total_price)
+        VALUES (:customer_id, 'Pending', 15.0)
+        RETURNING id),
+    new_items AS (
+        INSERT INTO order_burger_items (order_id, burger_id, quantity, unit_price)
+        SELECT new_order.id, burger_id, 1, 5.0
+        FROM new_order CROSS JOIN unnest(CAST(:burger_ids AS integer[])) AS burger_id)
+    SELECT id FROM new_order""")
+DELETE_CUSTOMER = text("DELETE FROM customers WHERE id = :customer_id")
+DELETE_BURGERS = text("DELETE FROM burgers WHERE id = ANY(CAST(:burger_ids AS integer[]))")
+
+def _order_by_id_built(order_id: int):
+    """What get_order_by_id built on every call before the statements were prebuilt, with today's loader options"""
+    return (select(Order)
+            .where(Order.id == order_id)
+            .options(selectinload(Order.burger_items).selectinload(OrderBurgerItem.burger)
+                     .raiseload(Burger.ingredient_items),
+                     selectinload(Order.customer)))
+
+def _summary_page_built(offset: int, limit: int):
+    """What get_all_orders_summary built on every call before the statements were prebuilt"""
+    return _orders_summary_query().order_by(Order.id).offset(offset).limit(limit)
+
+# (label, statement and parameters as built before, as prebuilt now)
+STATEMENTS = (
+    ("order by id", lambda order_id: (_order_by_id_built(order_id), {}),
+     lambda order_id: (ORDER_BY_ID, {"order_id": order_id})),
+    ("order summary page", lambda order_id: (_summary_page_built(0, 20), {}),
+     lambda order_id: ORDERS_SUMMARY_PAGE.bind(0, 20)),
+)
+
+def _build_us(statement, calls: int) -> float:
+    """Microseconds per call of getting the statement and its cache key, the work SQLAlchemy does before it can
+    look the compiled SQL up"""
+    started = time.perf_counter()
+    for _ in range(calls):
+        query, _ = statement(1)
+        query._generate_cache_key()
+    return (time.perf_counter() - started) / calls * 1e6
+
+async def _read_ms(statement, order_id: int, reads: int) -> float:
+    """Median ms of `reads` executions of the statement on one session, rows fetched"""
+    async with AsyncSessionLocal() as db:
+        async def run():
+            for _ in range(reads):
+                query, params = statement(order_id)
+                (await db.execute(query, params)).all()
+                db.expunge_all()
+        return await median_ms(run)
+
+async def benchmark_statements(calls: int = CALLS, reads: int = READS) -> str:
+    """Per call cost of building the hot order reads as before against executing the prebuilt statements"""
+    async with AsyncSessionLocal() as db:
+        customer_id = (await db.execute(CREATE_CUSTOMER, {"phone": f"bench-{uuid.uuid4().hex[:20]}"})).scalar_one()
+        burger_ids = list((await db.execute(CREATE_BURGERS, {"prefix": f"bench-stmt-{uuid.uuid4().hex[:8]}-"}))
+                          .scalars())
+        order_id = (await db.execute(CREATE_ORDER, {"customer_id": customer_id,
+                                                    "burger_ids": burger_ids})).scalar_one()
+        await db.commit()
+
+    rows = []
+    try:
+        for label, built, prebuilt in STATEMENTS:
+            built_us, prebuilt_us = _build_us(built, calls), _build_us(prebuilt, calls)
+            built_ms = await _read_ms(built, order_id, reads)
+            prebuilt_ms = await _read_ms(prebuilt, order_id, reads)
+            rows.append((label, built_us, prebuilt_us, built_ms / reads * 1000, prebuilt_ms / reads * 1000))
+            logger.info("%s: statement %.1f us -> %.1f us, read %.0f us -> %.0f us.", label, built_us, prebuilt_us,
+                        built_ms / reads * 1000, prebuilt_ms / reads * 1000)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(DELETE_CUSTOMER, {"customer_id": customer_id})
+            await db.execute(DELETE_BURGERS, {"burger_ids": burger_ids})
+            await db.commit()
+    return format_table(("statement", "built us", "prebuilt us", "built read us", "prebuilt read us"), rows)
+
+async def run_script():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else CALLS
+    report = await benchmark_statements(calls)
+    logger.info("Statement build + cache key per call (%s calls), and a whole read per call (%s reads):\n%s",
+                calls, READS, report)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_script())
@@ -0,0 +1,25 @@
+import statistics
+import time
+from typing import Any, Awaitable, Callable, List, Sequence
+
+# the benchmark scripts write their own rows to the configured database and delete them afterwards,
+# run them against a scratch database (DB_NAME) rather than a live one
+
+async def median_ms(run: Callable[[], Awaitable[Any]], repeat: int = 5, warmup: int = 1) -> float:
+    """Median wall time of `run` in milliseconds, after `warmup` untimed runs"""
+    for _ in range(warmup):
+        await run()
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await run()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def format_table(header: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    """Right-aligned plain text table, floats with two decimals"""
+    cells = [[f"{value:.2f}" if isinstance(value, float) else str(value) for value in row] for row in rows]
+    widths = [max(len(str(title)), *(len(row[index]) for row in cells)) for index, title in enumerate(header)]
+    lines = ["  ".join(str(title).rjust(width) for title, width in zip(header, widths))]
+    lines += ["  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in cells]
+    return "\n".join(lines)
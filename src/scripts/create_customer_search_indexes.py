@@ -0,0 +1,21 @@
+import asyncio
+from sqlalchemy import text
+
+from src.database.database import engine
+
+# CONCURRENTLY keeps the customers table writable while the indexes are built
+CUSTOMER_SEARCH_INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_customers_phone_pattern "
+    "ON customers (phone varchar_pattern_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_customers_lower_name_pattern "
+    "ON customers (lower(name) text_pattern_ops)"]
+
+async def main():
+    """Adds the customer search indexes to a database created before the search existed"""
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for statement in CUSTOMER_SEARCH_INDEXES:
+            await conn.execute(text(statement))
+
+if __name__ == "__main__":
+    asyncio.run(main())
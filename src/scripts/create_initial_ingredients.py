@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.database import AsyncSessionLocal
 from src.database.models import Ingredient
+from src.database.notify import notify_cache_invalidation
 
 initial_ingredients = [{"name": "Bun", "manufacturer": "Top bakery"},
                        {"name": "Beef patty", "manufacturer": "Meet company"},
@@ -34,6 +35,7 @@ async def create_initial_ingredients(db: AsyncSession, initial_ingredients: List
     db.add_all(new_ingredient_objs)
 
     try:
+        await notify_cache_invalidation(db, "ingredients")
         await db.commit()
     except Exception as e:
         await db.rollback()
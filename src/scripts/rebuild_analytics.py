@@ -0,0 +1,42 @@
+import asyncio
+import logging
+from sqlalchemy import text
+
+from src.core.analytics_job import AnalyticsRollupJob
+from src.database.database import AsyncSessionLocal, Base, engine
+from src.database.crud.analytics import mark_all_buckets_dirty
+from src.database.models.analytics import (ANALYTICS_TRIGGERS_DDL, AnalyticsDirtyMark, OrderStatusHourlyRollup,
+                                           BurgerSalesHourlyRollup, IngredientConsumptionHourlyRollup)
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_TABLES = [AnalyticsDirtyMark.__table__, OrderStatusHourlyRollup.__table__,
+                    BurgerSalesHourlyRollup.__table__, IngredientConsumptionHourlyRollup.__table__]
+
+async def install_analytics_schema() -> None:
+    """Creates the rollup tables, the indexes and the dirty-marking triggers on a database created
+    before analytics existed, and drops the dirty-hour table the marks replaced. Safe to run again."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=ANALYTICS_TABLES)
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_orders_created_at ON orders (created_at)"))
+        await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_order_burger_items_burger_id "
+                                "ON order_burger_items (burger_id)"))
+        for statement in ANALYTICS_TRIGGERS_DDL:
+            await conn.execute(text(statement))
+        await conn.execute(text("DROP TABLE IF EXISTS analytics_dirty_buckets"))
+
+async def rebuild_analytics() -> int:
+    """Marks every hour with orders dirty and recomputes all rollups"""
+    await install_analytics_schema()
+    async with AsyncSessionLocal() as db:
+        await mark_all_buckets_dirty(db)
+        await db.commit()
+    return await AnalyticsRollupJob(batch_size=168).run_once()
+
+async def run_script():
+    recomputed = await rebuild_analytics()
+    logger.info("Rebuilt analytics rollups of %s hours.", recomputed)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_script())
@@ -0,0 +1,56 @@
+from datetime import datetime
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+
+from src.database.crud import analytics as crud_analytics
+from src.database.models.order import OrderStatus
+from src.database.schemes.analytics import (RevenuePoint, AverageTicketResponse, StatusCount, TopBurger,
+                                            IngredientConsumption)
+
+logger = logging.getLogger(__name__)
+
+
+class AnalyticsService:
+    @staticmethod
+    async def refresh_rollups(db: AsyncSession, batch_size: int = 24) -> int:
+        """Recomputes one batch of dirty hours in its own transaction, returns how many were recomputed"""
+        try:
+            buckets = await crud_analytics.claim_dirty_buckets(db, batch_size)
+            if buckets:
+                await crud_analytics.recompute_buckets(db, buckets)
+            await db.commit()
+            return len(buckets)
+        except Exception as e:
+            await db.rollback()
+            logger.error("Unexpected error in AnalyticsService during rollup refresh: %s.", e)
+            raise
+
+    @staticmethod
+    async def get_revenue(db: AsyncSession, start: datetime, end: datetime,
+                          granularity: str = "hour") -> List[RevenuePoint]:
+        rows = await crud_analytics.get_revenue(db, start, end, granularity)
+        return [RevenuePoint.model_validate(row) for row in rows]
+
+    @staticmethod
+    async def get_average_ticket(db: AsyncSession, start: datetime, end: datetime) -> AverageTicketResponse:
+        totals = await crud_analytics.get_order_totals(db, start, end)
+        average_ticket = totals.revenue / totals.order_count if totals.order_count else 0.0
+        return AverageTicketResponse(order_count=totals.order_count, revenue=totals.revenue,
+                                     average_ticket=average_ticket)
+
+    @staticmethod
+    async def get_status_funnel(db: AsyncSession, start: datetime, end: datetime) -> List[StatusCount]:
+        counts = {row.status: row.order_count for row in await crud_analytics.get_status_funnel(db, start, end)}
+        return [StatusCount(status=status, order_count=counts.get(status, 0)) for status in OrderStatus]
+
+    @staticmethod
+    async def get_top_burgers(db: AsyncSession, start: datetime, end: datetime, limit: int = 10) -> List[TopBurger]:
+        rows = await crud_analytics.get_top_burgers(db, start, end, limit)
+        return [TopBurger.model_validate(row) for row in rows]
+
+    @staticmethod
+    async def get_ingredient_consumption(db: AsyncSession, start: datetime,
+                                         end: datetime) -> List[IngredientConsumption]:
+        rows = await crud_analytics.get_ingredient_consumption(db, start, end)
+        return [IngredientConsumption.model_validate(row) for row in rows]
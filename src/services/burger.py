@@ -2,9 +2,12 @@ from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from src.core.cache import menu_cache
 from src.database.models.burger import Burger
 from src.database.crud import burger as burger_crud
-from src.database.schemes.burger import BurgerCreate, BurgerUpdate
+from src.database.schemes.burger import BurgerCreate, BurgerUpdate, BurgerResponse
+
+logger = logging.getLogger(__name__)
 
 class BurgerService:
     @staticmethod
@@ -16,13 +19,14 @@ class BurgerService:
                 raise ValueError("Burger price must be greater than zero.")
 
             db_burger = await burger_crud.create_burger(db, burger_in)
-            logging.info(f"Burger {db_burger.id} created successfully via BurgerService.")
+            menu_cache.invalidate("burgers")
+            logger.info("Burger %s created successfully via BurgerService.", db_burger.id)
             return db_burger
         except ValueError as e:
-            logging.warning(f"Failed to create burger via BurgerService: {str(e)}.")
+            logger.warning("Failed to create burger via BurgerService: %s.", e)
             raise
         except Exception as e:
-            logging.error(f"Unexpected error in BurgerService during burger creation: {str(e)}.")
+            logger.error("Unexpected error in BurgerService during burger creation: %s.", e)
             raise
 
     @staticmethod
@@ -33,14 +37,15 @@ class BurgerService:
 
             db_burger = await burger_crud.update_burger(db, burger_id, burger_in)
             if db_burger is None:
-                logging.warning(f"Burger with id {burger_id} not found for update via BurgerService.")
+                logger.warning("Burger with id %s not found for update via BurgerService.", burger_id)
                 return None
-            logging.info(f"Burger {db_burger.id} updated successfully via BurgerService.")
+            menu_cache.invalidate("burgers")
+            logger.info("Burger %s updated successfully via BurgerService.", db_burger.id)
             return db_burger
         except ValueError as e:
-            logging.warning(f"Failed to update burger via BurgerService: {str(e)}.")
+            logger.warning("Failed to update burger via BurgerService: %s.", e)
         except Exception as e:
-            logging.error(f"Unexpected error in BurgerService during burger update: {str(e)}.")
+            logger.error("Unexpected error in BurgerService during burger update: %s.", e)
             raise
 
     @staticmethod
@@ -48,22 +53,81 @@ class BurgerService:
         try:
             db_burger = await burger_crud.get_burger_by_id(db, burger_id)
             if db_burger is None:
-                logging.debug(f"Burger with id {burger_id} not found in DB via BurgerService.")
+                logger.debug("Burger with id %s not found in DB via BurgerService.", burger_id)
                 return None
-            logging.debug(f"Burger {db_burger.id} ('{db_burger.name}') found successfully in DB by ID via BurgerService.")
+            logger.debug("Burger %s ('%s') found successfully in DB by ID via BurgerService.", db_burger.id, db_burger.name)
             return db_burger
         except Exception as e:
-            logging.error(f"Unexpected error in BurgerService during burger retrieval by ID: {str(e)}.")
+            logger.error("Unexpected error in BurgerService during burger retrieval by ID: %s.", e)
             raise
 
     @staticmethod
-    async def get_all_burgers(db: AsyncSession, offset: int = 0, limit: int = 100) -> List[Burger]:
+    async def get_all_burgers(db: AsyncSession, offset: int = 0, limit: int = 100,
+                              after_id: Optional[int] = None) -> List[Burger]:
         try:
-            db_burgers = await burger_crud.get_all_burgers(db, offset, limit)
-            logging.debug(f"Retrieved {len(db_burgers)} burgers, offset={offset}, limit={limit} via BurgerService.")
+            db_burgers = await burger_crud.get_all_burgers(db, offset, limit, after_id)
+            logger.debug("Retrieved %s burgers, offset=%s, limit=%s, after_id=%s via BurgerService.", len(db_burgers), offset, limit, after_id)
             return db_burgers
         except Exception as e:
-            logging.error(f"Unexpected error in BurgerService during burger retrieval: {str(e)}.")
+            logger.error("Unexpected error in BurgerService during burger retrieval: %s.", e)
+            raise
+
+    @staticmethod
+    async def get_menu_burger_by_id(db: AsyncSession, burger_id: int) -> Optional[BurgerResponse]:
+        try:
+            cache_key = ("burgers", "by_id", burger_id)
+            burger = menu_cache.get(cache_key)
+            if burger is not None:
+                return burger
+
+            cache_version = menu_cache.version
+            burger = await burger_crud.get_menu_burger_by_id(db, burger_id)
+            if burger is None:
+                logger.debug("Burger with id %s not found in DB via BurgerService.", burger_id)
+                return None
+            menu_cache.set(cache_key, burger, cache_version)
+            logger.debug("Menu burger %s ('%s') found successfully in DB by ID via BurgerService.", burger.id, burger.name)
+            return burger
+        except Exception as e:
+            logger.error("Unexpected error in BurgerService during menu burger retrieval by ID: %s.", e)
+            raise
+
+    @staticmethod
+    async def get_menu_stamp(db: AsyncSession) -> str:
+        """Version stamp of the menu burgers, cached like the menu itself"""
+        try:
+            cache_key = ("burgers", "stamp")
+            stamp = menu_cache.get(cache_key)
+            if stamp is not None:
+                return stamp
+
+            cache_version = menu_cache.version
+            stamp = await burger_crud.get_burgers_stamp(db)
+            menu_cache.set(cache_key, stamp, cache_version)
+            return stamp
+        except Exception as e:
+            logger.error("Unexpected error in BurgerService during menu stamp retrieval: %s.", e)
+            raise
+
+    @staticmethod
+    async def get_menu_burgers(db: AsyncSession, offset: int = 0, limit: int = 100,
+                               after_id: Optional[int] = None) -> List[BurgerResponse]:
+        try:
+            # keyed by the stamp read before the page, a cached page is never older than the stamp
+            # the endpoint derives its ETag from, even while an invalidation is still on its way
+            stamp = await BurgerService.get_menu_stamp(db)
+            cache_key = ("burgers", "list", offset, limit, after_id, stamp)
+            burgers = menu_cache.get(cache_key)
+            if burgers is not None:
+                return burgers
+
+            cache_version = menu_cache.version
+            burgers = await burger_crud.get_menu_burgers(db, offset, limit, after_id)
+            menu_cache.set(cache_key, burgers, cache_version)
+            logger.debug("Retrieved %s menu burgers, offset=%s, limit=%s, after_id=%s via BurgerService.", len(burgers), offset, limit, after_id)
+            return burgers
+        except Exception as e:
+            logger.error("Unexpected error in BurgerService during menu burger retrieval: %s.", e)
             raise
 
     @staticmethod
@@ -71,10 +135,11 @@ class BurgerService:
         try:
             db_burger = await burger_crud.delete_burger(db, burger_id)
             if db_burger is None:
-                logging.warning(f"Burger with id {burger_id} not found for deletion via BurgerService.")
+                logger.warning("Burger with id %s not found for deletion via BurgerService.", burger_id)
                 return None
-            logging.info(f"Burger {db_burger.id} deleted successfully via BurgerService.")
+            menu_cache.invalidate("burgers")
+            logger.info("Burger %s deleted successfully via BurgerService.", db_burger.id)
             return db_burger
         except Exception as e:
-            logging.error(f"Unexpected error in BurgerService during burger deletion: {str(e)}.")
+            logger.error("Unexpected error in BurgerService during burger deletion: %s.", e)
             raise
\ No newline at end of file
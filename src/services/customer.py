@@ -2,22 +2,27 @@ from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from src.core.cache import menu_cache
 from src.database.crud import customer as customer_crud
+from src.database.crud import ingredient as ingredient_crud
+from src.database.crud import order as order_crud
 from src.database.models.customer import Customer
 from src.database.schemes.customer import CustomerCreate, CustomerUpdate
 
+logger = logging.getLogger(__name__)
+
 class CustomerService:
     @staticmethod
     async def create_customer(db: AsyncSession, customer_in: CustomerCreate) -> Customer:
         try:
             db_customer = await customer_crud.create_customer(db, customer_in)
-            logging.info(f"Customer {db_customer.id} created successfully via CustomerService.")
+            logger.info("Customer %s created successfully via CustomerService.", db_customer.id)
             return db_customer
         except ValueError as e:
-            logging.warning(f"Failed to create customer via CustomerService: {str(e)}.")
+            logger.warning("Failed to create customer via CustomerService: %s.", e)
             raise
         except Exception as e:
-            logging.error(f"Unexpected error in CustomerService during customer creation: {str(e)}.")
+            logger.error("Unexpected error in CustomerService during customer creation: %s.", e)
             raise
 
     @staticmethod
@@ -25,14 +30,15 @@ class CustomerService:
         try:
             db_customer = await customer_crud.update_customer(db, customer_id, customer_in)
             if db_customer is None:
-                logging.warning(f"Customer with id {customer_id} not found for update via CustomerService.")
+                logger.warning("Customer with id %s not found for update via CustomerService.", customer_id)
                 return None
-            logging.info(f"Customer {db_customer.id} updated successfully via CustomerService.")
+            logger.info("Customer %s updated successfully via CustomerService.", db_customer.id)
             return db_customer
         except ValueError as e:
-            logging.warning(f"Failed to update customer via CustomerService: {str(e)}.")
+            logger.warning("Failed to update customer via CustomerService: %s.", e)
+            raise
         except Exception as e:
-            logging.error(f"Unexpected error in CustomerService during customer update: {str(e)}.")
+            logger.error("Unexpected error in CustomerService during customer update: %s.", e)
             raise
 
     @staticmethod
@@ -40,33 +46,65 @@ class CustomerService:
         try:
             db_customer = await customer_crud.get_customer_by_id(db, customer_id)
             if db_customer is None:
-                logging.debug(f"Customer with id {customer_id} not found in DB via CustomerService.")
+                logger.debug("Customer with id %s not found in DB via CustomerService.", customer_id)
                 return None
-            logging.debug(f"Customer {db_customer.id} ('{db_customer.name}') found successfully in DB by ID via CustomerService.")
+            logger.debug("Customer %s ('%s') found successfully in DB by ID via CustomerService.", db_customer.id, db_customer.name)
+            return db_customer
+        except Exception as e:
+            logger.error("Unexpected error in CustomerService during customer retrieval by ID: %s.", e)
+            raise
+
+    @staticmethod
+    async def get_customer_by_phone(db: AsyncSession, phone: str) -> Optional[Customer]:
+        try:
+            db_customer = await customer_crud.get_customer_by_phone(db, phone)
+            if db_customer is None:
+                logger.debug("Customer with phone %s not found in DB via CustomerService.", phone)
             return db_customer
         except Exception as e:
-            logging.error(f"Unexpected error in CustomerService during customer retrieval by ID: {str(e)}.")
+            logger.error("Unexpected error in CustomerService during customer retrieval by phone: %s.", e)
             raise
 
     @staticmethod
-    async def get_all_customers(db: AsyncSession, offset: int = 0, limit: int = 100) -> List[Customer]:
+    async def get_all_customers(db: AsyncSession, offset: int = 0, limit: int = 100,
+                                after_id: Optional[int] = None) -> List[Customer]:
         try:
-            db_customers = await customer_crud.get_all_customers(db, offset, limit)
-            logging.debug(f"Retrieved {len(db_customers)} customers, offset={offset}, limit={limit} via CustomerService.")
+            db_customers = await customer_crud.get_all_customers(db, offset, limit, after_id)
+            logger.debug("Retrieved %s customers, offset=%s, limit=%s, after_id=%s via CustomerService.", len(db_customers), offset, limit, after_id)
             return db_customers
         except Exception as e:
-            logging.error(f"Unexpected error in CustomerService during customer retrieval: {str(e)}.")
+            logger.error("Unexpected error in CustomerService during customer retrieval: %s.", e)
+            raise
+
+    @staticmethod
+    async def search_customers(db: AsyncSession, query_text: str, limit: int = 10) -> List[Customer]:
+        try:
+            db_customers = await customer_crud.search_customers(db, query_text, limit)
+            logger.debug("Found %s customers matching '%s' via CustomerService.", len(db_customers), query_text)
+            return db_customers
+        except Exception as e:
+            logger.error("Unexpected error in CustomerService during customer search: %s.", e)
             raise
 
     @staticmethod
     async def delete_customer(db: AsyncSession, customer_id: int) -> Optional[Customer]:
         try:
-            db_customer = await customer_crud.delete_customer(db, customer_id)
+            changed_namespaces: List[str] = []
+
+            async def release_stock(customer_id: int) -> None:
+                """The orders deleted with the customer give back the stock they hold"""
+                order_ids = await order_crud.lock_customer_stock_holding_orders(db, customer_id)
+                if order_ids:
+                    changed_namespaces.extend(await ingredient_crud.release_order_stock(db, order_ids))
+
+            db_customer = await customer_crud.delete_customer(db, customer_id, release_stock)
             if db_customer is None:
-                logging.warning(f"Customer with id {customer_id} not found for deletion via CustomerService.")
+                logger.warning("Customer with id %s not found for deletion via CustomerService.", customer_id)
                 return None
-            logging.info(f"Customer {db_customer.id} deleted successfully via CustomerService.")
+            for namespace in changed_namespaces:
+                menu_cache.invalidate(namespace)
+            logger.info("Customer %s deleted successfully via CustomerService.", db_customer.id)
             return db_customer
         except Exception as e:
-            logging.error(f"Unexpected error in CustomerService during customer deletion: {str(e)}.")
+            logger.error("Unexpected error in CustomerService during customer deletion: %s.", e)
             raise
\ No newline at end of file
@@ -2,29 +2,84 @@ from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from src.core.cache import menu_cache
 from src.database.crud import ingredient as ingredient_crud
-from src.database.models.ingredient import Ingredient
+from src.database.schemes.ingredient import IngredientResponse, IngredientStockUpdate
+
+logger = logging.getLogger(__name__)
 
 class IngredientService:
     @staticmethod
-    async def get_ingredient_by_id(db: AsyncSession, ingredient_id: int) -> Optional[Ingredient]:
+    async def get_ingredient_by_id(db: AsyncSession, ingredient_id: int) -> Optional[IngredientResponse]:
         try:
+            cache_key = ("ingredients", "by_id", ingredient_id)
+            ingredient = menu_cache.get(cache_key)
+            if ingredient is not None:
+                return ingredient
+
+            cache_version = menu_cache.version
             db_ingredient = await ingredient_crud.get_ingredient_by_id(db, ingredient_id)
             if db_ingredient is None:
-                logging.debug(f"Ingredient with id {ingredient_id} not found in DB via IngredientService.")
+                logger.debug("Ingredient with id %s not found in DB via IngredientService.", ingredient_id)
                 return None
-            logging.info(f"Ingredient {db_ingredient.id} found successfully in DB via IngredientService.")
-            return db_ingredient
+            ingredient = IngredientResponse.model_validate(db_ingredient)
+            menu_cache.set(cache_key, ingredient, cache_version)
+            logger.debug("Ingredient %s found successfully in DB via IngredientService.", db_ingredient.id)
+            return ingredient
         except Exception as e:
-            logging.error(f"Unexpected error in IngredientService during ingredient retrieval by ID: {str(e)}.")
+            logger.error("Unexpected error in IngredientService during ingredient retrieval by ID: %s.", e)
             raise
 
     @staticmethod
-    async def get_all_ingredients(db: AsyncSession, offset: int = 0, limit: int = 100) -> List[Ingredient]:
+    async def get_ingredients_stamp(db: AsyncSession) -> str:
+        """Version stamp of the ingredients, cached like the ingredients themselves"""
         try:
-            db_ingredients = await ingredient_crud.get_all_ingredients(db, offset, limit)
-            logging.debug(f"Retrieved {len(db_ingredients)} ingredients, offset={offset}, limit={limit} via IngredientService.")
-            return db_ingredients
+            cache_key = ("ingredients", "stamp")
+            stamp = menu_cache.get(cache_key)
+            if stamp is not None:
+                return stamp
+
+            cache_version = menu_cache.version
+            stamp = await ingredient_crud.get_ingredients_stamp(db)
+            menu_cache.set(cache_key, stamp, cache_version)
+            return stamp
+        except Exception as e:
+            logger.error("Unexpected error in IngredientService during ingredients stamp retrieval: %s.", e)
+            raise
+
+    @staticmethod
+    async def get_all_ingredients(db: AsyncSession, offset: int = 0, limit: int = 100,
+                                  after_id: Optional[int] = None) -> List[IngredientResponse]:
+        try:
+            # keyed by the stamp so a cached page is never older than the stamp of the ETag, see BurgerService
+            stamp = await IngredientService.get_ingredients_stamp(db)
+            cache_key = ("ingredients", "list", offset, limit, after_id, stamp)
+            ingredients = menu_cache.get(cache_key)
+            if ingredients is not None:
+                return ingredients
+
+            cache_version = menu_cache.version
+            db_ingredients = await ingredient_crud.get_all_ingredients(db, offset, limit, after_id)
+            ingredients = [IngredientResponse.model_validate(db_ingredient) for db_ingredient in db_ingredients]
+            menu_cache.set(cache_key, ingredients, cache_version)
+            logger.debug("Retrieved %s ingredients, offset=%s, limit=%s, after_id=%s via IngredientService.", len(ingredients), offset, limit, after_id)
+            return ingredients
         except Exception as e:
-            logging.error(f"Unexpected error in IngredientService during ingredient retrieval: {str(e)}.")
-            raise
\ No newline at end of file
+            logger.error("Unexpected error in IngredientService during ingredient retrieval: %s.", e)
+            raise
+
+    @staticmethod
+    async def set_ingredient_stock(db: AsyncSession, ingredient_id: int,
+                                   stock_in: IngredientStockUpdate) -> Optional[IngredientResponse]:
+        try:
+            db_ingredient = await ingredient_crud.set_ingredient_stock(db, ingredient_id, stock_in.stock_quantity)
+            if db_ingredient is None:
+                logger.warning("Ingredient with id %s not found for stock update via IngredientService.", ingredient_id)
+                return None
+            menu_cache.invalidate("ingredients")
+            menu_cache.invalidate("burgers")
+            logger.info("Stock of ingredient %s updated successfully via IngredientService.", ingredient_id)
+            return IngredientResponse.model_validate(db_ingredient)
+        except Exception as e:
+            logger.error("Unexpected error in IngredientService during stock update: %s.", e)
+            raise
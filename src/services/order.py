@@ -1,125 +1,498 @@
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, AsyncIterator
+from pydantic import BaseModel
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
-from src.database.models import Burger
-from src.database.models.order import Order
+from src.core.cache import menu_cache
+from src.core.events import order_events
+from src.core.idempotency import request_fingerprint
+from src.database.models.order import Order, OrderStatus
 from src.database.crud import order as crud_order
-from src.database.schemes.order import OrderCreate, OrderUpdate, OrderResponse
+from src.database.crud import customer as crud_customer
+from src.database.crud import burger as crud_burger
+from src.database.crud import ingredient as crud_ingredient
+from src.database.crud import idempotency as crud_idempotency
+from src.database.notify import notify_cache_invalidation
+from src.database.schemes.order import (OrderCreate, OrderUpdate, OrderResponse, OrderBulkCreate,
+                                        OrderBulkResponse, OrderBulkError, OrderStatusUpdate,
+                                        OrderStatusResponse, OrderStatusError, OrderBatchStatusResponse)
 from src.database.schemes.customer import CustomerResponse
-from src.services.customer import CustomerService
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATE_SCOPE = "orders.create"
+ORDER_BULK_CREATE_SCOPE = "orders.bulk"
 
 
 class OrderService:
     @staticmethod
-    async def create_order(db: AsyncSession, order_in: OrderCreate) -> OrderResponse:
+    async def create_order(db: AsyncSession, order_in: OrderCreate,
+                           idempotency_key: Optional[str] = None) -> OrderResponse:
         try:
-            customer = await CustomerService.get_customer_by_id(db, order_in.customer_id)
-            if customer is None:
-                raise ValueError(f"Customer with ID {order_in.customer_id} wasn't found in DB.")
-            if order_in.items in ([], None):
-                raise ValueError("Order must have at least one burger item.")
-            for item in order_in.items:
-                burger = await db.get(Burger, item.burger_id)
-                if burger is None:
-                    raise ValueError(f"Burger with ID {item.burger_id} wasn't found in DB.")
-
-            created_order = await crud_order.create_order(db, order_in)
-            order = await OrderService.get_order_by_id_with_total_price(db, created_order.id)
-            logging.info(f"Order {order.id} created successfully via OrderService.")
+            before_commit = None
+            if idempotency_key is not None:
+                stored = await OrderService._claim_idempotency_key(db, ORDER_CREATE_SCOPE, idempotency_key, order_in)
+                if stored is not None:
+                    logger.info("Order creation with idempotency key %s replayed via OrderService.", idempotency_key)
+                    return OrderResponse.model_validate(stored)
+                before_commit = lambda created: crud_idempotency.store_idempotent_response(
+                    db, ORDER_CREATE_SCOPE, idempotency_key, created.model_dump(mode="json"))
+
+            order = await OrderService._create_order(db, order_in, before_commit)
+            logger.info("Order %s created successfully via OrderService.", order.id)
             return order
         except ValueError as e:
-            logging.warning(f"Failed to create order via OrderService: {str(e)}.")
+            logger.warning("Failed to create order via OrderService: %s.", e)
+            raise
+        except Exception as e:
+            logger.error("Unexpected error in OrderService during order creation: %s.", e)
+            raise
+
+    @staticmethod
+    async def create_orders_bulk(db: AsyncSession, orders_in: OrderBulkCreate,
+                                 idempotency_key: Optional[str] = None) -> OrderBulkResponse:
+        try:
+            before_commit = None
+            if idempotency_key is not None:
+                stored = await OrderService._claim_idempotency_key(
+                    db, ORDER_BULK_CREATE_SCOPE, idempotency_key, orders_in)
+                if stored is not None:
+                    logger.info("Bulk order creation with idempotency key %s replayed via OrderService.",
+                                idempotency_key)
+                    return OrderBulkResponse.model_validate(stored)
+                before_commit = lambda created, errors: crud_idempotency.store_idempotent_response(
+                    db, ORDER_BULK_CREATE_SCOPE, idempotency_key,
+                    OrderBulkResponse(created=created, errors=errors).model_dump(mode="json"))
+
+            created, errors = await OrderService._create_orders(db, orders_in.orders, before_commit)
+            logger.info("Bulk order creation via OrderService: %s created, %s rejected.", len(created), len(errors))
+            return OrderBulkResponse(created=created, errors=errors)
+        except ValueError as e:
+            logger.warning("Failed to create orders via OrderService: %s.", e)
             raise
         except Exception as e:
-            logging.error(f"Unexpected error in OrderService during order creation: {str(e)}.")
+            logger.error("Unexpected error in OrderService during bulk order creation: %s.", e)
+            raise
+
+    @staticmethod
+    async def _claim_idempotency_key(db: AsyncSession, scope: str, key: str, request: BaseModel) -> Optional[Any]:
+        """Claims the key in the current transaction, returns the stored response when it was used before.
+        Raises ValueError when the key was used for a different request body."""
+        fingerprint = request_fingerprint(request)
+        stored = await crud_idempotency.claim_idempotency_key(db, scope, key, fingerprint)
+        if stored is None:
+            return None
+        await db.rollback()
+        if stored.request_hash != fingerprint:
+            raise ValueError(f"Idempotency key {key} was already used for a different request.")
+        if stored.response is None:
+            raise ValueError(f"Request with idempotency key {key} is still being processed.")
+        return stored.response
+
+    @staticmethod
+    async def _create_order(db: AsyncSession, order_in: OrderCreate,
+                            before_commit: Optional[Callable[[OrderResponse], Awaitable[None]]] = None
+                            ) -> OrderResponse:
+        """Creates one order in three round trips: the tracked stock of its burgers is read and locked, then
+        crud_order.insert_checked_order validates the customer and the burgers, inserts the order with its lines
+        and subtracts the stock in one statement, then the transaction commits. Burger availability is only
+        recomputed when the stock left drops below what some recipe needs.
+        Raises ValueError when the order can't be created, nothing is written then."""
+        try:
+            if order_in.items in ([], None):
+                raise ValueError("Order must have at least one burger item.")
+            quantities = crud_order.aggregate_item_quantities(order_in.items)
+
+            stock: Dict[int, Row] = {}
+            amounts: Dict[int, int] = {}
+            for line in await crud_ingredient.lock_tracked_recipe_stock(db, quantities):
+                stock[line.ingredient_id] = line
+                amounts[line.ingredient_id] = (amounts.get(line.ingredient_id, 0)
+                                               + line.quantity * quantities[line.burger_id])
+            short_ids = [ingredient_id for ingredient_id, amount in amounts.items()
+                         if stock[ingredient_id].stock_quantity < amount]
+            if short_ids:
+                raise ValueError(f"Not enough '{stock[short_ids[0]].name}' in stock for this order.")
+
+            row = await crud_order.insert_checked_order(db, order_in.customer_id, quantities, amounts)
+            if row is None:
+                raise ValueError(f"Customer with ID {order_in.customer_id} wasn't found in DB.")
+            if row.order_id is None:
+                found_ids = {line["burger_id"] for line in row.lines}
+                missing_burger_ids = [burger_id for burger_id in quantities if burger_id not in found_ids]
+                raise ValueError(f"Burger with ID {missing_burger_ids[0]} wasn't found in DB.")
+
+            changed_namespaces = ["ingredients"] if amounts else []
+            if any(stock[ingredient_id].stock_quantity - amount < stock[ingredient_id].max_quantity
+                   for ingredient_id, amount in amounts.items()):
+                if await crud_burger.refresh_burger_availability(db, ingredient_ids=amounts.keys()):
+                    changed_namespaces.append("burgers")
+                    await notify_cache_invalidation(db, "burgers")
+
+            names = {line["burger_id"]: line["name"] for line in row.lines}
+            order = OrderResponse.model_validate({
+                "id": row.order_id,
+                "customer": CustomerResponse(id=row.customer_id, name=row.customer_name, phone=row.customer_phone),
+                "customer_id": row.customer_id,
+                "created_at": row.created_at,
+                "status": OrderStatus.Pending,
+                "burgers_with_quantity": {names[burger_id]: quantity for burger_id, quantity in quantities.items()},
+                "total_price": row.total_price})
+
+            if before_commit is not None:
+                await before_commit(order)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        for namespace in changed_namespaces:
+            menu_cache.invalidate(namespace)
+        OrderService._publish_event("order.created", order)
+        return order
+
+    @staticmethod
+    async def _create_orders(db: AsyncSession, orders_in: List[OrderCreate],
+                             before_commit: Optional[Callable[[List[OrderResponse], List[OrderBulkError]],
+                                                              Awaitable[None]]] = None
+                             ) -> Tuple[List[OrderResponse], List[OrderBulkError]]:
+        """Bulk counterpart of _create_order. Validates all orders with one customer and one burger lookup,
+        reserves their ingredient stock, inserts the valid ones with multi-row INSERT ... RETURNING in a single
+        transaction and reports the invalid ones per index.
+        Responses are built from the looked up rows, nothing is re-read after the commit. before_commit
+        gets the responses inside the transaction when at least one order is inserted."""
+        customer_ids = {order_in.customer_id for order_in in orders_in}
+        burger_ids = {item.burger_id for order_in in orders_in for item in (order_in.items or [])}
+        customers = {customer.id: customer
+                     for customer in await crud_customer.get_customers_by_ids(db, customer_ids)}
+        burgers = {burger.id: burger
+                   for burger in (await crud_burger.get_burgers_by_ids(db, burger_ids) if burger_ids else [])}
+
+        errors: List[OrderBulkError] = []
+        valid_orders = []
+        for index, order_in in enumerate(orders_in):
+            if order_in.customer_id not in customers:
+                errors.append(OrderBulkError(
+                    index=index, detail=f"Customer with ID {order_in.customer_id} wasn't found in DB."))
+                continue
+            if order_in.items in ([], None):
+                errors.append(OrderBulkError(index=index, detail="Order must have at least one burger item."))
+                continue
+            quantities = crud_order.aggregate_item_quantities(order_in.items)
+            missing_burger_ids = [burger_id for burger_id in quantities if burger_id not in burgers]
+            if missing_burger_ids:
+                errors.append(OrderBulkError(
+                    index=index, detail=f"Burger with ID {missing_burger_ids[0]} wasn't found in DB."))
+                continue
+            valid_orders.append((index, order_in, quantities))
+
+        if not valid_orders:
+            return [], errors
+
+        try:
+            valid_orders, stock_errors, changed_namespaces = await OrderService._allocate_stock(db, valid_orders)
+            if stock_errors:
+                errors = sorted(errors + stock_errors, key=lambda error: error.index)
+            if not valid_orders:
+                await db.rollback()
+                return [], errors
+
+            inserted_rows = await crud_order.insert_orders(
+                db, [{"customer_id": order_in.customer_id, "status": OrderStatus.Pending,
+                      "total_price": OrderService._lines_total(quantities, burgers)}
+                     for _, order_in, quantities in valid_orders])
+            await crud_order.insert_order_items(
+                db, [{"order_id": row.id, "burger_id": burger_id, "quantity": quantity,
+                      "unit_price": burgers[burger_id].price}
+                     for row, (_, _, quantities) in zip(inserted_rows, valid_orders)
+                     for burger_id, quantity in quantities.items()])
+
+            created: List[OrderResponse] = []
+            for row, (_, order_in, quantities) in zip(inserted_rows, valid_orders):
+                customer = customers[order_in.customer_id]
+                order_data = {
+                    "id": row.id,
+                    "customer": CustomerResponse.model_validate(customer),
+                    "customer_id": customer.id,
+                    "created_at": row.created_at,
+                    "status": OrderStatus.Pending,
+                    "burgers_with_quantity": {burgers[burger_id].name: quantity
+                                              for burger_id, quantity in quantities.items()},
+                    "total_price": OrderService._lines_total(quantities, burgers)}
+                created.append(OrderResponse.model_validate(order_data))
+
+            if before_commit is not None:
+                await before_commit(created, errors)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+
+        for namespace in changed_namespaces:
+            menu_cache.invalidate(namespace)
+
+        for order in created:
+            OrderService._publish_event("order.created", order)
+        return created, errors
+
+    @staticmethod
+    async def _allocate_stock(db: AsyncSession, valid_orders: List[Tuple[int, OrderCreate, Dict[int, int]]]
+                              ) -> Tuple[List[Tuple[int, OrderCreate, Dict[int, int]]], List[OrderBulkError], List[str]]:
+        """Reserves the tracked ingredients the orders need, in the caller's transaction.
+
+        The stock rows of the needed ingredients are locked, the orders are served in request order
+        from the locked stock, and the total is subtracted with one UPDATE. Orders that don't fit
+        are rejected per index. Returns the accepted orders, the rejections and the cache namespaces
+        to invalidate after the commit."""
+        burger_ids = {burger_id for _, _, quantities in valid_orders for burger_id in quantities}
+        recipes: Dict[int, List[Row]] = {}
+        for line in await crud_ingredient.get_tracked_recipe_lines(db, burger_ids):
+            recipes.setdefault(line.burger_id, []).append(line)
+        if not recipes:
+            return valid_orders, [], []
+
+        stock = await crud_ingredient.lock_ingredient_stock(
+            db, {line.ingredient_id for lines in recipes.values() for line in lines})
+        remaining = {ingredient_id: row.stock_quantity for ingredient_id, row in stock.items()}
+
+        accepted, errors = [], []
+        for index, order_in, quantities in valid_orders:
+            needed: Dict[int, int] = {}
+            for burger_id, quantity in quantities.items():
+                for line in recipes.get(burger_id, []):
+                    needed[line.ingredient_id] = needed.get(line.ingredient_id, 0) + line.quantity * quantity
+            short_ids = [ingredient_id for ingredient_id, amount in needed.items()
+                         if remaining.get(ingredient_id) is not None and remaining[ingredient_id] < amount]
+            if short_ids:
+                errors.append(OrderBulkError(
+                    index=index, detail=f"Not enough '{stock[short_ids[0]].name}' in stock for this order."))
+                continue
+            for ingredient_id, amount in needed.items():
+                if remaining.get(ingredient_id) is not None:
+                    remaining[ingredient_id] -= amount
+            accepted.append((index, order_in, quantities))
+
+        amounts = {ingredient_id: row.stock_quantity - remaining[ingredient_id]
+                   for ingredient_id, row in stock.items()
+                   if row.stock_quantity is not None and row.stock_quantity != remaining[ingredient_id]}
+        if not amounts:
+            return accepted, errors, []
+
+        return accepted, errors, await crud_ingredient.adjust_ingredient_stock(db, amounts)
+
+    @staticmethod
+    async def _reserve_stock_difference(db: AsyncSession, existing: Dict[int, int], wanted: Dict[int, int]) -> List[str]:
+        """Reserves the tracked ingredients an order edit adds and returns the ones it removes (all of them when
+        the edit cancels the order), in the caller's transaction, with the same id-ordered row locks as
+        _allocate_stock. The difference is computed from the current recipes. Raises ValueError when the stock doesn't cover the additional
+        need. Returns the cache namespaces to invalidate after the commit."""
+        deltas = {burger_id: wanted.get(burger_id, 0) - existing.get(burger_id, 0)
+                  for burger_id in existing.keys() | wanted.keys()}
+        deltas = {burger_id: delta for burger_id, delta in deltas.items() if delta}
+        if not deltas:
+            return []
+
+        amounts: Dict[int, int] = {}
+        for line in await crud_ingredient.get_tracked_recipe_lines(db, deltas):
+            amounts[line.ingredient_id] = amounts.get(line.ingredient_id, 0) + line.quantity * deltas[line.burger_id]
+        if not any(amounts.values()):
+            return []
+
+        stock = await crud_ingredient.lock_ingredient_stock(db, amounts)
+        amounts = {ingredient_id: amount for ingredient_id, amount in amounts.items()
+                   if amount and ingredient_id in stock and stock[ingredient_id].stock_quantity is not None}
+        short_ids = [ingredient_id for ingredient_id, amount in amounts.items()
+                     if stock[ingredient_id].stock_quantity < amount]
+        if short_ids:
+            raise ValueError(f"Not enough '{stock[short_ids[0]].name}' in stock for this order.")
+        # negative amounts put the stock of removed lines back
+        return await crud_ingredient.adjust_ingredient_stock(db, amounts)
 
     @staticmethod
     async def update_order(db: AsyncSession, order_id: int, order_in: OrderUpdate) -> Optional[OrderResponse]:
         try:
-            await crud_order.update_order(db, order_id, order_in)
-            order = await OrderService.get_order_by_id_with_total_price(db, order_id)
-            logging.info(f"Order {order_id} updated successfully via OrderService.")
+            changed_namespaces: List[str] = []
+
+            async def reserve_stock(existing: Dict[int, int], wanted: Dict[int, int]) -> None:
+                changed_namespaces.extend(await OrderService._reserve_stock_difference(db, existing, wanted))
+
+            order_db = await crud_order.update_order(db, order_id, order_in, reserve_stock)
+            if order_db is None:
+                logger.warning("Order with id %s not found for update via OrderService.", order_id)
+                return None
+            for namespace in changed_namespaces:
+                menu_cache.invalidate(namespace)
+            order = await OrderService._build_order_response(order_db)
+            OrderService._publish_event("order.updated", order)
+            logger.info("Order %s updated successfully via OrderService.", order_id)
             return order
         except ValueError as e:
-            logging.warning(f"Failed to update order via OrderService: {str(e)}.")
+            logger.warning("Failed to update order via OrderService: %s.", e)
             raise
         except Exception as e:
-            logging.error(f"Unexpected error in OrderService during order update: {str(e)}.")
+            logger.error("Unexpected error in OrderService during order update: %s.", e)
             raise
 
     @staticmethod
-    async def _calculate_total_price(order: Order) -> float:
+    async def update_order_status(db: AsyncSession, order_id: int,
+                                  status_in: OrderStatusUpdate) -> Optional[OrderStatusResponse]:
         try:
-            total_price = 0.0
-            for item in order.burger_items:
-                total_price += item.burger.price * item.quantity
-            logging.debug(f"Total price for order {order.id} is {total_price} via OrderService.")
-            return total_price
+            changed_namespaces: List[str] = []
+            row = await crud_order.update_order_status(db, order_id, status_in.status, status_in.expected_status,
+                                                       OrderService._stock_release(db, changed_namespaces)
+                                                       if status_in.status == OrderStatus.Cancelled else None)
+            for namespace in changed_namespaces:
+                menu_cache.invalidate(namespace)
+            if row is None:
+                current_status = (await crud_order.get_order_statuses(db, [order_id])).get(order_id)
+                if current_status is None:
+                    logger.warning("Order with id %s not found for status update via OrderService.", order_id)
+                    return None
+                raise ValueError(f"Order {order_id} can't be moved from {current_status.value} "
+                                 f"to {status_in.status.value}.")
+            order = OrderStatusResponse.model_validate(row)
+            order_events.publish("order.status_changed", order.model_dump(mode="json"))
+            logger.info("Order %s moved to %s via OrderService.", order_id, order.status.value)
+            return order
+        except ValueError as e:
+            logger.warning("Failed to update order status via OrderService: %s", e)
+            raise
         except Exception as e:
-            logging.error(f"Unexpected error in OrderService during order total price calculation: {str(e)}.")
+            logger.error("Unexpected error in OrderService during order status update: %s.", e)
             raise
 
     @staticmethod
-    async def get_order_by_id_with_total_price(db: AsyncSession, order_id: int) -> OrderResponse:
+    async def update_orders_status(db: AsyncSession, order_ids: List[int],
+                                   status: OrderStatus) -> OrderBatchStatusResponse:
         try:
-            order_db = await crud_order.get_order_by_id(db, order_id)
-            if order_db is None:
-                logging.debug(f"Order with id {order_id} not found in DB.")
-                return None
+            changed_namespaces: List[str] = []
+            rows = await crud_order.update_orders_status(db, set(order_ids), status,
+                                                         OrderService._stock_release(db, changed_namespaces)
+                                                         if status == OrderStatus.Cancelled else None)
+            for namespace in changed_namespaces:
+                menu_cache.invalidate(namespace)
+            updated = [OrderStatusResponse.model_validate(row) for row in rows]
+            updated_ids = {order.id for order in updated}
 
-            total_price = await OrderService._calculate_total_price(order_db)
+            errors: List[OrderStatusError] = []
+            rejected_ids = [order_id for order_id in dict.fromkeys(order_ids) if order_id not in updated_ids]
+            if rejected_ids:
+                current_statuses = await crud_order.get_order_statuses(db, rejected_ids)
+                for order_id in rejected_ids:
+                    current_status = current_statuses.get(order_id)
+                    detail = (f"Order {order_id} wasn't found in DB." if current_status is None else
+                              f"Order {order_id} can't be moved from {current_status.value} to {status.value}.")
+                    errors.append(OrderStatusError(order_id=order_id, detail=detail))
 
-            customer_response = None
-            if order_db.customer:
-                customer_response = CustomerResponse.model_validate(order_db.customer)
+            for order in updated:
+                order_events.publish("order.status_changed", order.model_dump(mode="json"))
+            logger.info("Batch status update to %s via OrderService: %s moved, %s rejected.",
+                        status.value, len(updated), len(errors))
+            return OrderBatchStatusResponse(updated=updated, errors=errors)
+        except Exception as e:
+            logger.error("Unexpected error in OrderService during batch order status update: %s.", e)
+            raise
 
-            order_data = {
-                "id": order_db.id,
-                "customer": customer_response,
-                "customer_id": order_db.customer_id,
-                "created_at": order_db.created_at,
-                "status": order_db.status,
-                "burgers_with_quantity": order_db.burgers_with_quantity,
-                "total_price": total_price}
+    @staticmethod
+    def _stock_release(db: AsyncSession, changed_namespaces: List[str]) -> Callable[[List[int]], Awaitable[None]]:
+        """Hook for the crud writes that end the hold of orders on their stock (deleting or cancelling them):
+        puts back the stock of the given orders and collects the cache namespaces to invalidate after the commit"""
+        async def release_stock(order_ids: List[int]) -> None:
+            changed_namespaces.extend(await crud_ingredient.release_order_stock(db, order_ids))
+        return release_stock
 
-            order_response = OrderResponse.model_validate(order_data)
+    @staticmethod
+    def _publish_event(event_type: str, order: OrderResponse) -> None:
+        """Pushes the committed order to the live order board"""
+        order_events.publish(event_type, order.model_dump(mode="json"))
 
-            logging.info(f"Order {order_id} ('{order_db.id}') found successfully in DB by ID via OrderService.")
-            return order_response
+    @staticmethod
+    def _lines_total(quantities: Dict[int, int], burgers: Dict[int, Row]) -> float:
+        return sum(burgers[burger_id].price * quantity for burger_id, quantity in quantities.items())
+
+    @staticmethod
+    async def _build_order_response(order_db: Order) -> OrderResponse:
+        customer_response = None
+        if order_db.customer:
+            customer_response = CustomerResponse.model_validate(order_db.customer)
+
+        order_data = {
+            "id": order_db.id,
+            "customer": customer_response,
+            "customer_id": order_db.customer_id,
+            "created_at": order_db.created_at,
+            "status": order_db.status,
+            "burgers_with_quantity": order_db.burgers_with_quantity,
+            "total_price": order_db.total_price}
+        return OrderResponse.model_validate(order_data)
+
+    @staticmethod
+    async def get_order_stamp(db: AsyncSession, order_id: int) -> Optional[Row]:
+        try:
+            stamp = await crud_order.get_order_stamp(db, order_id)
+            if stamp is None:
+                logger.debug("Order with id %s not found in DB.", order_id)
+            return stamp
         except Exception as e:
-            logging.error(f"Unexpected error in OrderService during order retrieval by ID: {str(e)}.")
+            logger.error("Unexpected error in OrderService during order stamp retrieval: %s.", e)
             raise
 
     @staticmethod
-    async def get_all_orders(db: AsyncSession, offset: int = 0, limit: int = 100) -> List[OrderResponse]:
+    async def get_order_by_id_with_total_price(db: AsyncSession, order_id: int) -> OrderResponse:
         try:
-            orders_db = await crud_order.get_all_orders(db, offset, limit)
-            orders_response = []
+            row = await crud_order.get_order_summary(db, order_id)
+            if row is None:
+                logger.debug("Order with id %s not found in DB.", order_id)
+                return None
 
-            for order_db in orders_db:
-                total_price = await OrderService._calculate_total_price(order_db)
+            order_response = OrderService._build_order_response_from_row(row)
 
-                customer_response = None
-                if order_db.customer:
-                    customer_response = CustomerResponse.model_validate(order_db.customer)
+            logger.debug("Order %s ('%s') found successfully in DB by ID via OrderService.", order_id, row.id)
+            return order_response
+        except Exception as e:
+            logger.error("Unexpected error in OrderService during order retrieval by ID: %s.", e)
+            raise
 
-                order_data = {
-                    "id": order_db.id,
-                    "customer": customer_response,
-                    "customer_id": order_db.customer_id,
-                    "created_at": order_db.created_at,
-                    "status": order_db.status,
-                    "burgers_with_quantity": order_db.burgers_with_quantity,
-                    "total_price": total_price}
-
-                order_response = OrderResponse.model_validate(order_data)
-                orders_response.append(order_response)
-
-            logging.debug(f"Retrieved {len(orders_response)} orders, offset={offset}, limit={limit} via OrderService.")
-            return orders_response
+    @staticmethod
+    def _order_dict_from_row(row: Row) -> Dict[str, Any]:
+        """OrderResponse-shaped dict of an order summary row"""
+        return {
+            "customer_id": row.customer_id,
+            "id": row.id,
+            "customer": {"name": row.customer_name, "phone": row.customer_phone, "id": row.customer_id},
+            "created_at": row.created_at,
+            "status": row.status,
+            "burgers_with_quantity": row.burgers_with_quantity,
+            "total_price": row.total_price}
+
+    @staticmethod
+    def _build_order_response_from_row(row: Row) -> OrderResponse:
+        return OrderResponse.model_validate(OrderService._order_dict_from_row(row))
+
+    @staticmethod
+    async def get_all_orders(db: AsyncSession, offset: int = 0, limit: int = 100,
+                             after_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Orders as OrderResponse-shaped dicts built straight from the summary rows. The rows come from
+        our own query, so they aren't validated into models only to be validated again on the way out,
+        the endpoint encodes them as they are."""
+        try:
+            rows = await crud_order.get_all_orders_summary(db, offset, limit, after_id)
+            orders = [OrderService._order_dict_from_row(row) for row in rows]
+            logger.debug("Retrieved %s orders, offset=%s, limit=%s, after_id=%s via OrderService.", len(orders), offset, limit, after_id)
+            return orders
         except Exception as e:
-            logging.error(f"Unexpected error in OrderService during order retrieval: {str(e)}.")
+            logger.error("Unexpected error in OrderService during order retrieval: %s.", e)
+            raise
+
+    @staticmethod
+    async def stream_orders(db: AsyncSession, limit: int = 100,
+                            after_id: Optional[int] = None) -> AsyncIterator[OrderResponse]:
+        try:
+            async for row in crud_order.stream_orders_summary(db, limit, after_id):
+                yield OrderService._build_order_response_from_row(row)
+        except Exception as e:
+            logger.error("Unexpected error in OrderService during order streaming: %s.", e)
             raise
 
     @staticmethod
@@ -127,10 +500,16 @@ class OrderService:
         try:
             order = await OrderService.get_order_by_id_with_total_price(db, order_id)
             if order is None:
-                logging.warning(f"Order with id {order_id} not found for deletion via OrderService.")
+                logger.warning("Order with id %s not found for deletion via OrderService.", order_id)
+                return None
+            changed_namespaces: List[str] = []
+            if not await crud_order.delete_order(db, order_id,
+                                                 OrderService._stock_release(db, changed_namespaces)):
                 return None
-            await crud_order.delete_order(db, order_id)
-            logging.info(f"Order {order_id} deleted successfully via OrderService.")
+            for namespace in changed_namespaces:
+                menu_cache.invalidate(namespace)
+            order_events.publish("order.deleted", {"id": order_id})
+            logger.info("Order %s deleted successfully via OrderService.", order_id)
             return order
         except Exception as e:
-            logging.error(f"Unexpected error in OrderService during order deletion: {str(e)}.")
\ No newline at end of file
+            logger.error("Unexpected error in OrderService during order deletion: %s.", e)
\ No newline at end of file
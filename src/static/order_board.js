@@ -0,0 +1,89 @@
+document.addEventListener('DOMContentLoaded', function () {
+    const orderBoard = document.getElementById('order-board');
+    if (!orderBoard || typeof EventSource === 'undefined') return;
+
+    const tableBody = orderBoard.querySelector('tbody');
+
+    function formatCreatedAt(value) {
+        return value ? value.slice(0, 16).replace('T', ' ') : 'N/A';
+    }
+
+    function setItems(cell, burgersWithQuantity) {
+        cell.innerHTML = '';
+        const entries = Object.entries(burgersWithQuantity || {});
+        if (entries.length === 0) {
+            cell.textContent = 'No items';
+            return;
+        }
+        entries.forEach(([burgerName, quantity]) => {
+            cell.appendChild(document.createTextNode(`${burgerName} (x${quantity})`));
+            cell.appendChild(document.createElement('br'));
+        });
+    }
+
+    function fillRow(row, order) {
+        row.querySelector('[data-field="customer"]').textContent = order.customer ? order.customer.name : 'N/A';
+        row.querySelector('[data-field="created_at"]').textContent = formatCreatedAt(order.created_at);
+        row.querySelector('[data-field="status"]').textContent = order.status || 'N/A';
+        setItems(row.querySelector('[data-field="items"]'), order.burgers_with_quantity);
+        row.querySelector('[data-field="total_price"]').textContent = `$${(order.total_price || 0).toFixed(2)}`;
+    }
+
+    function buildRow(order) {
+        const row = document.createElement('tr');
+        row.dataset.orderId = order.id;
+        row.innerHTML = `
+            <td>${order.id}</td>
+            <td data-field="customer"></td>
+            <td data-field="created_at"></td>
+            <td data-field="status"></td>
+            <td data-field="items"></td>
+            <td data-field="total_price"></td>
+            <td style="white-space: nowrap;">
+                <a href="/orders/${order.id}/edit" class="button" style="background-color: #f0ad4e; margin-right: 5px;">Edit</a>
+                <form method="POST" action="/orders/${order.id}/delete" style="display: inline;"
+                      onsubmit="return confirm('Are you sure you want to delete order #${order.id}?');">
+                    <button type="submit" class="button delete">Delete</button>
+                </form>
+            </td>
+        `;
+        fillRow(row, order);
+        return row;
+    }
+
+    function findRow(orderId) {
+        return tableBody.querySelector(`tr[data-order-id="${orderId}"]`);
+    }
+
+    function onOrderChanged(event) {
+        const order = JSON.parse(event.data);
+        const row = findRow(order.id);
+        if (row) {
+            fillRow(row, order);
+            return;
+        }
+        // Orders are listed by ascending id, so new ones only belong on the last page
+        if (event.type !== 'order.created' || document.getElementById('next-page-link')) return;
+        const emptyRow = document.getElementById('no-orders-row');
+        if (emptyRow) emptyRow.remove();
+        tableBody.appendChild(buildRow(order));
+    }
+
+    function onOrderStatusChanged(event) {
+        const order = JSON.parse(event.data);
+        const row = findRow(order.id);
+        if (row) row.querySelector('[data-field="status"]').textContent = order.status;
+    }
+
+    function onOrderDeleted(event) {
+        const order = JSON.parse(event.data);
+        const row = findRow(order.id);
+        if (row) row.remove();
+    }
+
+    const eventSource = new EventSource(orderBoard.dataset.streamUrl);
+    eventSource.addEventListener('order.created', onOrderChanged);
+    eventSource.addEventListener('order.updated', onOrderChanged);
+    eventSource.addEventListener('order.status_changed', onOrderStatusChanged);
+    eventSource.addEventListener('order.deleted', onOrderDeleted);
+});
@@ -134,6 +134,74 @@ document.addEventListener('DOMContentLoaded', function () {
         });
     });
 
+    // Customer typeahead: queries /customers/search as the user types and fills the hidden customer_id
+    const customerSearchInput = document.getElementById('customer_search');
+    const customerIdInput = document.getElementById('customer_id');
+    const customerResults = document.getElementById('customer-search-results');
+    let searchTimer = null;
+    let searchController = null;
+
+    function hideCustomerResults() {
+        customerResults.hidden = true;
+        customerResults.innerHTML = '';
+    }
+
+    function showCustomerResults(customers) {
+        customerResults.innerHTML = '';
+        if (customers.length === 0) {
+            const emptyItem = document.createElement('li');
+            emptyItem.classList.add('placeholder');
+            emptyItem.textContent = 'No customers found.';
+            customerResults.appendChild(emptyItem);
+        }
+        customers.forEach(customer => {
+            const resultItem = document.createElement('li');
+            resultItem.textContent = `${customer.name} (${customer.phone})`;
+            resultItem.addEventListener('mousedown', function(event) {
+                event.preventDefault(); // keep focus so blur doesn't hide the list before the click
+                customerIdInput.value = customer.id;
+                customerSearchInput.value = resultItem.textContent;
+                hideCustomerResults();
+            });
+            customerResults.appendChild(resultItem);
+        });
+        customerResults.hidden = false;
+    }
+
+    async function searchCustomers(queryText) {
+        if (searchController) searchController.abort();
+        searchController = new AbortController();
+        const url = `${customerSearchInput.dataset.searchUrl}?q=${encodeURIComponent(queryText)}`;
+        try {
+            const response = await fetch(url, { signal: searchController.signal });
+            if (!response.ok) return;
+            showCustomerResults(await response.json());
+        } catch (error) {
+            if (error.name !== 'AbortError') console.error('Customer search failed:', error);
+        }
+    }
+
+    if (customerSearchInput && customerIdInput && customerResults) {
+        customerSearchInput.addEventListener('input', function() {
+            customerIdInput.value = ''; // typed text no longer matches the chosen customer
+            clearTimeout(searchTimer);
+            const queryText = this.value.trim();
+            if (!queryText) {
+                hideCustomerResults();
+                return;
+            }
+            searchTimer = setTimeout(() => searchCustomers(queryText), 250);
+        });
+        customerSearchInput.addEventListener('blur', hideCustomerResults);
+    }
+
+    orderForm.addEventListener('submit', function(event) {
+        if (customerIdInput && !customerIdInput.value) {
+            event.preventDefault();
+            alert("Please choose a customer from the search results.");
+        }
+    });
+
     // Initial render of items (e.g., for edit mode)
     renderOrderItems();
 });
\ No newline at end of file
@@ -0,0 +1,86 @@
+import os
+import re
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+import pytest
+
+# the suite drops and recreates every table, so it only runs against the scratch database named in TEST_DB_NAME
+TEST_DB_NAME = os.getenv("TEST_DB_NAME")
+if TEST_DB_NAME:
+    os.environ["DB_NAME"] = TEST_DB_NAME
+# the background jobs would run their own queries next to the ones the tests count
+for variable in ("CACHE_LISTENER_ENABLED", "ANALYTICS_ROLLUP_ENABLED", "IDEMPOTENCY_CLEANUP_ENABLED"):
+    os.environ[variable] = "false"
+os.environ.setdefault("DB_ECHO", "false")
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+async def _reset_database() -> None:
+    from src.database.database import AsyncSessionLocal, init_db
+    from src.scripts.create_initial_ingredients import create_initial_ingredients, initial_ingredients
+
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        await create_initial_ingredients(db, initial_ingredients)
+
+
+@pytest.fixture(scope="session")
+def client():
+    """TestClient on a freshly created schema with the initial ingredients. The whole session shares it,
+    so the pooled connections stay on the event loop of its portal."""
+    if not TEST_DB_NAME:
+        pytest.skip("TEST_DB_NAME isn't set, the database tests need a scratch database")
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy.exc import SQLAlchemyError
+    from src.main import app
+
+    with TestClient(app) as test_client:
+        try:
+            test_client.portal.call(_reset_database)
+        except (OSError, SQLAlchemyError) as e:
+            pytest.skip(f"Test database {TEST_DB_NAME} isn't reachable: {e}")
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def empty_menu_cache():
+    """Every test starts uncached, so the queries it counts don't depend on the tests before it"""
+    from src.core.cache import menu_cache
+
+    menu_cache.invalidate()
+
+
+@pytest.fixture
+def query_count() -> Callable[[Any], int]:
+    """Statements a request ran, read from the Server-Timing header of its response"""
+    def count(response) -> int:
+        return int(SERVER_TIMING_QUERIES.search(response.headers["server-timing"]).group(1))
+    return count
+
+
+@pytest.fixture
+def ingredient_ids(client) -> List[int]:
+    response = client.get("/ingredients/")
+    assert response.status_code == 200
+    return [ingredient["id"] for ingredient in response.json()]
+
+
+@pytest.fixture
+def make_customer(client) -> Callable[..., Dict[str, Any]]:
+    def make(name: str = "Test customer", phone: Optional[str] = None) -> Dict[str, Any]:
+        response = client.post("/customers/", json={"name": name, "phone": phone or f"+{uuid.uuid4().int % 10**12}"})
+        assert response.status_code == 201, response.text
+        return response.json()
+    return make
+
+
+@pytest.fixture
+def make_burger(client, ingredient_ids) -> Callable[..., Dict[str, Any]]:
+    def make(price: float = 5.0, ingredients: Optional[List[int]] = None) -> Dict[str, Any]:
+        response = client.post("/burgers/", json={"name": f"Burger {uuid.uuid4().hex[:12]}", "price": price,
+                                                  "ingredient_ids": ingredients or ingredient_ids[:2]})
+        assert response.status_code in (200, 201), response.text
+        return response.json()
+    return make
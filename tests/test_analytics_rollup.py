@@ -0,0 +1,90 @@
+"""Order writes mark their hours dirty without waiting on each other, and the rollup job recomputes every hour
+whose orders or recipes changed, including hours written while it ran"""
+import asyncio
+
+import httpx
+
+
+def _run_rollups(client) -> int:
+    from src.core.analytics_job import AnalyticsRollupJob
+
+    return client.portal.call(AnalyticsRollupJob().run_once)
+
+
+def _sold(client, burger) -> int:
+    top = client.get("/analytics/top-burgers", params={"limit": 100}).json()
+    return sum(row["quantity"] for row in top if row["burger_id"] == burger["id"])
+
+
+def _consumed(client, ingredient_id) -> int:
+    rows = client.get("/analytics/ingredient-consumption").json()
+    return sum(row["quantity"] for row in rows if row["ingredient_id"] == ingredient_id)
+
+
+def _order(customer, burger, quantity=1) -> dict:
+    return {"customer_id": customer["id"], "items": [{"burger_id": burger["id"], "quantity": quantity}]}
+
+
+def test_order_writes_in_one_hour_dont_wait_for_each_other(client, make_customer, make_burger):
+    """An uncommitted order doesn't hold up another order of the same hour"""
+    from sqlalchemy import insert
+    from src.database.database import AsyncSessionLocal
+    from src.database.models.order import Order
+    from src.main import app
+
+    customer, burger = make_customer(), make_burger()
+
+    async def write_concurrently():
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(Order).values(customer_id=customer["id"], total_price=0))
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                         base_url="http://test") as async_client:
+                response = await asyncio.wait_for(async_client.post("/orders/", json=_order(customer, burger)), 5)
+            await db.rollback()
+            return response
+
+    assert client.portal.call(write_concurrently).status_code == 201
+
+
+def test_hour_written_during_recompute_stays_dirty(client, make_customer, make_burger):
+    from sqlalchemy import insert
+    from src.core.analytics_job import AnalyticsRollupJob
+    from src.database.database import AsyncSessionLocal
+    from src.database.models.order import Order
+    from src.database.models.order_burger_item import OrderBurgerItem
+
+    customer, burger = make_customer(), make_burger()
+    assert client.post("/orders/", json=_order(customer, burger)).status_code == 201
+    _run_rollups(client)
+    assert _sold(client, burger) == 1
+
+    async def write_around_recompute():
+        async with AsyncSessionLocal() as db:
+            order_id = (await db.execute(insert(Order).values(customer_id=customer["id"], total_price=5.0)
+                                         .returning(Order.id))).scalar_one()
+            await db.execute(insert(OrderBurgerItem).values(order_id=order_id, burger_id=burger["id"],
+                                                            quantity=2, unit_price=5.0))
+            await AnalyticsRollupJob().run_once()
+            await db.commit()
+
+    client.portal.call(write_around_recompute)
+    # the recompute ran before the write committed, the write's own mark brings the hour back
+    assert _sold(client, burger) == 1
+    assert _run_rollups(client) >= 1
+    assert _sold(client, burger) == 3
+
+
+def test_recipe_change_recomputes_consumption_of_past_orders(client, make_customer, make_burger, ingredient_ids):
+    first, second = ingredient_ids[3], ingredient_ids[4]
+    customer, burger = make_customer(), make_burger(ingredients=[first, first])
+    assert client.post("/orders/", json=_order(customer, burger, quantity=3)).status_code == 201
+    _run_rollups(client)
+    consumed_first, consumed_second = _consumed(client, first), _consumed(client, second)
+
+    response = client.put(f"/burgers/{burger['id']}", json={"price": burger["price"], "ingredient_ids": [second]})
+    assert response.status_code == 200, response.text
+    assert _run_rollups(client) >= 1
+
+    # every hour agrees on the current recipe
+    assert _consumed(client, first) == consumed_first - 6
+    assert _consumed(client, second) == consumed_second + 3
@@ -0,0 +1,71 @@
+"""Customer writes rely on the unique phone constraint, so concurrent writes of one phone can't both succeed
+and the loser gets a 409 instead of a 500"""
+import asyncio
+import uuid
+
+import httpx
+
+ROUNDS = 10
+
+
+def _phone() -> str:
+    return f"+{uuid.uuid4().int % 10**12}"
+
+
+def _send_together(client, *requests):
+    """Sends the requests at the same time on the app's event loop, each gets its own session and connection"""
+    from src.main import app
+
+    async def send():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as async_client:
+            return await asyncio.gather(*(async_client.request(method, url, json=body)
+                                          for method, url, body in requests))
+    return client.portal.call(send)
+
+
+def test_concurrent_creates_with_one_phone(client):
+    for _ in range(ROUNDS):
+        phone = _phone()
+        responses = _send_together(client, *[("POST", "/customers/", {"name": f"Customer {index}", "phone": phone})
+                                              for index in range(2)])
+
+        assert sorted(response.status_code for response in responses) == [201, 409]
+        assert [customer["phone"] for customer in client.get("/customers/search", params={"q": phone}).json()] == [phone]
+
+
+def test_concurrent_updates_to_one_phone(client, make_customer):
+    for _ in range(ROUNDS):
+        phone = _phone()
+        customers = [make_customer(), make_customer()]
+        responses = _send_together(client, *[("PUT", f"/customers/{customer['id']}", {"phone": phone})
+                                              for customer in customers])
+
+        assert sorted(response.status_code for response in responses) == [200, 409]
+        assert len(client.get("/customers/search", params={"q": phone}).json()) == 1
+
+
+def test_create_waits_for_an_uncommitted_insert_of_the_phone(client):
+    """The conflicting row isn't visible yet when the request starts: ON CONFLICT waits for it instead of
+    a check that would miss it"""
+    from sqlalchemy import insert
+    from src.database.database import AsyncSessionLocal
+    from src.database.models.customer import Customer
+    from src.main import app
+
+    phone = _phone()
+
+    async def race():
+        async with AsyncSessionLocal() as db:
+            await db.execute(insert(Customer).values(name="First", phone=phone))
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                                         base_url="http://test") as async_client:
+                request = asyncio.create_task(async_client.post("/customers/", json={"name": "Second", "phone": phone}))
+                await asyncio.sleep(0.2)
+                assert not request.done()
+                await db.commit()
+                return await request
+
+    response = client.portal.call(race)
+
+    assert response.status_code == 409
+    assert [customer["name"] for customer in client.get("/customers/search", params={"q": phone}).json()] == ["First"]
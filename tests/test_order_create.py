@@ -0,0 +1,82 @@
+# ingredient stock tracked by the tests in this module, the other modules use the first ingredients untracked
+TRACKED_INGREDIENT = -1
+
+
+def _order(customer, burgers, quantity=1):
+    return {"customer_id": customer["id"], "items": [{"burger_id": burger["id"], "quantity": quantity}
+                                                     for burger in burgers]}
+
+
+def test_create_order_takes_two_statements(client, make_customer, make_burger, query_count):
+    customer = make_customer()
+    burgers = [make_burger(price=price) for price in (4.5, 6.0, 7.25)]
+
+    response = client.post("/orders/", json=_order(customer, burgers, quantity=2))
+
+    assert response.status_code == 201, response.text
+    # locking the tracked stock and the checked INSERT, the COMMIT isn't counted
+    assert query_count(response) == 2
+    order = response.json()
+    assert order["customer"] == customer
+    assert order["total_price"] == 35.5
+    assert order["burgers_with_quantity"] == {burger["name"]: 2 for burger in burgers}
+    assert client.get(f"/orders/{order['id']}").json()["total_price"] == 35.5
+
+
+def test_create_order_with_tracked_stock(client, make_customer, make_burger, ingredient_ids, query_count):
+    ingredient_id = ingredient_ids[TRACKED_INGREDIENT]
+    assert client.put(f"/ingredients/{ingredient_id}/stock", json={"stock_quantity": 10}).status_code == 200
+    customer = make_customer()
+    burger = make_burger(ingredients=[ingredient_id, ingredient_id])
+
+    response = client.post("/orders/", json=_order(customer, [burger], quantity=3))
+    assert response.status_code == 201, response.text
+    # 4 left, still enough for the recipe, so availability isn't recomputed
+    assert query_count(response) == 2
+    assert client.get(f"/ingredients/{ingredient_id}").json()["stock_quantity"] == 4
+
+    response = client.post("/orders/", json=_order(customer, [burger], quantity=2))
+    assert response.status_code == 201, response.text
+    # the recipe needs 2, the burger sells out: availability refresh and its NOTIFY
+    assert query_count(response) == 4
+    assert client.get(f"/ingredients/{ingredient_id}").json()["stock_quantity"] == 0
+    assert client.get(f"/burgers/{burger['id']}").json()["is_available"] is False
+
+    response = client.post("/orders/", json=_order(customer, [burger]))
+    assert response.status_code == 409
+    assert "in stock" in response.json()["detail"]
+
+
+def test_create_order_rejects_unknown_customer_and_burger(client, make_customer, make_burger, ingredient_ids):
+    ingredient_id = ingredient_ids[TRACKED_INGREDIENT - 1]
+    assert client.put(f"/ingredients/{ingredient_id}/stock", json={"stock_quantity": 10}).status_code == 200
+    customer = make_customer()
+    burger = make_burger(ingredients=[ingredient_id])
+
+    response = client.post("/orders/", json=_order({"id": 10**9}, [burger]))
+    assert response.status_code == 409
+    assert response.json()["detail"] == f"Customer with ID {10**9} wasn't found in DB."
+
+    response = client.post("/orders/", json=_order(customer, [burger, {"id": 10**9}]))
+    assert response.status_code == 409
+    assert response.json()["detail"] == f"Burger with ID {10**9} wasn't found in DB."
+
+    # neither attempt wrote an order or took stock
+    assert client.get(f"/ingredients/{ingredient_id}").json()["stock_quantity"] == 10
+    orders = client.get("/orders/", params={"limit": 1000}).json()
+    assert all(order["customer_id"] != customer["id"] for order in orders)
+
+
+def test_create_order_replays_idempotency_key(client, make_customer, make_burger, query_count):
+    customer = make_customer()
+    burger = make_burger()
+    headers = {"Idempotency-Key": f"order-{customer['id']}"}
+
+    created = client.post("/orders/", json=_order(customer, [burger]), headers=headers)
+    replayed = client.post("/orders/", json=_order(customer, [burger]), headers=headers)
+
+    assert created.status_code == 201, created.text
+    assert replayed.status_code == 201
+    assert replayed.json() == created.json()
+    # claiming the key and storing the response come on top of the two order statements
+    assert query_count(created) == 4
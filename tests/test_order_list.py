@@ -0,0 +1,45 @@
+"""GET /orders/ encodes the summary dicts with orjson instead of going through response_model, the body has to stay
+what FastAPI produced from List[OrderResponse]"""
+import uuid
+from typing import List
+
+
+def _response_model_body(orders) -> bytes:
+    """Body FastAPI renders for a List[OrderResponse] response_model: the models are dumped, validated against the
+    model and dumped in JSON mode, then rendered by the default JSONResponse"""
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+    from src.database.schemes.order import OrderResponse
+
+    adapter = TypeAdapter(List[OrderResponse])
+    validated = adapter.validate_python([order.model_dump(by_alias=True) for order in orders])
+    return JSONResponse(adapter.dump_python(validated, mode="json", by_alias=True)).body
+
+
+def test_order_list_body_matches_response_model(client, make_customer, make_burger):
+    from src.core.responses import FastJSONResponse
+    from src.database.crud import order as crud_order
+    from src.database.database import AsyncSessionLocal
+    from src.services.order import OrderService
+
+    customer = make_customer(name="Zoë Ørsted \"quoted\"")
+    plain, named = make_burger(price=4.1), make_burger(price=3.3)
+    response = client.put(f"/burgers/{named['id']}", json={"name": f"Crème brûlée 🍔 {uuid.uuid4().hex[:8]}",
+                                                           "price": named["price"]})
+    assert response.status_code == 200, response.text
+    for items in ([plain], [plain, named], [named]):
+        response = client.post("/orders/", json={"customer_id": customer["id"],
+                                                  "items": [{"burger_id": burger["id"], "quantity": 3}
+                                                            for burger in items]})
+        assert response.status_code == 201, response.text
+
+    async def bodies():
+        async with AsyncSessionLocal() as db:
+            fast = FastJSONResponse(await OrderService.get_all_orders(db, 0, 1000)).body
+            rows = await crud_order.get_all_orders_summary(db, 0, 1000)
+            return fast, _response_model_body([OrderService._build_order_response_from_row(row) for row in rows])
+
+    fast, response_model = client.portal.call(bodies)
+    assert "Zoë".encode() in fast
+    assert fast == response_model
+    assert client.get("/orders/", params={"limit": 1000}).content == fast
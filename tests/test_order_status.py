@@ -0,0 +1,48 @@
+"""Every way of changing an order's status follows ORDER_STATUS_TRANSITIONS"""
+from src.core.pagination import encode_cursor
+
+
+def _order(client, customer, burger) -> dict:
+    response = client.post("/orders/", json={"customer_id": customer["id"],
+                                              "items": [{"burger_id": burger["id"], "quantity": 1}]})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def _put_status(client, order, status: str):
+    return client.put(f"/orders/{order['id']}", params={"order_id": order["id"]}, json={"status": status})
+
+
+def test_put_follows_status_transitions(client, make_customer, make_burger):
+    customer, burger = make_customer(), make_burger()
+    order = _order(client, customer, burger)
+
+    assert _put_status(client, order, "Completed").status_code == 409
+    assert client.get(f"/orders/{order['id']}").json()["status"] == "Pending"
+
+    for status in ("Pending", "Processing", "Processing", "Completed"):
+        response = _put_status(client, order, status)
+        assert response.status_code == 200, response.text
+        assert response.json()["status"] == status
+
+    for status in ("Pending", "Processing", "Cancelled"):
+        assert _put_status(client, order, status).status_code == 409
+    assert client.get(f"/orders/{order['id']}").json()["status"] == "Completed"
+
+
+def test_web_forms_follow_status_transitions(client, make_customer, make_burger):
+    customer, burger = make_customer(), make_burger()
+    order = _order(client, customer, burger)
+    form = {"customer_id": customer["id"], "item_burger_ids": [burger["id"]], "item_quantities": [1]}
+
+    response = client.post("/orders/new", data={**form, "status": "Completed"}, follow_redirects=False)
+    assert response.status_code == 400
+    assert client.get("/orders/", params={"after": encode_cursor(order["id"])}).json() == []
+
+    response = client.post(f"/orders/{order['id']}/edit", data={**form, "status": "Completed"}, follow_redirects=False)
+    assert response.status_code == 400
+    assert client.get(f"/orders/{order['id']}").json()["status"] == "Pending"
+
+    response = client.post(f"/orders/{order['id']}/edit", data={**form, "status": "Cancelled"}, follow_redirects=False)
+    assert response.status_code == 303
+    assert client.get(f"/orders/{order['id']}").json()["status"] == "Cancelled"
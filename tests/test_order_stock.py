@@ -0,0 +1,90 @@
+"""Orders hold the tracked stock of their lines while Pending or Processing. Deleting or cancelling them gives it
+back in the same transaction, a Completed order used it up."""
+import pytest
+
+# ingredient stock tracked by the tests in this module, test_order_create tracks the last two
+TRACKED_INGREDIENT = -3
+STOCK = 10
+
+
+@pytest.fixture
+def stocked(client, make_customer, make_burger, ingredient_ids):
+    """A customer and a burger that needs 2 of an ingredient with a stock of 10, and a way to read the stock"""
+    ingredient_id = ingredient_ids[TRACKED_INGREDIENT]
+    assert client.put(f"/ingredients/{ingredient_id}/stock", json={"stock_quantity": STOCK}).status_code == 200
+    customer = make_customer()
+    burger = make_burger(ingredients=[ingredient_id, ingredient_id])
+
+    def order(quantity: int = 1) -> dict:
+        response = client.post("/orders/", json={"customer_id": customer["id"],
+                                                  "items": [{"burger_id": burger["id"], "quantity": quantity}]})
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    def stock() -> int:
+        return client.get(f"/ingredients/{ingredient_id}").json()["stock_quantity"]
+
+    def available() -> bool:
+        return client.get(f"/burgers/{burger['id']}").json()["is_available"]
+
+    return customer, order, stock, available
+
+
+def test_delete_returns_stock(client, stocked):
+    _, order, stock, available = stocked
+    created = order(quantity=5)
+    assert stock() == 0 and available() is False
+
+    assert client.delete(f"/orders/{created['id']}").status_code == 200
+
+    assert stock() == STOCK
+    assert available() is True
+
+
+def test_cancel_returns_stock_once(client, stocked):
+    _, order, stock, _ = stocked
+    cancelled, batch_cancelled, edited = order(), order(), order()
+    assert stock() == 4
+
+    response = client.patch(f"/orders/{cancelled['id']}/status", json={"status": "Cancelled"})
+    assert response.status_code == 200, response.text
+    assert stock() == 6
+
+    response = client.patch("/orders/status", json={"order_ids": [batch_cancelled["id"]], "status": "Cancelled"})
+    assert response.status_code == 200 and response.json()["errors"] == [], response.text
+    assert stock() == 8
+
+    response = client.put(f"/orders/{edited['id']}", params={"order_id": edited["id"]}, json={"status": "Cancelled"})
+    assert response.status_code == 200, response.text
+    assert stock() == STOCK
+
+    # a cancelled order doesn't hold stock anymore, deleting it doesn't give any back
+    assert client.delete(f"/orders/{cancelled['id']}").status_code == 200
+    assert stock() == STOCK
+
+
+def test_completed_order_keeps_its_stock_used(client, stocked):
+    _, order, stock, _ = stocked
+    created = order()
+    for status in ("Processing", "Completed"):
+        assert client.patch(f"/orders/{created['id']}/status", json={"status": status}).status_code == 200
+
+    assert client.delete(f"/orders/{created['id']}").status_code == 200
+
+    assert stock() == STOCK - 2
+
+
+def test_customer_delete_returns_stock_of_its_orders(client, stocked):
+    customer, order, stock, available = stocked
+    order(quantity=2)
+    completed = order()
+    for status in ("Processing", "Completed"):
+        assert client.patch(f"/orders/{completed['id']}/status", json={"status": status}).status_code == 200
+    order(quantity=2)
+    assert stock() == 0 and available() is False
+
+    assert client.delete(f"/customers/{customer['id']}").status_code == 200
+
+    # the completed order's 2 stay used
+    assert stock() == STOCK - 2
+    assert available() is True
@@ -0,0 +1,204 @@
+"""Statements every endpoint runs, uncached. Each count has to stay within its budget and must not change when
+the order history grows, so relationship loading can't fan out into related rows (or N+1) unnoticed."""
+import uuid
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+# endpoint -> (request, most statements it may run). The request gets the client and fresh fixtures:
+# a customer with orders of burgers, and a burger nothing refers to.
+ENDPOINTS = {
+    # web pages
+    "GET /": (lambda client, w: client.get("/"), 0),
+    "GET /customers": (lambda client, w: client.get("/customers"), 1),
+    "GET /customers/new": (lambda client, w: client.get("/customers/new"), 0),
+    "POST /customers/new": (lambda client, w: client.post(
+        "/customers/new", data={"name": "Form customer", "phone": _phone()}), 2),
+    "GET /customers/{id}/edit": (lambda client, w: client.get(f"/customers/{w.customer['id']}/edit"), 1),
+    "POST /customers/{id}/edit": (lambda client, w: client.post(
+        f"/customers/{w.customer['id']}/edit", data={"name": "Renamed", "phone": _phone()}), 2),
+    # deletes lock the orders that hold stock and read what they reserved before deleting them
+    "POST /customers/{id}/delete": (lambda client, w: client.post(f"/customers/{w.customer['id']}/delete"), 5),
+    "GET /burgers": (lambda client, w: client.get("/burgers"), 2),
+    "GET /burgers/new": (lambda client, w: client.get("/burgers/new"), 2),
+    "POST /burgers/new": (lambda client, w: client.post(
+        "/burgers/new", data={"name": _name(), "price": 3.5, "ingredient_ids": w.ingredient_ids[:2]}), 8),
+    "GET /burgers/{id}/edit": (lambda client, w: client.get(f"/burgers/{w.burger['id']}/edit"), 5),
+    "POST /burgers/{id}/edit": (lambda client, w: client.post(
+        f"/burgers/{w.burger['id']}/edit", data={"name": _name(), "price": 4.5,
+                                                 "ingredient_ids": w.ingredient_ids[1:3]}), 13),
+    "POST /burgers/{id}/delete": (lambda client, w: client.post(f"/burgers/{w.spare_burger['id']}/delete"), 6),
+    "GET /burgers/htmx/get-ingredient-item/{id}": (lambda client, w: client.get(
+        f"/burgers/htmx/get-ingredient-item/{w.ingredient_ids[0]}"), 1),
+    "GET /orders": (lambda client, w: client.get("/orders"), 1),
+    "GET /orders/new": (lambda client, w: client.get("/orders/new"), 3),
+    "POST /orders/new": (lambda client, w: client.post(
+        "/orders/new", data={"customer_id": w.customer["id"], "item_burger_ids": [w.burger["id"]],
+                             "item_quantities": [2]}), 3),
+    "GET /orders/{id}/edit": (lambda client, w: client.get(f"/orders/{w.order['id']}/edit"), 6),
+    "POST /orders/{id}/edit": (lambda client, w: client.post(
+        f"/orders/{w.order['id']}/edit", data={"customer_id": w.customer["id"],
+                                               "item_burger_ids": [burger["id"] for burger in w.burgers],
+                                               "item_quantities": [3] * len(w.burgers), "status": "Processing"}), 14),
+    "POST /orders/{id}/delete": (lambda client, w: client.post(f"/orders/{w.order['id']}/delete"), 4),
+    # customers API
+    "POST /customers/": (lambda client, w: client.post("/customers/", json={"name": "Api", "phone": _phone()}), 2),
+    "PUT /customers/{id}": (lambda client, w: client.put(
+        f"/customers/{w.customer['id']}", json={"name": "Renamed"}), 2),
+    "GET /customers/search": (lambda client, w: client.get("/customers/search", params={"q": "Test"}), 1),
+    "GET /customers/{id}": (lambda client, w: client.get(f"/customers/{w.customer['id']}"), 1),
+    "GET /customers/": (lambda client, w: client.get("/customers/"), 1),
+    "DELETE /customers/{id}": (lambda client, w: client.delete(f"/customers/{w.customer['id']}"), 5),
+    # burgers API
+    "POST /burgers/": (lambda client, w: client.post(
+        "/burgers/", json={"name": _name(), "price": 3.5, "ingredient_ids": w.ingredient_ids[:2]}), 8),
+    "PUT /burgers/{id}": (lambda client, w: client.put(
+        f"/burgers/{w.burger['id']}", json={"price": 6.5, "ingredient_ids": w.ingredient_ids[1:3]}), 13),
+    "GET /burgers/{id}": (lambda client, w: client.get(f"/burgers/{w.burger['id']}"), 1),
+    "GET /burgers/": (lambda client, w: client.get("/burgers/"), 2),
+    "DELETE /burgers/{id}": (lambda client, w: client.delete(f"/burgers/{w.spare_burger['id']}"), 6),
+    # orders API
+    "POST /orders/": (lambda client, w: client.post(
+        "/orders/", json={"customer_id": w.customer["id"], "items": [{"burger_id": w.burger["id"]}]}), 2),
+    "POST /orders/bulk": (lambda client, w: client.post("/orders/bulk", json={"orders": [
+        {"customer_id": w.customer["id"], "items": [{"burger_id": w.burger["id"], "quantity": quantity}]}
+        for quantity in (1, 2, 3)]}), 5),
+    "PATCH /orders/status": (lambda client, w: client.patch(
+        "/orders/status", json={"order_ids": [w.order["id"]], "status": "Processing"}), 1),
+    "PATCH /orders/{id}/status": (lambda client, w: client.patch(
+        f"/orders/{w.order['id']}/status", json={"status": "Processing"}), 1),
+    "PUT /orders/{id}": (lambda client, w: client.put(
+        f"/orders/{w.order['id']}", params={"order_id": w.order["id"]},
+        json={"items": [{"burger_id": burger["id"], "quantity": 4} for burger in w.burgers]}), 12),
+    "GET /orders/{id}": (lambda client, w: client.get(f"/orders/{w.order['id']}"), 2),
+    "GET /orders/": (lambda client, w: client.get("/orders/"), 1),
+    "DELETE /orders/{id}": (lambda client, w: client.delete(f"/orders/{w.order['id']}"), 4),
+    # ingredients API
+    "GET /ingredients/{id}": (lambda client, w: client.get(f"/ingredients/{w.ingredient_ids[0]}"), 1),
+    "GET /ingredients/": (lambda client, w: client.get("/ingredients/"), 2),
+    "PUT /ingredients/{id}/stock": (lambda client, w: client.put(
+        f"/ingredients/{w.ingredient_ids[0]}/stock", json={"stock_quantity": None}), 3),
+    # analytics
+    "GET /analytics/revenue": (lambda client, w: client.get("/analytics/revenue"), 1),
+    "GET /analytics/average-ticket": (lambda client, w: client.get("/analytics/average-ticket"), 1),
+    "GET /analytics/status-funnel": (lambda client, w: client.get("/analytics/status-funnel"), 1),
+    "GET /analytics/top-burgers": (lambda client, w: client.get("/analytics/top-burgers"), 1),
+    "GET /analytics/ingredient-consumption": (lambda client, w: client.get("/analytics/ingredient-consumption"), 1),
+    # system
+    "GET /system/pool": (lambda client, w: client.get("/system/pool"), 0),
+    "GET /system/cache": (lambda client, w: client.get("/system/cache"), 0),
+    "GET /metrics": (lambda client, w: client.get("/metrics"), 0),
+}
+
+
+def _phone() -> str:
+    return f"+{uuid.uuid4().int % 10**12}"
+
+
+def _name() -> str:
+    return f"Burger {uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture
+def fixtures(client, make_customer, make_burger, ingredient_ids):
+    def make(size: int) -> SimpleNamespace:
+        """A customer with `size` orders of `size` burgers each, so per-row loading shows up as a growing count"""
+        customer = make_customer()
+        burgers = [make_burger() for _ in range(size)]
+        response = client.post("/orders/bulk", json={"orders": [
+            {"customer_id": customer["id"], "items": [{"burger_id": burger["id"]} for burger in burgers]}
+            for _ in range(size)]})
+        assert response.status_code == 200 and not response.json()["errors"], response.text
+        return SimpleNamespace(customer=customer, burger=burgers[0], burgers=burgers, order=response.json()["created"][0],
+                               ingredient_ids=ingredient_ids, spare_burger=make_burger())
+    return make
+
+
+@contextmanager
+def _counting_statements():
+    """Counts the statements sent to the database, streamed responses included"""
+    from sqlalchemy import event
+    from src.database.database import engine
+
+    counter = SimpleNamespace(statements=0)
+
+    def count(*args) -> None:
+        counter.statements += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        yield counter
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+def _count_statements(client, fixtures, size: int):
+    from src.core.cache import menu_cache
+
+    counts = {}
+    for endpoint, (request, _) in ENDPOINTS.items():
+        w = fixtures(size)
+        menu_cache.invalidate()
+        # the form posts redirect, the page behind the redirect is counted on its own
+        client.follow_redirects = False
+        try:
+            with _counting_statements() as counter:
+                response = request(client, w)
+        finally:
+            client.follow_redirects = True
+        assert response.status_code < 400, f"{endpoint}: {response.status_code} {response.text}"
+        counts[endpoint] = counter.statements
+    return counts
+
+
+def _add_order_history(client, make_customer, make_burger, orders: int) -> None:
+    customers = [make_customer() for _ in range(5)]
+    burgers = [make_burger() for _ in range(5)]
+    response = client.post("/orders/bulk", json={"orders": [
+        {"customer_id": customers[index % 5]["id"],
+         "items": [{"burger_id": burger["id"], "quantity": index % 3 + 1} for burger in burgers]}
+        for index in range(orders)]})
+    assert response.status_code == 200 and not response.json()["errors"], response.text
+
+
+def test_every_endpoint_is_covered(client):
+    from src.main import app
+
+    # documentation and the event stream don't touch the database, the stream never ends
+    ignored = {"GET /openapi.json", "GET /docs", "GET /docs/oauth2-redirect", "GET /redoc", "GET /orders/stream"}
+    routes = {f"{method} {route.path}" for route in app.routes
+              for method in getattr(route, "methods", ()) if method != "HEAD"}
+    assert {_normalized(route) for route in routes - ignored} == {_normalized(endpoint) for endpoint in ENDPOINTS}
+
+
+def _normalized(route: str) -> str:
+    method, path = route.split(" ", 1)
+    return " ".join((method, "/".join("{}" if part.startswith("{") else part for part in path.split("/"))))
+
+
+def test_statements_stay_within_budget_and_dont_grow_with_data(client, fixtures, make_customer, make_burger):
+    before = _count_statements(client, fixtures, size=1)
+    _add_order_history(client, make_customer, make_burger, orders=200)
+    after = _count_statements(client, fixtures, size=5)
+
+    assert after == before
+    assert {endpoint: count for endpoint, count in before.items() if count > ENDPOINTS[endpoint][1]} == {}
+
+
+def test_order_form_error_refills_lines_with_one_query(client, fixtures):
+    """A rejected order form is rendered again with the submitted lines, looked up together however many there are"""
+    from src.core.cache import menu_cache
+
+    counts = []
+    for size in (1, 5):
+        w = fixtures(size)
+        menu_cache.invalidate()
+        with _counting_statements() as counter:
+            response = client.post(f"/orders/{w.order['id']}/edit", data={
+                "customer_id": w.customer["id"], "item_burger_ids": [burger["id"] for burger in w.burgers],
+                "item_quantities": [1] * size, "status": "Completed"})
+        assert response.status_code == 400
+        assert all(burger["name"] in response.text for burger in w.burgers)
+        counts.append(counter.statements)
+    assert counts[0] == counts[1]